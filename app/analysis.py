@@ -0,0 +1,174 @@
+"""
+Per-segment text analysis shared by the extractors.
+
+Each extractor used to lowercase, clean and regex-scan every segment on its
+own, and relation extraction compiled one regex per (class variant, class
+variant, verb) and segment. analyze() does the per-segment work once and
+caches it by text:
+- words: the \\w+ runs of the text with their offsets and the separators
+  between them (exactly what the regexes' \\b, \\w and \\W see),
+- noun_phrases: determiner + noun chunks ("each order", "an orderItem"),
+- lower: the lowercase view without a leading requirement ID ("req-12 "),
+  tokenized the same way, for the relation patterns,
+- definition: the DEF statement without its "DEF" prefix, for attributes.
+
+variant_index() builds the class-variant lookup ("order item", "orders",
+"orderitems", ...) once per class list. Matching on words reproduces the
+regex semantics, so the extractors' results do not change.
+"""
+from __future__ import annotations
+
+import re
+from functools import cached_property, lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_WORD = re.compile(r"\w+")
+_REQUIREMENT_ID = re.compile(r"^\s*(req|fr|nfr|us|def)\s*[-:]?\s*\d+\s+")
+_DEF_PREFIX = re.compile(r"^\s*DEF\s+", re.IGNORECASE)
+_CAMEL_HUMP = re.compile(r"([a-z])([A-Z])")
+# Variants made of whole words separated by single spaces can be matched on words
+_WORD_SEQUENCE = re.compile(r"\w+(?: \w+)*")
+
+DETERMINERS = frozenset({"a", "an", "the", "each", "every"})
+# "order", "orderItem": a lowercase word with at most one capitalised hump
+_NOUN = re.compile(r"[a-z][a-z]+(?:[A-Z][a-z]+)?")
+
+# Analyses are kept for this many distinct segment texts
+ANALYSIS_CACHE_SIZE = 8192
+
+
+class Words:
+    """The words of a text, their offsets and the separators between them"""
+
+    __slots__ = ("text", "words", "offsets", "separators", "_positions")
+
+    def __init__(self, text: str):
+        self.text = text
+        words: List[str] = []
+        offsets: List[int] = []
+        ends: List[int] = []
+        for match in _WORD.finditer(text):
+            words.append(match.group())
+            offsets.append(match.start())
+            ends.append(match.end())
+        self.words = tuple(words)
+        self.offsets = tuple(offsets)
+        # separators[i] lies between words[i] and words[i + 1]
+        self.separators = tuple(text[end:start] for end, start in zip(ends, offsets[1:]))
+        self._positions: Optional[Dict[str, Tuple[int, ...]]] = None
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def positions(self) -> Dict[str, Tuple[int, ...]]:
+        """word -> indices of its occurrences"""
+        if self._positions is None:
+            positions: Dict[str, List[int]] = {}
+            for i, word in enumerate(self.words):
+                positions.setdefault(word, []).append(i)
+            self._positions = {word: tuple(found) for word, found in positions.items()}
+        return self._positions
+
+    def find(self, phrase: Tuple[str, ...]) -> List[Tuple[int, int]]:
+        """(first, last) word indices of every occurrence of the phrase, words separated by one space"""
+        found = []
+        last = len(phrase) - 1
+        for start in self.positions.get(phrase[0], ()):
+            if start + last >= len(self.words):
+                break
+            if all(self.words[start + k] == phrase[k] and self.separators[start + k - 1] == " "
+                   for k in range(1, last + 1)):
+                found.append((start, start + last))
+        return found
+
+
+class SegmentAnalysis:
+    """Views of one segment text, computed on first use"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    @cached_property
+    def words(self) -> Words:
+        return Words(self.text)
+
+    @cached_property
+    def noun_phrases(self) -> Tuple[Tuple[int, str, str], ...]:
+        """
+        (offset, determiner, noun) chunks, left to right and non-overlapping:
+        a determiner, whitespace, and a word like "order" or "orderItem".
+        """
+        words = self.words
+        chunks = []
+        i = 0
+        while i < len(words) - 1:
+            if (words.words[i] in DETERMINERS and words.separators[i].isspace()
+                    and _NOUN.fullmatch(words.words[i + 1])):
+                chunks.append((words.offsets[i], words.words[i], words.words[i + 1]))
+                i += 2
+            else:
+                i += 1
+        return tuple(chunks)
+
+    @cached_property
+    def lower(self) -> str:
+        """Lowercase text without a leading requirement ID"""
+        return _REQUIREMENT_ID.sub("", self.text.lower())
+
+    @cached_property
+    def lower_words(self) -> Words:
+        return Words(self.lower)
+
+    @cached_property
+    def definition(self) -> str:
+        """Stripped text without a leading "DEF" """
+        return _DEF_PREFIX.sub("", self.text.strip())
+
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def analyze(text: str) -> SegmentAnalysis:
+    """Shared analysis of a segment text"""
+    return SegmentAnalysis(text)
+
+
+def class_variants(name: str) -> Tuple[str, ...]:
+    """Lowercase spellings of a class in text: OrderItem -> orderitem, order item, orderitems, ..."""
+    lower = name.lower()
+    spaced = _CAMEL_HUMP.sub(r"\1 \2", name).lower()
+    return lower, spaced, lower + "s", spaced + "s", lower + "es"
+
+
+def variant_phrase(variant: str) -> Optional[Tuple[str, ...]]:
+    """The words of a variant, or None if it is not plain words separated by single spaces"""
+    return tuple(variant.split(" ")) if _WORD_SEQUENCE.fullmatch(variant) else None
+
+
+class VariantIndex:
+    """
+    How the classes appear in lowercase text: "orderitem", "order item",
+    "orderitems", "order items", "orderitemes" all name OrderItem.
+    """
+
+    def __init__(self, class_names: Tuple[str, ...]):
+        self.variants: Dict[str, str] = {}
+        for name in class_names:
+            for variant in class_variants(name):
+                self.variants[variant] = name
+        # Variant -> its words, or None if it can only be matched with a regex
+        self.phrases: Dict[str, Optional[Tuple[str, ...]]] = {
+            variant: variant_phrase(variant) for variant in self.variants
+        }
+
+    def get(self, variant: str) -> Optional[str]:
+        return self.variants.get(variant)
+
+
+@lru_cache(maxsize=16)
+def _variant_index(class_names: Tuple[str, ...]) -> VariantIndex:
+    return VariantIndex(class_names)
+
+
+def variant_index(class_names: Iterable[str]) -> VariantIndex:
+    """Variant index for a class list, built once per distinct list"""
+    return _variant_index(tuple(class_names))
@@ -0,0 +1,340 @@
+"""
+Batch mode: a staged pipeline that overlaps I/O and CPU across documents.
+
+Processing a directory one file at a time leaves the CPU idle while a file
+is read and the disk idle while a model is built. BatchPipeline runs the
+stages concurrently instead:
+
+    read -> extract -> segment -> build -> sink
+
+Each stage has its own workers: threads for I/O-bound stages (read, sink)
+and processes for CPU-bound ones (PDF/DOCX extraction, segmentation, model
+building); a process stage's threads each drive one worker process. Stages
+are connected by bounded queues, so a slow stage holds back the ones before
+it instead of letting documents pile up in memory. stats() reports, per
+stage, the queue depth (current, max, mean), busy / idle / blocked time and
+utilization: the stage with a full input queue and busy workers is the
+bottleneck.
+
+A document that fails in any stage is recorded in `errors` and skips the
+remaining stages. The default stages pass the document ID along with each
+payload: the one given with the path, as by corpus.expand_documents(), or
+the file name.
+
+Run with:
+    python -m app.batch data/input --out data/output/batch --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from app.progress import ProgressCallback, emit
+
+# Items allowed to wait in front of each stage
+DEFAULT_QUEUE_SIZE = 4
+DEFAULT_READ_WORKERS = 4
+
+_DONE = object()
+
+
+def doc_id_for(path: str) -> str:
+    return Path(path).name
+
+
+def read_document(path: str, doc_id: Optional[str] = None) -> Tuple[str, bytes]:
+    return doc_id or doc_id_for(path), Path(path).read_bytes()
+
+
+def extract_document(path: str, document: Tuple[str, bytes]) -> Tuple[str, str]:
+    """Text of a file's bytes; the type comes from the suffix, as in extract_text_from_file()"""
+    from app.file_processor import extract_text_from_stream
+
+    doc_id, data = document
+    suffix = Path(path).suffix.lower()
+    file_type = ".docx" if suffix == ".doc" else suffix
+    return doc_id, extract_text_from_stream(io.BytesIO(data), file_type)
+
+
+def segment_document(path: str, document: Tuple[str, str]) -> Tuple[str, List]:
+    from app.filter import segment_text
+
+    doc_id, text = document
+    return doc_id, segment_text(text, doc_id=doc_id)
+
+
+def build_document(path: str, document: Tuple[str, List]) -> Dict:
+    from app.model_builder import build_domain_model
+
+    doc_id, segments = document
+    return build_domain_model(doc_id, segments)
+
+
+@dataclass
+class StageSpec:
+    """
+    One pipeline stage.
+
+    Args:
+        name: Stage name used in stats and error messages
+        fn: fn(key, payload) -> payload for the next stage; module-level for process stages
+        workers: Documents processed concurrently in this stage
+        kind: "thread" (I/O) or "process" (CPU)
+    """
+    name: str
+    fn: Callable[[str, Any], Any]
+    workers: int = 1
+    kind: str = "thread"
+
+
+def default_stages(workers: Optional[int] = None, read_workers: int = DEFAULT_READ_WORKERS,
+                   kind: str = "process") -> List[StageSpec]:
+    """
+    read (threads) -> extract -> segment -> build (processes unless kind="thread").
+    Segmentation is much cheaper than extraction and building and gets half the workers.
+    """
+    cpus = workers or os.cpu_count() or 1
+    return [
+        StageSpec("read", read_document, read_workers, "thread"),
+        StageSpec("extract", extract_document, cpus, kind),
+        StageSpec("segment", segment_document, max(1, cpus // 2), kind),
+        StageSpec("build", build_document, cpus, kind),
+    ]
+
+
+class _StageMetrics:
+    def __init__(self, spec: StageSpec, queue_size: int):
+        self.spec = spec
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.idle = 0.0
+        self.blocked = 0.0
+        self.max_depth = 0
+        self.depth_sum = 0
+        self.depth_samples = 0
+
+    def enqueued(self, depth: int):
+        with self.lock:
+            self.max_depth = max(self.max_depth, depth)
+            self.depth_sum += depth
+            self.depth_samples += 1
+
+    def add(self, **amounts: float):
+        with self.lock:
+            for name, value in amounts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+
+class BatchPipeline:
+    """
+    Bounded-queue pipeline over documents.
+
+    Args:
+        stages: Stages in order (see default_stages()); the sink is added by run()
+        queue_size: Capacity of the queue in front of each stage
+        progress: Receives a "batch" event per document leaving the pipeline
+    """
+
+    def __init__(self, stages: Sequence[StageSpec], queue_size: int = DEFAULT_QUEUE_SIZE,
+                 progress: Optional[ProgressCallback] = None):
+        for spec in stages:
+            if spec.kind not in ("process", "thread"):
+                raise ValueError(f"Unknown stage kind: {spec.kind}")
+            if spec.workers < 1:
+                raise ValueError(f"Stage {spec.name} needs at least one worker")
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.progress = progress
+        self.errors: Dict[str, str] = {}
+        self._specs: List[StageSpec] = []
+        self._metrics: List[_StageMetrics] = []
+        self._queues: List[queue.Queue] = []
+        self._pools: List[Optional[Executor]] = []
+        self._remaining: List[int] = []
+        self._lock = threading.Lock()
+        self._finished = 0
+        self._started = 0.0
+        self._elapsed: Optional[float] = None
+
+    def run(self, paths: Iterable[Union[str, Tuple[str, Any]]], sink: Callable[[str, Any], None],
+            sink_workers: int = 1) -> Dict:
+        """
+        Push every path through the stages and hand each result to sink(path, model).
+        A (path, payload) pair gives the first stage a payload, e.g. the document ID.
+        The sink runs on threads of this process. Returns stats().
+        """
+        stages = self._specs = self.stages + [StageSpec("sink", sink, sink_workers, "thread")]
+        self.errors = {}
+        self._finished = 0
+        self._metrics = [_StageMetrics(spec, self.queue_size) for spec in stages]
+        self._queues = [queue.Queue(maxsize=self.queue_size) for _ in stages]
+        self._remaining = [spec.workers for spec in stages]  # workers still running, per stage
+        self._pools = [self._make_pool(spec) for spec in stages]
+        self._started, self._elapsed = time.monotonic(), None
+
+        threads = [
+            threading.Thread(target=self._work, args=(i,), name=f"batch-{spec.name}-{n}", daemon=True)
+            for i, spec in enumerate(stages) for n in range(spec.workers)
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for item in paths:
+                self._put(0, (item, None) if isinstance(item, str) else tuple(item))
+            for _ in range(stages[0].workers):
+                self._queues[0].put(_DONE)
+            for thread in threads:
+                thread.join()
+        finally:
+            for pool in self._pools:
+                if pool is not None:
+                    pool.shutdown(cancel_futures=True)
+            self._elapsed = time.monotonic() - self._started
+        return self.stats()
+
+    def stats(self) -> Dict:
+        """Per-stage counters, queue depths and time split; plus documents, errors and wall time"""
+        elapsed = self._elapsed if self._elapsed is not None else time.monotonic() - self._started
+        stages = {}
+        for position, m in enumerate(self._metrics):
+            with m.lock:
+                stages[m.spec.name] = {
+                    "kind": m.spec.kind,
+                    "workers": m.spec.workers,
+                    "queue_size": m.queue_size,
+                    "queue_depth": self._queues[position].qsize(),
+                    "max_queue_depth": m.max_depth,
+                    "mean_queue_depth": round(m.depth_sum / m.depth_samples, 2) if m.depth_samples else 0.0,
+                    "processed": m.processed,
+                    "errors": m.errors,
+                    "busy_s": round(m.busy, 3),
+                    "idle_s": round(m.idle, 3),
+                    "blocked_s": round(m.blocked, 3),
+                    "utilization": round(m.busy / (m.spec.workers * elapsed), 3) if elapsed > 0 else 0.0,
+                }
+        return {"documents": self._finished, "errors": dict(self.errors),
+                "seconds": round(elapsed, 3), "stages": stages}
+
+    @staticmethod
+    def _make_pool(spec: StageSpec) -> Optional[Executor]:
+        if spec.kind == "thread":
+            return None
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        return ProcessPoolExecutor(max_workers=spec.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _put(self, position: int, item: Tuple[str, Any]):
+        self._queues[position].put(item)
+        self._metrics[position].enqueued(self._queues[position].qsize())
+
+    def _work(self, position: int):
+        spec, metrics, inbox = self._specs[position], self._metrics[position], self._queues[position]
+        last = position == len(self._queues) - 1
+        pool = self._pools[position]
+        while True:
+            waited = time.monotonic()
+            item = inbox.get()
+            started = time.monotonic()
+            metrics.add(idle=started - waited)
+            if item is _DONE:
+                break
+
+            path, payload = item
+            try:
+                result = pool.submit(spec.fn, path, payload).result() if pool is not None else spec.fn(path, payload)
+            except Exception as e:
+                finished = time.monotonic()
+                metrics.add(busy=finished - started, errors=1)
+                self._document_done(path, f"{spec.name}: {type(e).__name__}: {e}")
+                continue
+
+            finished = time.monotonic()
+            metrics.add(busy=finished - started, processed=1)
+            if last:
+                self._document_done(path)
+            else:
+                # Blocks while the next stage's queue is full: backpressure
+                self._put(position + 1, (path, result))
+                metrics.add(blocked=time.monotonic() - finished)
+
+        with self._lock:
+            self._remaining[position] -= 1
+            closing = self._remaining[position] == 0
+        if closing and not last:
+            for _ in range(self._specs[position + 1].workers):
+                self._queues[position + 1].put(_DONE)
+
+    def _document_done(self, path: str, error: Optional[str] = None):
+        with self._lock:
+            if error is not None:
+                self.errors[path] = error
+            self._finished += 1
+            finished = self._finished
+        emit(self.progress, "batch", finished, None, path=path, error=error)
+
+
+def write_model(out_dir: Path) -> Callable[[str, Dict], None]:
+    """
+    Sink writing each model to <out_dir>/<doc_id>.json ("a/spec.pdf" -> "a/spec.pdf.json").
+    A second model for the same file fails instead of overwriting the first.
+    """
+    written = set()
+    lock = threading.Lock()
+
+    def sink(path: str, model: Dict):
+        doc_id = model["metadata"]["doc_id"]
+        parts = [part for part in PurePosixPath(doc_id).parts if part not in ("/", "..")]
+        if not parts:
+            raise ValueError(f"Cannot name an output file after document ID {doc_id!r}")
+        target = out_dir.joinpath(*parts[:-1], f"{parts[-1]}.json")
+        with lock:
+            if target in written:
+                raise FileExistsError(f"Another document was already written to {target}")
+            written.add(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(json.dumps(model, indent=2), encoding="utf-8")
+    return sink
+
+
+def main():
+    from app.corpus import expand_documents
+
+    parser = argparse.ArgumentParser(description="Build domain models for many documents with overlapping stages")
+    parser.add_argument("inputs", nargs="+", help="Files or directories")
+    parser.add_argument("--out", required=True, help="Directory for the models (one JSON file per document)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes per CPU stage (default: CPU count)")
+    parser.add_argument("--read-workers", type=int, default=DEFAULT_READ_WORKERS, help="Threads reading files")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="Queue capacity per stage")
+    parser.add_argument("--threads", action="store_true", help="Run the CPU stages on threads (debugging)")
+    args = parser.parse_args()
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stages = default_stages(args.workers, args.read_workers, "thread" if args.threads else "process")
+    stats = BatchPipeline(stages, args.queue_size).run(expand_documents(args.inputs), write_model(out_dir))
+
+    print(f"{stats['documents']} documents in {stats['seconds']}s ({len(stats['errors'])} errors)")
+    print(f"{'stage':>8} {'kind':>8} {'workers':>7} {'done':>5} {'queue max':>9} {'queue mean':>10} "
+          f"{'busy s':>8} {'blocked s':>9} {'util':>6}")
+    for name, s in stats["stages"].items():
+        print(f"{name:>8} {s['kind']:>8} {s['workers']:>7} {s['processed']:>5} {s['max_queue_depth']:>9} "
+              f"{s['mean_queue_depth']:>10} {s['busy_s']:>8} {s['blocked_s']:>9} {s['utilization']:>6}")
+    for path, error in stats["errors"].items():
+        print(f"error: {path}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Per-document processing budgets with cooperative cancellation.
+
+A Budget caps wall time, the number of relevant segments and the number of
+classes for one document. Extraction loops call check() between segments;
+once the budget is spent they stop and the pipeline returns a partial model
+whose quality metrics say where it stopped.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+REASON_TIME = "time"
+REASON_CANCELLED = "cancelled"
+REASON_MAX_SEGMENTS = "max_segments"
+REASON_MAX_CLASSES = "max_classes"
+
+
+class Budget:
+    """
+    Args:
+        max_seconds: Wall-time limit, measured from the first check in the worker
+        max_segments: Maximum number of relevant (REQ/DEF/CON) segments to extract from
+        max_classes: Maximum number of distinct classes to collect
+    """
+
+    def __init__(self, max_seconds: Optional[float] = None, max_segments: Optional[int] = None,
+                 max_classes: Optional[int] = None):
+        self.max_seconds = max_seconds
+        self.max_segments = max_segments
+        self.max_classes = max_classes
+        self.truncated = False
+        self.stopped_at: Dict = {}
+        self._started: Optional[float] = None
+        self._hard_stop = False
+        self._cancelled = threading.Event()
+
+    def __getstate__(self):
+        # Budgets are pickled into worker processes: the clock restarts there
+        # and cancellation only works within one process
+        state = self.__dict__.copy()
+        state["_started"] = None
+        del state["_cancelled"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def from_env(cls, max_seconds: Optional[float] = None, max_segments: Optional[int] = None,
+                 max_classes: Optional[int] = None) -> "Budget":
+        """Explicit limits, falling back to PIPELINE_MAX_SECONDS / _SEGMENTS / _CLASSES"""
+        def env(name, convert):
+            value = os.getenv(name)
+            return convert(value) if value else None
+
+        return cls(
+            max_seconds=max_seconds if max_seconds is not None else env("PIPELINE_MAX_SECONDS", float),
+            max_segments=max_segments if max_segments is not None else env("PIPELINE_MAX_SEGMENTS", int),
+            max_classes=max_classes if max_classes is not None else env("PIPELINE_MAX_CLASSES", int),
+        )
+
+    def start(self) -> "Budget":
+        if self._started is None:
+            self._started = time.monotonic()
+        return self
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started if self._started is not None else 0.0
+
+    def cancel(self):
+        """Request cooperative cancellation; loops stop at their next check"""
+        self._cancelled.set()
+
+    def check(self, stage: str, position: Optional[str] = None, processed: int = 0) -> bool:
+        """
+        Returns True if the caller must stop now (time spent or cancelled).
+        The first stop is recorded as the truncation point; `position` is the
+        segment ID (or page / paragraph) about to be processed.
+        """
+        if self._hard_stop:
+            return True
+        self.start()
+        if self._cancelled.is_set():
+            self.stop(stage, REASON_CANCELLED, position, processed)
+        elif self.max_seconds is not None and self.elapsed() > self.max_seconds:
+            self.stop(stage, REASON_TIME, position, processed)
+        return self._hard_stop
+
+    def stop(self, stage: str, reason: str, position: Optional[str] = None, processed: int = 0):
+        """
+        Record a truncation. Time and cancellation stop all further stages;
+        segment and class limits only cut the stage that hit them.
+        """
+        if reason in (REASON_TIME, REASON_CANCELLED):
+            self._hard_stop = True
+        if not self.truncated:
+            self.truncated = True
+            self.stopped_at = {
+                "reason": reason,
+                "stage": stage,
+                "position": position,
+                "processed": processed,
+                "elapsed_s": round(self.elapsed(), 3),
+            }
+
+    def report(self) -> Dict:
+        """Quality-metric fields describing whether and where processing stopped"""
+        report: Dict = {"truncated": self.truncated}
+        if self.truncated:
+            report["truncation"] = dict(self.stopped_at)
+        return report
@@ -0,0 +1,124 @@
+"""
+Canonical, deterministic form of domain models, content hashes and ETags.
+
+build_domain_model() stamps created_at and keeps lists in extraction order,
+so two runs over the same text differ byte for byte. canonicalize() sorts
+classes, attributes, relations and source segment lists into a fixed order
+and drops the timestamp (and the elapsed time of a truncated run); canonical_json() serialises with sorted keys and
+no whitespace. The result is the same bytes for the same content, in any
+process and under any hash seed.
+
+content_hash() hashes the canonical form with created_at left out, so it
+can also be computed for a model that still carries its timestamp. The API
+uses it as ETag: strong for canonical responses (the body is exactly the
+hashed bytes), weak for regular ones (same content, different timestamp).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, Optional, Tuple
+
+_SEGMENT_ID = re.compile(r"([A-Za-z]*)(\d+)$")
+_TIMESTAMPS = ("created_at",)
+# Wall-clock measurements in quality.truncation: they differ between runs of the same input and budget
+_TIMINGS = ("elapsed_s",)
+
+
+def segment_sort_key(segment_id: str) -> Tuple:
+    """Document order for IDs like S2 < S10 (plain string order puts S10 first)"""
+    match = _SEGMENT_ID.match(segment_id)
+    return (match.group(1), int(match.group(2)), "") if match else ("", -1, segment_id)
+
+
+def _sorted_segments(segment_ids) -> list:
+    return sorted(segment_ids or [], key=segment_sort_key)
+
+
+def _relation_key(relation: Dict) -> Tuple:
+    cardinality = relation.get("cardinality") or {}
+    return (relation.get("source", ""), relation.get("target", ""), relation.get("label", ""),
+            relation.get("type", ""), str(cardinality.get("source", "")), str(cardinality.get("target", "")))
+
+
+def canonicalize(model: Dict) -> Dict:
+    """
+    Copy of a model in canonical order, without created_at or truncation
+    timings and with its content_hash in the metadata. Segments stay in
+    document order.
+    """
+    model = _without_timings(model)
+    metadata = {k: v for k, v in model.get("metadata", {}).items() if k not in _TIMESTAMPS and k != "content_hash"}
+    classes = [
+        {
+            **cls,
+            "attributes": sorted(
+                ({**attr, "source_segments": _sorted_segments(attr.get("source_segments"))}
+                 for attr in cls.get("attributes", [])),
+                key=lambda a: (a.get("name", "").lower(), a.get("name", ""), a.get("type", ""))),
+            "source_segments": _sorted_segments(cls.get("source_segments")),
+        }
+        for cls in sorted(model.get("classes", []), key=lambda c: c.get("name", ""))
+    ]
+    relations = sorted(
+        ({**rel, "source_segments": _sorted_segments(rel.get("source_segments"))} for rel in model.get("relations", [])),
+        key=_relation_key)
+
+    canonical = {**model, "metadata": metadata, "classes": classes, "relations": relations}
+    canonical["metadata"]["content_hash"] = _digest(canonical)
+    return canonical
+
+
+def _without_timings(model: Dict) -> Dict:
+    truncation = (model.get("quality") or {}).get("truncation")
+    if not isinstance(truncation, dict) or not any(k in truncation for k in _TIMINGS):
+        return model
+    truncation = {k: v for k, v in truncation.items() if k not in _TIMINGS}
+    return {**model, "quality": {**model["quality"], "truncation": truncation}}
+
+
+def strip_timestamps(body: Any) -> Any:
+    """body without created_at in model metadata or truncation timings (also inside a {"model": ...} wrapper)"""
+    if not isinstance(body, dict):
+        return body
+    if isinstance(body.get("model"), dict):
+        return {**body, "model": strip_timestamps(body["model"])}
+    if isinstance(body.get("metadata"), dict):
+        body = _without_timings(body)
+        return {**body, "metadata": {k: v for k, v in body["metadata"].items() if k not in _TIMESTAMPS}}
+    return body
+
+
+def canonical_json(body: Any) -> bytes:
+    """Deterministic JSON: sorted keys, no insignificant whitespace, UTF-8"""
+    return json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _digest(body: Any) -> str:
+    return hashlib.sha256(canonical_json(body)).hexdigest()
+
+
+def content_hash(model: Dict) -> str:
+    """Hash of the model's content: equal for equal extraction results, whenever and wherever built"""
+    return canonicalize(strip_timestamps(model))["metadata"]["content_hash"]
+
+
+def response_etag(body: Any, weak: bool = False) -> str:
+    """
+    ETag for a response body. Timestamps are not part of it, so a strong tag
+    is only correct for bodies without them (canonical responses).
+    """
+    tag = f'"{_digest(strip_timestamps(body))}"'
+    return f"W/{tag}" if weak else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check, with the weak comparison RFC 9110 prescribes for it"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    candidates = (t.strip() for t in if_none_match.split(","))
+    return any((t[2:] if t.startswith("W/") else t) == opaque for t in candidates)
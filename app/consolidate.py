@@ -0,0 +1,208 @@
+"""
+Consolidation of near-duplicate candidate classes.
+
+extract_candidate_classes() yields one class per spelling: "Customer" and
+"Customers", "OrderItem" and "Orderitem", "Catalog" and "Catalogue".
+class_aliases() finds these and maps each to one canonical name:
+
+- every class is embedded as hashed character trigrams of its normalized
+  name (corpus.normalize_key, so plurals and casing fold together) plus,
+  with a lower weight, hashed words around its mentions in the segments,
+- all pairs are compared by cosine similarity, as blocked matrix products
+  (memory grows with block_size x classes, not classes x classes),
+- pairs at or above the threshold are joined with union-find; each group
+  is named after the member found in most segments (ties alphabetical).
+
+With the default weights, equal normalized names always merge, while a
+differing spelling needs matching contexts too: the name part alone
+cannot reach the threshold. Synonyms without shared spelling ("Client")
+are left alone.
+
+merge_classes(), merge_attributes() and remap_relations() apply the
+aliases to the extraction results.
+"""
+from __future__ import annotations
+
+import zlib
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.analysis import analyze, class_variants, variant_phrase
+from app.corpus import normalize_key
+from app.extract import dedupe_relations
+from app.filter import Segment
+from app.lexicon import get_lexicon
+
+DEFAULT_THRESHOLD = 0.75
+# Share of the similarity that comes from the contexts, the rest from the names
+DEFAULT_CONTEXT_WEIGHT = 0.2
+NAME_DIMENSIONS = 512
+CONTEXT_DIMENSIONS = 128
+# Words taken on each side of a mention
+CONTEXT_WINDOW = 3
+# Rows of the similarity matrix computed at once
+DEFAULT_BLOCK_SIZE = 256
+
+
+def _bucket(feature: str, dimensions: int) -> int:
+    # crc32, not hash(): buckets must not depend on the hash seed
+    return zlib.crc32(feature.encode("utf-8")) % dimensions
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def _hashed_counts(features: List[List[str]], dimensions: int) -> np.ndarray:
+    """Row-normalized count matrix with one row per feature list"""
+    buckets: Dict[str, int] = {}
+    rows, columns = [], []
+    for row, row_features in enumerate(features):
+        for feature in row_features:
+            column = buckets.get(feature)
+            if column is None:
+                column = buckets[feature] = _bucket(feature, dimensions)
+            rows.append(row)
+            columns.append(column)
+    flat = np.asarray(rows, dtype=np.int64) * dimensions + np.asarray(columns, dtype=np.int64)
+    counts = np.bincount(flat, minlength=len(features) * dimensions).astype(np.float32)
+    return _normalize_rows(counts.reshape(len(features), dimensions))
+
+
+def name_trigrams(name: str) -> List[str]:
+    key = f"^{normalize_key(name)}$"
+    return [key[i:i + 3] for i in range(len(key) - 2)]
+
+
+def mention_contexts(names: Sequence[str], class_map: Dict[str, Set[str]],
+                     segments: Iterable[Segment], window: int = CONTEXT_WINDOW) -> List[List[str]]:
+    """Per class, the non-stopwords within `window` words of its mentions in its own segments"""
+    phrases = {name: {phrase for phrase in map(variant_phrase, class_variants(name)) if phrase is not None}
+               for name in names}
+    in_segment: Dict[str, List[int]] = {}
+    for row, name in enumerate(names):
+        for segment_id in class_map[name]:
+            in_segment.setdefault(segment_id, []).append(row)
+
+    stopwords = get_lexicon().stopwords
+    contexts: List[List[str]] = [[] for _ in names]
+    for segment in segments:
+        rows = in_segment.get(segment.segment_id)
+        if not rows:
+            continue
+        words = analyze(segment.text).lower_words
+        for row in rows:
+            for phrase in phrases[names[row]]:
+                for first, last in words.find(phrase):
+                    around = words.words[max(0, first - window):first] + words.words[last + 1:last + 1 + window]
+                    contexts[row].extend(word for word in around if word not in stopwords)
+    return contexts
+
+
+def embed_classes(class_map: Dict[str, Set[str]], segments: Iterable[Segment],
+                  context_weight: float = DEFAULT_CONTEXT_WEIGHT) -> Tuple[List[str], np.ndarray]:
+    """
+    (sorted class names, float32 rows) whose dot products are the weighted name and
+    context similarities. Rows are unit length, or shorter for classes without context.
+    """
+    names = sorted(class_map)
+    name_part = _hashed_counts([name_trigrams(name) for name in names], NAME_DIMENSIONS)
+    vectors = [name_part * np.float32(np.sqrt(1.0 - context_weight))]
+    if context_weight > 0:
+        context_part = _hashed_counts(mention_contexts(names, class_map, segments), CONTEXT_DIMENSIONS)
+        vectors.append(context_part * np.float32(np.sqrt(context_weight)))
+    return names, np.hstack(vectors)
+
+
+def similar_pairs(vectors: np.ndarray, threshold: float,
+                  block_size: int = DEFAULT_BLOCK_SIZE) -> List[Tuple[int, int]]:
+    """(i, j) with i < j and vectors[i] . vectors[j] >= threshold, one block of rows at a time"""
+    pairs: List[Tuple[int, int]] = []
+    for start in range(0, len(vectors), block_size):
+        stop = min(start + block_size, len(vectors))
+        # Only columns from `start` on: the pairs left of the diagonal were found by earlier blocks
+        similarity = vectors[start:stop] @ vectors[start:].T
+        rows, columns = np.nonzero(similarity >= threshold)
+        columns += start
+        rows += start
+        above_diagonal = columns > rows
+        pairs.extend(zip(rows[above_diagonal].tolist(), columns[above_diagonal].tolist()))
+    return pairs
+
+
+def _groups(count: int, pairs: Iterable[Tuple[int, int]]) -> Dict[int, List[int]]:
+    parent = list(range(count))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(count):
+        groups.setdefault(find(i), []).append(i)
+    return groups
+
+
+def class_aliases(class_map: Dict[str, Set[str]], segments: Iterable[Segment],
+                  threshold: float = DEFAULT_THRESHOLD,
+                  context_weight: float = DEFAULT_CONTEXT_WEIGHT,
+                  block_size: int = DEFAULT_BLOCK_SIZE) -> Dict[str, str]:
+    """Merged class name -> canonical class name, for every class that is merged into another"""
+    if len(class_map) < 2:
+        return {}
+    names, vectors = embed_classes(class_map, segments, context_weight)
+
+    aliases: Dict[str, str] = {}
+    for members in _groups(len(names), similar_pairs(vectors, threshold, block_size)).values():
+        if len(members) < 2:
+            continue
+        canonical = min((names[i] for i in members), key=lambda n: (-len(class_map[n]), n))
+        aliases.update({names[i]: canonical for i in members if names[i] != canonical})
+    return aliases
+
+
+def merge_classes(class_map: Dict[str, Set[str]], aliases: Dict[str, str]) -> Dict[str, Set[str]]:
+    merged: Dict[str, Set[str]] = {}
+    for name, segment_ids in class_map.items():
+        merged.setdefault(aliases.get(name, name), set()).update(segment_ids)
+    return merged
+
+
+def merge_attributes(attrs_map: Dict[str, List[Dict]], aliases: Dict[str, str]) -> Dict[str, List[Dict]]:
+    """Attributes of merged classes joined under the canonical name; same-named attributes pool their segments"""
+    merged: Dict[str, List[Dict]] = {}
+    by_name: Dict[Tuple[str, str], Dict] = {}
+    for class_name, attributes in attrs_map.items():
+        target = merged.setdefault(aliases.get(class_name, class_name), [])
+        for attribute in attributes:
+            key = (aliases.get(class_name, class_name), attribute["name"].lower())
+            existing = by_name.get(key)
+            if existing is None:
+                by_name[key] = attribute = {**attribute, "source_segments": list(attribute["source_segments"])}
+                target.append(attribute)
+            else:
+                existing["source_segments"].extend(
+                    s for s in attribute["source_segments"] if s not in existing["source_segments"])
+    return merged
+
+
+def remap_relations(relations: List[Dict], aliases: Dict[str, str]) -> List[Dict]:
+    """Relations between canonical classes, without the ones that became self-references, deduplicated again"""
+    if not aliases:
+        return relations
+    remapped = []
+    for r in relations:
+        source, target = aliases.get(r["source"], r["source"]), aliases.get(r["target"], r["target"])
+        if source != target:
+            remapped.append({**r, "source": source, "target": target})
+    return dedupe_relations(remapped)
@@ -0,0 +1,341 @@
+"""
+Corpus mode: one consolidated domain model across many documents.
+
+Map: every document is processed independently (in parallel worker
+processes) and reduced right away to a compact *partial* - classes,
+attributes and relations keyed by a normalized name, with per-document
+provenance but without segment text.
+
+Reduce: merge_partials() combines partials. The merge only sums counts and
+unions provenance, so it is associative and commutative: partial merges of
+any subsets can be combined in any order and give the same result. Only one
+running partial is kept in memory, never the full per-document models.
+
+Run with:
+    python -m app.corpus data/input --out data/output/corpus_model.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from app.progress import ProgressCallback, emit
+
+
+SUPPORTED_SUFFIXES = {".pdf", ".docx", ".txt"}
+
+
+def normalize_key(name: str) -> str:
+    """
+    Key under which names from different documents are merged:
+    case- and separator-insensitive, with simple plural folding
+    ("OrderItems", "order item", "Orderitem" -> "orderitem").
+    """
+    key = re.sub(r"[^a-z0-9]", "", name.lower())
+    if key.endswith("ies") and len(key) > 4:
+        return key[:-3] + "y"
+    if key.endswith("s") and not key.endswith("ss") and len(key) > 3:
+        return key[:-1]
+    return key
+
+
+def empty_partial() -> Dict:
+    return {"documents": [], "classes": {}, "relations": {}}
+
+
+def summarize_model(model: Dict, keep_segments: bool = True) -> Dict:
+    """Reduce one domain model (as built by build_domain_model) to a partial"""
+    doc_id = model["metadata"]["doc_id"]
+    partial = empty_partial()
+    partial["documents"] = [doc_id]
+
+    def sources(segment_ids: List[str]) -> Dict[str, List[str]]:
+        return {doc_id: sorted(set(segment_ids)) if keep_segments else []}
+
+    for cls in model.get("classes", []):
+        key = normalize_key(cls["name"])
+        entry = partial["classes"].setdefault(key, {"names": {}, "attributes": {}, "sources": {}})
+        entry["names"][cls["name"]] = entry["names"].get(cls["name"], 0) + 1
+        _merge_sources(entry["sources"], sources(cls.get("source_segments", [])))
+
+        for attr in cls.get("attributes", []):
+            attr_key = attr["name"].lower()
+            a = entry["attributes"].setdefault(attr_key, {"names": {}, "types": {}, "sources": {}})
+            a["names"][attr["name"]] = a["names"].get(attr["name"], 0) + 1
+            attr_type = attr.get("type", "String")
+            a["types"][attr_type] = a["types"].get(attr_type, 0) + 1
+            _merge_sources(a["sources"], sources(attr.get("source_segments", [])))
+
+    for rel in model.get("relations", []):
+        source, target = normalize_key(rel["source"]), normalize_key(rel["target"])
+        label = rel.get("label", "").lower()
+        key = f"{source}|{target}|{label}"
+        entry = partial["relations"].setdefault(key, {
+            "source": source, "target": target, "label": label,
+            "types": {}, "cardinalities": {}, "sources": {}
+        })
+        rel_type = rel.get("type", "association")
+        entry["types"][rel_type] = entry["types"].get(rel_type, 0) + 1
+        cardinality = rel.get("cardinality", {})
+        card_key = f"{cardinality.get('source', '1')}|{cardinality.get('target', '0..*')}"
+        entry["cardinalities"][card_key] = entry["cardinalities"].get(card_key, 0) + 1
+        _merge_sources(entry["sources"], sources(rel.get("source_segments", [])))
+
+    return partial
+
+
+def merge_partials(*partials: Dict) -> Dict:
+    """Combine partials into a new partial (associative and commutative)"""
+    result = empty_partial()
+    documents: Set[str] = set()
+    for partial in partials:
+        documents.update(partial["documents"])
+        _merge_content(result, partial)
+    result["documents"] = sorted(documents)
+    return result
+
+
+def merge_into(acc: Dict, other: Dict) -> Dict:
+    """In-place variant of merge_partials(); returns acc"""
+    acc["documents"] = sorted(set(acc["documents"]) | set(other["documents"]))
+    return _merge_content(acc, other)
+
+
+def _merge_content(acc: Dict, other: Dict) -> Dict:
+    # Everything but the document list, which callers reducing many partials keep as a set
+    for key, cls in other["classes"].items():
+        entry = acc["classes"].setdefault(key, {"names": {}, "attributes": {}, "sources": {}})
+        _add_counts(entry["names"], cls["names"])
+        _merge_sources(entry["sources"], cls["sources"])
+        for attr_key, attr in cls["attributes"].items():
+            a = entry["attributes"].setdefault(attr_key, {"names": {}, "types": {}, "sources": {}})
+            _add_counts(a["names"], attr["names"])
+            _add_counts(a["types"], attr["types"])
+            _merge_sources(a["sources"], attr["sources"])
+
+    for key, rel in other["relations"].items():
+        entry = acc["relations"].setdefault(key, {
+            "source": rel["source"], "target": rel["target"], "label": rel["label"],
+            "types": {}, "cardinalities": {}, "sources": {}
+        })
+        _add_counts(entry["types"], rel["types"])
+        _add_counts(entry["cardinalities"], rel["cardinalities"])
+        _merge_sources(entry["sources"], rel["sources"])
+
+    return acc
+
+
+def finalize(partial: Dict) -> Dict:
+    """Turn a partial into a consolidated domain model with provenance"""
+    display = {key: _most_common(cls["names"]) for key, cls in partial["classes"].items()}
+
+    classes = []
+    for key in sorted(partial["classes"], key=lambda k: display[k]):
+        cls = partial["classes"][key]
+        attributes = [
+            {
+                "name": _most_common(attr["names"]),
+                "type": _most_common(attr["types"]),
+                "sources": attr["sources"],
+            }
+            for _, attr in sorted(cls["attributes"].items())
+        ]
+        classes.append({
+            "name": display[key],
+            "aliases": sorted(n for n in cls["names"] if n != display[key]),
+            "attributes": attributes,
+            "sources": cls["sources"],
+            "num_documents": len(cls["sources"]),
+        })
+
+    relations = []
+    for key in sorted(partial["relations"]):
+        rel = partial["relations"][key]
+        if rel["source"] not in display or rel["target"] not in display:
+            continue
+        source_card, target_card = _most_common(rel["cardinalities"]).split("|", 1)
+        relations.append({
+            "source": display[rel["source"]],
+            "target": display[rel["target"]],
+            "label": rel["label"],
+            "type": _most_common(rel["types"]),
+            "cardinality": {"source": source_card, "target": target_card},
+            "sources": rel["sources"],
+            "num_documents": len(rel["sources"]),
+        })
+
+    return {
+        "metadata": {
+            "corpus": True,
+            "documents": partial["documents"],
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "version": "0.1"
+        },
+        "classes": classes,
+        "relations": relations,
+        "quality": {
+            "num_documents": len(partial["documents"]),
+            "num_classes": len(classes),
+            "num_relations": len(relations)
+        }
+    }
+
+
+def process_document(path: str, doc_id: Optional[str] = None, keep_segments: bool = True) -> Dict:
+    """Map step: analyze one file and return only its partial"""
+    from app.pipeline import analyze_file
+
+    result = analyze_file(path, doc_id or Path(path).name)
+    return summarize_model(result["model"], keep_segments)
+
+
+def iter_corpus_files(root: str) -> Iterable[str]:
+    """Supported requirement files below a directory, in a stable order"""
+    for dirpath, _, filenames in sorted(os.walk(root)):
+        for name in sorted(filenames):
+            if Path(name).suffix.lower() in SUPPORTED_SUFFIXES:
+                yield str(Path(dirpath) / name)
+
+
+def expand_paths(inputs: Iterable[str]) -> Iterable[str]:
+    """Files as given, directories replaced by the supported files below them"""
+    for item in inputs:
+        if Path(item).is_dir():
+            yield from iter_corpus_files(item)
+        else:
+            yield item
+
+
+def expand_documents(inputs: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    (path, doc_id) for the files of expand_paths(). The ID is the path relative
+    to the directory it was found in ("a/spec.pdf", "b/spec.pdf") or the name
+    of a file given directly; an ID already taken is replaced by the full path.
+    """
+    def documents(item: str) -> Iterable[Tuple[str, str]]:
+        if not Path(item).is_dir():
+            return [(item, Path(item).name)]
+        return ((path, Path(path).relative_to(item).as_posix()) for path in iter_corpus_files(item))
+
+    return with_doc_ids(document for item in inputs for document in documents(item))
+
+
+def with_doc_ids(documents: Iterable[Union[str, Tuple[str, str]]]) -> Iterator[Tuple[str, str]]:
+    """(path, unique doc_id) for paths or (path, doc_id) pairs; a path alone is identified by its name"""
+    seen: Set[str] = set()
+    for document in documents:
+        path, doc_id = (document, Path(document).name) if isinstance(document, str) else document
+        if doc_id in seen:
+            doc_id = Path(path).resolve().as_posix()
+        seen.add(doc_id)
+        yield path, doc_id
+
+
+def build_corpus_model(paths: Iterable[Union[str, Tuple[str, str]]], workers: Optional[int] = None,
+                       keep_segments: bool = True, progress: Optional[ProgressCallback] = None,
+                       errors: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Map documents in parallel and reduce their partials as they complete.
+    At most 2 * workers documents are in flight, so memory stays bounded by
+    the running partial regardless of corpus size.
+
+    Args:
+        paths: Files to process, or (file, doc_id) pairs as from expand_documents()
+            (an iterator is consumed lazily)
+        workers: Worker processes (default: CPU count; 0 = run inline)
+        keep_segments: Keep segment IDs in provenance (otherwise only document IDs)
+        progress: Receives a "corpus" event per finished document
+        errors: If given, collects path -> error message instead of raising
+    """
+    acc = empty_partial()
+    documents: Set[str] = set()
+    done = 0
+
+    def collect(path: str, compute):
+        nonlocal done
+        try:
+            partial = compute()
+            documents.update(partial["documents"])
+            _merge_content(acc, partial)
+        except Exception as e:
+            if errors is None:
+                raise
+            errors[path] = f"{type(e).__name__}: {e}"
+        done += 1
+        emit(progress, "corpus", done, None, path=path)
+
+    def result() -> Dict:
+        acc["documents"] = sorted(documents)
+        return finalize(acc)
+
+    if workers == 0:
+        for path, doc_id in with_doc_ids(paths):
+            collect(path, lambda: process_document(path, doc_id, keep_segments))
+        return result()
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = {}
+        for path, doc_id in with_doc_ids(paths):
+            pending[pool.submit(process_document, path, doc_id, keep_segments)] = path
+            if len(pending) >= 2 * workers:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    collect(pending.pop(future), future.result)
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                collect(pending.pop(future), future.result)
+
+    return result()
+
+
+def _merge_sources(acc: Dict[str, List[str]], other: Dict[str, List[str]]):
+    for doc_id, segment_ids in other.items():
+        if doc_id in acc:
+            acc[doc_id] = sorted(set(acc[doc_id]) | set(segment_ids))
+        else:
+            acc[doc_id] = list(segment_ids)
+
+
+def _add_counts(acc: Dict[str, int], other: Dict[str, int]):
+    for key, count in other.items():
+        acc[key] = acc.get(key, 0) + count
+
+
+def _most_common(counts: Dict[str, int]) -> str:
+    # Highest count wins; ties broken alphabetically so the result is order-independent
+    return min(counts, key=lambda k: (-counts[k], k))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build one consolidated domain model from many documents")
+    parser.add_argument("inputs", nargs="+", help="Files or directories")
+    parser.add_argument("--out", help="Write the consolidated model here (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-segments", action="store_true", help="Keep only document IDs as provenance")
+    args = parser.parse_args()
+
+    errors: Dict[str, str] = {}
+    model = build_corpus_model(expand_documents(args.inputs), workers=args.workers, keep_segments=not args.no_segments, errors=errors)
+    model["errors"] = errors
+
+    output = json.dumps(model, indent=2)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(output, encoding="utf-8")
+        print(f"{model['quality']['num_documents']} documents -> {model['quality']['num_classes']} classes, "
+              f"{model['quality']['num_relations']} relations ({len(errors)} errors)")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
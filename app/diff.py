@@ -0,0 +1,140 @@
+"""
+Structural diff between two domain models (e.g. two versions of one document).
+
+Classes are indexed by name, attributes by (class, name) and relations by
+(source, target, label), so a diff is a handful of dict lookups per element
+and runs in linear time. Metadata such as created_at is ignored. Every
+reported change carries the segment IDs responsible for it: the new
+segments for additions, the old ones for removals, both for changes.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+
+def diff_models(old: Dict, new: Dict) -> Dict:
+    """
+    Compare two models as built by build_domain_model.
+
+    Returns:
+        Dict with "identical", "summary" counts and "classes" / "relations"
+        sections, each holding "added", "removed" and "changed" lists.
+    """
+    old_classes = _index_classes(old)
+    new_classes = _index_classes(new)
+
+    classes_added = [_class_entry(new_classes[n]) for n in new_classes if n not in old_classes]
+    classes_removed = [_class_entry(old_classes[n]) for n in old_classes if n not in new_classes]
+    classes_changed = []
+    for name, new_cls in new_classes.items():
+        old_cls = old_classes.get(name)
+        if old_cls is not None:
+            change = _diff_attributes(old_cls, new_cls)
+            if change:
+                classes_changed.append({"name": name, **change})
+
+    old_relations = _index_relations(old)
+    new_relations = _index_relations(new)
+
+    relations_added = [_relation_entry(r) for k, r in new_relations.items() if k not in old_relations]
+    relations_removed = [_relation_entry(r) for k, r in old_relations.items() if k not in new_relations]
+    relations_changed = []
+    for key, new_rel in new_relations.items():
+        old_rel = old_relations.get(key)
+        if old_rel is not None:
+            change = _diff_relation(old_rel, new_rel)
+            if change:
+                relations_changed.append(change)
+
+    attribute_changes = {"added": 0, "removed": 0, "changed": 0}
+    for cls in classes_changed:
+        for kind in attribute_changes:
+            attribute_changes[kind] += len(cls["attributes"][kind])
+
+    summary = {
+        "classes": {"added": len(classes_added), "removed": len(classes_removed), "changed": len(classes_changed)},
+        "attributes": attribute_changes,
+        "relations": {"added": len(relations_added), "removed": len(relations_removed),
+                      "changed": len(relations_changed)},
+        "cardinalities_changed": sum(1 for r in relations_changed if "cardinality" in r),
+    }
+
+    return {
+        "old_doc_id": old.get("metadata", {}).get("doc_id"),
+        "new_doc_id": new.get("metadata", {}).get("doc_id"),
+        "identical": not any(v for section in ("classes", "relations") for v in summary[section].values()),
+        "summary": summary,
+        "classes": {"added": classes_added, "removed": classes_removed, "changed": classes_changed},
+        "relations": {"added": relations_added, "removed": relations_removed, "changed": relations_changed},
+    }
+
+
+def _index_classes(model: Dict) -> Dict[str, Dict]:
+    return {cls["name"]: cls for cls in model.get("classes", [])}
+
+
+def _index_relations(model: Dict) -> Dict[Tuple[str, str, str], Dict]:
+    return {(r["source"], r["target"], r.get("label", "")): r for r in model.get("relations", [])}
+
+
+def _class_entry(cls: Dict) -> Dict:
+    return {
+        "name": cls["name"],
+        "attributes": [a["name"] for a in cls.get("attributes", [])],
+        "source_segments": cls.get("source_segments", []),
+    }
+
+
+def _relation_entry(rel: Dict) -> Dict:
+    return {
+        "source": rel["source"],
+        "target": rel["target"],
+        "label": rel.get("label", ""),
+        "type": rel.get("type", "association"),
+        "cardinality": rel.get("cardinality", {}),
+        "source_segments": rel.get("source_segments", []),
+    }
+
+
+def _segments(*items: Dict) -> List[str]:
+    return sorted({s for item in items for s in item.get("source_segments", [])})
+
+
+def _diff_attributes(old_cls: Dict, new_cls: Dict) -> Dict:
+    if old_cls.get("attributes") == new_cls.get("attributes"):
+        # Unchanged classes are the common case; list equality is a single C-level comparison
+        return {}
+    old_attrs = {a["name"]: a for a in old_cls.get("attributes", [])}
+    new_attrs = {a["name"]: a for a in new_cls.get("attributes", [])}
+
+    added = [{"name": n, "type": a.get("type"), "source_segments": a.get("source_segments", [])}
+             for n, a in new_attrs.items() if n not in old_attrs]
+    removed = [{"name": n, "type": a.get("type"), "source_segments": a.get("source_segments", [])}
+               for n, a in old_attrs.items() if n not in new_attrs]
+    changed = [{"name": n, "type": {"old": old_attrs[n].get("type"), "new": a.get("type")},
+                "source_segments": _segments(old_attrs[n], a)}
+               for n, a in new_attrs.items() if n in old_attrs and old_attrs[n].get("type") != a.get("type")]
+
+    if not (added or removed or changed):
+        return {}
+    return {
+        "attributes": {"added": added, "removed": removed, "changed": changed},
+        "source_segments": _segments(old_cls, new_cls),
+    }
+
+
+def _diff_relation(old_rel: Dict, new_rel: Dict) -> Dict:
+    change: Dict = {}
+    if old_rel.get("type") != new_rel.get("type"):
+        change["type"] = {"old": old_rel.get("type"), "new": new_rel.get("type")}
+    if old_rel.get("cardinality") != new_rel.get("cardinality"):
+        change["cardinality"] = {"old": old_rel.get("cardinality"), "new": new_rel.get("cardinality")}
+    if not change:
+        return {}
+    return {
+        "source": new_rel["source"],
+        "target": new_rel["target"],
+        "label": new_rel.get("label", ""),
+        **change,
+        "source_segments": _segments(old_rel, new_rel),
+    }
@@ -0,0 +1,378 @@
+"""
+Bounded worker pool for CPU-bound pipeline work, shared by priority classes.
+
+Requests are admitted only while fewer than `workers + queue_depth` tasks of
+their priority class are in flight; beyond that submit() raises QueueFull so
+the API can answer 429 with a Retry-After estimate instead of letting every
+request slow down.
+
+Admitted tasks wait in one queue per priority class ("interactive" for API
+and MCP requests, "bulk" for jobs and batch reprocessing) and are handed to
+the pool only when a worker is free, by weighted fair queuing: each class
+advances a virtual clock by (task duration / weight) per task, and
+the class with the earliest clock goes next. With both classes backlogged,
+interactive work gets `weight` times the worker time of bulk work (measured
+per task and charged to its class); bulk work
+still gets its share, and all of it when nothing else is waiting. Bulk work
+split into segment batches (see bulk_pool()) thus yields the next free worker
+to a waiting interactive request at the next batch boundary.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+DEFAULT_WEIGHTS = {INTERACTIVE: 8.0, BULK: 1.0}
+
+# Completed tasks kept per class for latency percentiles and throughput
+_WINDOW = 1000
+
+
+class QueueFull(RuntimeError):
+    """Raised when the pool and its queue are saturated"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Pipeline queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """'interactive=8,bulk=1' -> {"interactive": 8.0, "bulk": 1.0}"""
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if not name.strip() or float(weight) <= 0:
+            raise ValueError(f"Invalid priority weight: {part!r}")
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+@dataclass
+class _Task:
+    fn: Callable
+    args: tuple
+    kwargs: dict
+    local: bool
+    future: Future
+    submitted: float
+    started: float = 0.0
+    charged: float = 0.0    # estimated worker time added to the class clock at dispatch
+
+
+@dataclass
+class _PriorityClass:
+    weight: float
+    queue: Deque[_Task] = field(default_factory=deque)
+    clock: float = 0.0      # virtual time at which the class's next task finishes its turn
+    in_flight: int = 0      # queued + running
+    running: int = 0
+    completed: int = 0
+    rejected: int = 0
+    durations: Deque[float] = field(default_factory=lambda: deque(maxlen=_WINDOW))
+    waits: Deque[float] = field(default_factory=lambda: deque(maxlen=_WINDOW))
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=_WINDOW))
+    finished_at: Deque[float] = field(default_factory=lambda: deque(maxlen=_WINDOW))
+
+    def cost(self) -> Optional[float]:
+        # Expected worker time of the next task, None until something was measured
+        return sum(self.durations) / len(self.durations) if self.durations else None
+
+
+def _percentile_ms(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)] * 1000, 1)
+
+
+class PipelineExecutor:
+    """
+    Process (or thread) pool with admission control and priority classes.
+
+    Args:
+        workers: Number of worker processes (default: CPU count)
+        queue_depth: Tasks of each priority class allowed to wait for a free worker
+        kind: "process" for CPU-bound work, "thread" for tests / debugging
+        weights: Priority class -> share of worker time when classes compete
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_depth: Optional[int] = None, kind: str = "process",
+                 weights: Optional[Dict[str, float]] = None):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown pool kind: {kind}")
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_depth = self.workers * 2 if queue_depth is None else queue_depth
+        self.kind = kind
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+
+        self._pool: Optional[Executor] = None
+        self._local_pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._classes = {name: _PriorityClass(weight) for name, weight in self.weights.items()}
+        self._running = 0
+        self._virtual_time = 0.0
+        self._rejected = 0
+        self._completed = 0
+        self._durations = deque(maxlen=200)
+
+    @property
+    def capacity(self) -> int:
+        """Tasks in flight (running or queued) allowed per priority class"""
+        return self.workers + self.queue_depth
+
+    def check_admission(self, priority: str = INTERACTIVE):
+        """Raise QueueFull if a new task of this class would be rejected right now"""
+        with self._lock:
+            cls = self._class(priority)
+            if cls.in_flight >= self.capacity:
+                cls.rejected += 1
+                self._rejected += 1
+                raise QueueFull(self._retry_after(cls))
+
+    def submit(self, fn: Callable, *args, priority: str = INTERACTIVE, **kwargs) -> Future:
+        """Submit work to the pool; raises QueueFull when this class is saturated"""
+        return self._submit(fn, args, kwargs, priority, local=False)
+
+    def submit_local(self, fn: Callable, *args, priority: str = INTERACTIVE, **kwargs) -> Future:
+        """
+        Run work on a thread in this process, still counted against admission
+        and scheduled with the pool's work. Needed when arguments cannot be
+        pickled, e.g. progress callbacks.
+        """
+        return self._submit(fn, args, kwargs, priority, local=True)
+
+    async def run(self, fn: Callable, *args, priority: str = INTERACTIVE, **kwargs):
+        """Await the result of fn(*args, **kwargs) executed in the pool"""
+        return await asyncio.wrap_future(self.submit(fn, *args, priority=priority, **kwargs))
+
+    def wait_for_slot(self, priority: str, timeout: Optional[float] = None) -> bool:
+        """Block until this class has room for another task (or the timeout passes)"""
+        with self._released:
+            return self._released.wait_for(lambda: self._class(priority).in_flight < self.capacity, timeout)
+
+    def bulk_pool(self, priority: str = BULK) -> "PriorityPool":
+        """concurrent.futures.Executor view submitting at `priority` and waiting for room instead of raising"""
+        return PriorityPool(self, priority)
+
+    def _submit(self, fn: Callable, args: tuple, kwargs: dict, priority: str, local: bool) -> Future:
+        task = _Task(fn, args, kwargs, local, Future(), time.monotonic())
+        with self._lock:
+            cls = self._class(priority)
+            if cls.in_flight >= self.capacity:
+                cls.rejected += 1
+                self._rejected += 1
+                raise QueueFull(self._retry_after(cls))
+            if not cls.queue and cls.running == 0:
+                # A class returning from idle starts at the current virtual time: no credit for idling
+                cls.clock = max(cls.clock, self._virtual_time)
+            cls.in_flight += 1
+            cls.queue.append(task)
+        self._dispatch()
+        return task.future
+
+    def _dispatch(self):
+        """Hand queued tasks to free workers, earliest class clock first"""
+        while True:
+            with self._lock:
+                if self._running >= self.workers:
+                    return
+                waiting = [(cls.clock, name) for name, cls in self._classes.items() if cls.queue]
+                if not waiting:
+                    return
+                clock, name = min(waiting)
+                cls = self._classes[name]
+                task = cls.queue.popleft()
+                if not task.future.set_running_or_notify_cancel():
+                    cls.in_flight -= 1
+                    self._released.notify_all()
+                    continue
+                self._virtual_time = clock
+                task.charged = self._estimate(cls)
+                cls.clock = clock + task.charged / cls.weight
+                cls.running += 1
+                self._running += 1
+                task.started = time.monotonic()
+
+            try:
+                pool = self._get_local_pool() if task.local else self._get_pool()
+                inner = pool.submit(task.fn, *task.args, **task.kwargs)
+            except Exception as e:
+                self._finish(name, task, None, e)
+                continue
+            inner.add_done_callback(lambda f, name=name, task=task: self._finish(name, task, f))
+
+    def _finish(self, name: str, task: _Task, inner: Optional[Future], error: Optional[BaseException] = None):
+        finished = time.monotonic()
+        with self._lock:
+            cls = self._classes[name]
+            cls.running -= 1
+            cls.in_flight -= 1
+            self._running -= 1
+            # Replace the estimate by the measured worker time
+            cls.clock += (finished - task.started - task.charged) / cls.weight
+            if inner is not None:
+                cls.completed += 1
+                self._completed += 1
+                cls.durations.append(finished - task.started)
+                cls.waits.append(task.started - task.submitted)
+                cls.latencies.append(finished - task.submitted)
+                cls.finished_at.append(finished)
+                self._durations.append(finished - task.submitted)
+            self._released.notify_all()
+
+        if inner is None:
+            task.future.set_exception(error)
+        elif inner.cancelled():
+            task.future.set_exception(RuntimeError("Task was cancelled by pool shutdown"))
+        elif inner.exception() is not None:
+            task.future.set_exception(inner.exception())
+        else:
+            task.future.set_result(inner.result())
+        self._dispatch()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            durations = list(self._durations)
+            classes = {}
+            for name, cls in self._classes.items():
+                finished_at = list(cls.finished_at)
+                span = finished_at[-1] - finished_at[0] if len(finished_at) > 1 else 0.0
+                classes[name] = {
+                    "weight": cls.weight,
+                    "queued": len(cls.queue),
+                    "running": cls.running,
+                    "completed": cls.completed,
+                    "rejected": cls.rejected,
+                    "wait_p50_ms": _percentile_ms(list(cls.waits), 50),
+                    "wait_p99_ms": _percentile_ms(list(cls.waits), 99),
+                    "latency_p50_ms": _percentile_ms(list(cls.latencies), 50),
+                    "latency_p90_ms": _percentile_ms(list(cls.latencies), 90),
+                    "latency_p99_ms": _percentile_ms(list(cls.latencies), 99),
+                    "throughput_per_s": round((len(finished_at) - 1) / span, 2) if span > 0 else None,
+                }
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "in_flight": sum(cls.in_flight for cls in self._classes.values()),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_duration_s": round(sum(durations) / len(durations), 4) if durations else None,
+                "classes": classes,
+            }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pools = [self._pool, self._local_pool]
+            self._pool = self._local_pool = None
+            queued = [task for cls in self._classes.values() for task in cls.queue]
+            for cls in self._classes.values():
+                cls.in_flight -= len(cls.queue)
+                cls.queue.clear()
+        for task in queued:
+            task.future.cancel()
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _class(self, priority: str) -> _PriorityClass:
+        cls = self._classes.get(priority)
+        if cls is None:
+            raise ValueError(f"Unknown priority class: {priority}. Known: {', '.join(self._classes)}")
+        return cls
+
+    def _estimate(self, cls: _PriorityClass) -> float:
+        cost = cls.cost()
+        if cost is None:
+            costs = [c for c in (other.cost() for other in self._classes.values()) if c is not None]
+            cost = sum(costs) / len(costs) if costs else 0.0
+        return cost
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.kind == "process":
+                    # multiprocessing is only loaded once the first job is submitted
+                    import multiprocessing
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _get_local_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._local_pool is None:
+                self._local_pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pipeline-local")
+            return self._local_pool
+
+    def _retry_after(self, cls: _PriorityClass) -> int:
+        # Time for the queue ahead of a new request to drain, called with the lock held
+        durations = cls.durations or self._durations
+        if not durations:
+            return 1
+        avg = sum(durations) / len(durations)
+        return max(1, math.ceil(avg * self.capacity / self.workers))
+
+
+class PriorityPool(Executor):
+    """
+    Executor that submits to a PipelineExecutor at a fixed priority and, when
+    that class is saturated, waits for room instead of raising QueueFull.
+    Lets code written against concurrent.futures (parallel_build_domain_model)
+    run its tasks as, e.g., bulk work.
+    """
+
+    def __init__(self, executor: PipelineExecutor, priority: str):
+        self.executor = executor
+        self.priority = priority
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        while True:
+            try:
+                return self.executor.submit(fn, *args, priority=self.priority, **kwargs)
+            except QueueFull as e:
+                self.executor.wait_for_slot(self.priority, e.retry_after)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        # The shared executor outlives this view
+        pass
+
+
+_executor: Optional[PipelineExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> PipelineExecutor:
+    """
+    Shared executor configured from the environment:
+    PIPELINE_WORKERS, PIPELINE_QUEUE_DEPTH, PIPELINE_POOL (process|thread)
+    and PIPELINE_WEIGHTS (e.g. "interactive=8,bulk=1")
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = os.getenv("PIPELINE_WORKERS")
+            queue_depth = os.getenv("PIPELINE_QUEUE_DEPTH")
+            weights = os.getenv("PIPELINE_WEIGHTS")
+            _executor = PipelineExecutor(
+                workers=int(workers) if workers else None,
+                queue_depth=int(queue_depth) if queue_depth else None,
+                kind=os.getenv("PIPELINE_POOL", "process"),
+                weights=parse_weights(weights) if weights else None,
+            )
+        return _executor
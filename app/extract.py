@@ -1,163 +1,122 @@
 from __future__ import annotations
 
 import re
-from typing import List, Dict, Set
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+from app.analysis import SegmentAnalysis, VariantIndex, analyze, variant_index
+from app.budget import REASON_MAX_CLASSES, Budget
 from app.filter import Segment
-
-
-_STOPWORDS = {
-    "the", "a", "an", "and", "or", "to", "of", "in", "on", "for", "with", "by",
-    "is", "are", "be", "as", "at", "from", "this", "that", "these", "those",
-    "system", "shall", "must", "should", "can", "may", "will", "req", "fr",
-    "nfr", "us", "info", "def", "con", "shall", "must", "should",
-    "project", "document", "scope", "stakeholders", "each", "person",
-    "def", "con", "req", "one", "more", "exactly", "zero", "all",
-    "within", "between", "greater", "less", "than", "equal", "not",
-    "i", "we", "you", "they", "it", "he", "she",
-    "commerce", "management", "specification", "version",
-    "introduction", "purpose", "functional", "non-functional",
-    "registered", "temporary", "financial", "item", "purchase"
-}
-
-_ATTRIBUTE_KEYWORDS = {
-    "id", "name", "email", "password", "address", "phone", "date", "time",
-    "amount", "price", "quantity", "status", "description", "type", "code",
-    "number", "value", "flag", "url", "path", "key", "token", "timestamp",
-    "created", "updated", "modified", "deleted", "active", "enabled",
-    "firstname", "lastname", "username", "fullname", "displayname",
-    "street", "city", "state", "country", "zipcode", "postalcode",
-    "total", "subtotal", "discount", "tax", "shipping", "rating", "comment",
-    "proof", "stock", "unit", "transaction"
-}
+from app.lexicon import get_lexicon
+from app.progress import ProgressCallback, emit
 
 
 def _normalize_class_name(name: str) -> str:
     """Normalize class name to handle case variations (e.g., 'orderitem' → 'Orderitem')"""
-    if re.match(r'^[A-Z][a-z]+[A-Z]', name):
-        return name
-    return name.capitalize()
+    return get_lexicon().normalize_class_name(name)
 
 
 def _is_likely_attribute(token: str) -> bool:
     """Check if a token is likely an attribute rather than a class"""
-    low = token.lower()
-
-    if low in _ATTRIBUTE_KEYWORDS:
-        return True
-
-    attribute_suffixes = ["id", "name", "date", "time", "amount", "price",
-                          "count", "number", "code", "status", "type", "quantity"]
-    if any(low.endswith(suffix) for suffix in attribute_suffixes):
-        return True
-
-    if re.match(r'^[a-z]+[A-Z][a-zA-Z]*$', token):
-        return True
-
-    return False
+    return get_lexicon().is_attribute(token)
 
 
 def _ok_concept(token: str) -> bool:
     """Check if token is a valid class concept"""
-    low = token.lower()
-
-    if token == "Address":
-        return True
-
-    if len(token) < 3:
-        return False
-
-    if low in _STOPWORDS:
-        return False
-
-    if re.fullmatch(r"\d+", token):
-        return False
+    return get_lexicon().is_concept(token)
 
-    if re.fullmatch(r"(req|fr|nfr|us)\s*[-:]?\s*\d+", low):
-        return False
 
-    if re.fullmatch(r"[a-z]+-\d+", low):
-        return False
+_DEF_CLASS = re.compile(r'DEF\s+(?:A|An|The)\s+([A-Z][a-zA-Z]+)')
 
-    if low in ["email", "price", "quantity", "rating", "proof", "zero", "stock"]:
-        return False
 
-    if _is_likely_attribute(token):
-        return False
-
-    return True
-
-
-def extract_candidate_classes(segments: List[Segment]) -> Dict[str, Set[str]]:
+def extract_candidate_classes(segments: List[Segment],
+                              progress: Optional[ProgressCallback] = None,
+                              budget: Optional[Budget] = None) -> Dict[str, Set[str]]:
     """Extract candidate class names from segments"""
     classes: Dict[str, Set[str]] = {}
+    lexicon = get_lexicon()
 
-    for s in segments:
+    for i, s in enumerate(segments, start=1):
+        if budget is not None and budget.check("classes", s.segment_id, i - 1):
+            break
+        emit(progress, "classes", i, len(segments))
         if s.label == "INFO":
             continue
 
         if s.label == "DEF":
-            def_match = re.search(
-                r'DEF\s+(?:A|An|The)\s+([A-Z][a-zA-Z]+)',
-                s.text  # Remove IGNORECASE flag
-            )
+            def_match = _DEF_CLASS.search(s.text)
             if def_match:
-                class_name = _normalize_class_name(def_match.group(1))
-                if _ok_concept(class_name):
-                    classes.setdefault(class_name, set()).add(s.segment_id)
+                class_name = lexicon.normalize_class_name(def_match.group(1))
+                if lexicon.is_concept(class_name):
+                    _add_class(classes, class_name, s.segment_id, budget, i - 1)
                     continue
 
         # For REQ/CON statements
         if s.label in ["REQ", "CON"]:
-            entity_matches = re.findall(
-                r'\b(?:a|an|the|each|every)\s+([a-z][a-z]+(?:[A-Z][a-z]+)?)\b',
-                s.text
-            )
-            for entity in entity_matches:
-                class_name = _normalize_class_name(entity)
-                if _ok_concept(class_name) and len(entity) > 3:
-                    classes.setdefault(class_name, set()).add(s.segment_id)
+            for _, _, entity in analyze(s.text).noun_phrases:
+                if len(entity) <= 3:
+                    continue
+                class_name = lexicon.normalize_class_name(entity)
+                if lexicon.is_concept(class_name):
+                    _add_class(classes, class_name, s.segment_id, budget, i - 1)
 
     return classes
 
 
-def extract_attributes(segments: List[Segment]) -> Dict[str, List[Dict]]:
+def _add_class(classes: Dict[str, Set[str]], class_name: str, segment_id: str,
+               budget: Optional[Budget], processed: int):
+    """Record a class occurrence; new classes beyond the budget's max_classes are dropped"""
+    if (budget is not None and budget.max_classes is not None
+            and class_name not in classes and len(classes) >= budget.max_classes):
+        budget.stop("classes", REASON_MAX_CLASSES, segment_id, processed)
+        return
+    classes.setdefault(class_name, set()).add(segment_id)
+
+
+_ATTRIBUTES_AFTER = re.compile(
+    r'(?:A|An|The)\s+([A-Z][a-zA-Z]+)\s+.*?\b(?:with|has|contains?|includes?)\s+(?:a|an)?\s*(.*?)(?:\.|$)',
+    re.IGNORECASE
+)
+_ATTRIBUTE_LIST_AFTER = re.compile(
+    r'(?:A|An|The)\s+([A-Z][a-zA-Z]+)\s+.*?(?:with|has|includes?|contains?)\s+([\w,\s]+)',
+    re.IGNORECASE
+)
+
+
+def extract_attributes(segments: List[Segment],
+                       progress: Optional[ProgressCallback] = None,
+                       budget: Optional[Budget] = None) -> Dict[str, List[Dict]]:
     """Extract attributes from DEF statements"""
     attrs: Dict[str, List[Dict]] = {}
+    lexicon = get_lexicon()
 
-    for s in segments:
+    for i, s in enumerate(segments, start=1):
+        if budget is not None and budget.check("attributes", s.segment_id, i - 1):
+            break
+        emit(progress, "attributes", i, len(segments))
         if s.label != "DEF":
             continue
 
-        txt = s.text.strip()
-        txt_clean = re.sub(r"^\s*DEF\s+", "", txt, flags=re.IGNORECASE)
+        txt_clean = analyze(s.text).definition
 
-        match1 = re.search(
-            r'(?:A|An|The)\s+([A-Z][a-zA-Z]+)\s+.*?\b(?:with|has|contains?|includes?)\s+(?:a|an)?\s*(.*?)(?:\.|$)',
-            txt_clean,
-            flags=re.IGNORECASE
-        )
+        match1 = _ATTRIBUTES_AFTER.search(txt_clean)
 
         if match1:
-            class_name = _normalize_class_name(match1.group(1))
+            class_name = lexicon.normalize_class_name(match1.group(1))
             attributes_text = match1.group(2)
 
-            if _ok_concept(class_name):
+            if lexicon.is_concept(class_name):
                 attrs.setdefault(class_name, [])
                 _extract_attribute_names(attributes_text, class_name, s.segment_id, attrs)
                 continue
 
-        match2 = re.search(
-            r'(?:A|An|The)\s+([A-Z][a-zA-Z]+)\s+.*?(?:with|has|includes?|contains?)\s+([\w,\s]+)',
-            txt_clean,
-            flags=re.IGNORECASE
-        )
+        match2 = _ATTRIBUTE_LIST_AFTER.search(txt_clean)
 
         if match2:
-            class_name = _normalize_class_name(match2.group(1))
+            class_name = lexicon.normalize_class_name(match2.group(1))
             attributes_text = match2.group(2)
 
-            if _ok_concept(class_name):
+            if lexicon.is_concept(class_name):
                 attrs.setdefault(class_name, [])
                 attributes_text = attributes_text.split('.')[0]
                 _extract_attribute_names(attributes_text, class_name, s.segment_id, attrs)
@@ -165,27 +124,33 @@ def extract_attributes(segments: List[Segment]) -> Dict[str, List[Dict]]:
     return attrs
 
 
+_ATTRIBUTE_SEPARATOR = re.compile(r',|\band\b')
+_ATTRIBUTE_ARTICLE = re.compile(r'^\s*(?:a|an|the|with|for|of)\s+', re.IGNORECASE)
+_ATTRIBUTE_NAME = re.compile(r'\b([a-z][a-zA-Z0-9_]*)\b')
+
+
 def _extract_attribute_names(text: str, class_name: str, segment_id: str, attrs: Dict):
     """Helper to extract attribute names from text"""
-    parts = re.split(r',|\band\b', text)
+    parts = _ATTRIBUTE_SEPARATOR.split(text)
+    lexicon = get_lexicon()
 
     for p in parts:
         p = p.strip()
-        p = re.sub(r'^\s*(?:a|an|the|with|for|of)\s+', '', p, flags=re.IGNORECASE)
+        p = _ATTRIBUTE_ARTICLE.sub('', p)
 
-        match = re.search(r'\b([a-z][a-zA-Z0-9_]*)\b', p)
+        match = _ATTRIBUTE_NAME.search(p)
         if not match:
             continue
 
         attr_name = match.group(1)
 
-        if attr_name.lower() in _STOPWORDS or attr_name.lower() in ["user", "person", "item", "thing", "object", "has", "includes", "contains", "with"]:
+        if lexicon.is_attribute_stopword(attr_name):
             continue
 
         if len(attr_name) < 3:
             continue
 
-        data_type = _infer_data_type(attr_name, p)
+        data_type = lexicon.infer_data_type(attr_name)
 
         existing = [a for a in attrs[class_name] if a['name'].lower() == attr_name.lower()]
         if not existing:
@@ -196,184 +161,47 @@ def _extract_attribute_names(text: str, class_name: str, segment_id: str, attrs:
             })
 
 
-def _infer_data_type(attr_name: str, context: str) -> str:
-    """Infer data type from attribute name and context"""
-    attr_lower = attr_name.lower()
-
-    if attr_lower.endswith('id'):
-        return "int"
-
-    if any(x in attr_lower for x in ['date', 'time', 'timestamp']):
-        return "Date"
-
-    if any(x in attr_lower for x in ['amount', 'price', 'cost', 'total', 'subtotal']):
-        return "decimal"
-
-    if any(x in attr_lower for x in ['quantity', 'count', 'number', 'rating']):
-        return "int"
-
-    if any(x in attr_lower for x in ['is', 'has', 'enabled', 'active']):
-        return "boolean"
-
-    if any(x in attr_lower for x in ['email', 'password', 'address', 'street', 'city', 'phone']):
-        return "String"
-
-    return "String"
-
-
-def extract_relations(segments: List[Segment], class_names: Set[str]) -> List[Dict]:
-    """Extract relationships between classes"""
-    compound_variants = {}
-    for name in class_names:
-        compound_variants[name.lower()] = name
-        spaced = re.sub(r'([a-z])([A-Z])', r'\1 \2', name).lower()
-        compound_variants[spaced] = name
-        compound_variants[name.lower() + "s"] = name
-        compound_variants[spaced + "s"] = name
-        compound_variants[name.lower() + "es"] = name
-
-    verbs = [
-        "place", "places", "contain", "contains", "reference", "references",
-        "include", "includes", "have", "has", "create", "creates",
-        "write", "writes", "add", "adds", "save", "saves",
-        "deliver", "delivers", "delivered", "send", "sends"
-    ]
-
+def extract_relations(segments: List[Segment], class_names: Iterable[str],
+                      progress: Optional[ProgressCallback] = None,
+                      budget: Optional[Budget] = None) -> List[Dict]:
+    """
+    Extract relationships between classes.
+    Each pattern family lives in its own _match_* function, so profiles
+    attribute time to the pattern responsible for it.
+    """
+    return dedupe_relations(collect_relations(segments, class_names, progress, budget))
+
+
+def collect_relations(segments: List[Segment], class_names: Iterable[str],
+                      progress: Optional[ProgressCallback] = None,
+                      budget: Optional[Budget] = None) -> List[Dict]:
+    """
+    Relations found per segment, in segment order, before the global
+    deduplication. Results for consecutive ranges of segments can be
+    concatenated and deduplicated once (as the parallel builder does).
+    """
+    index = variant_index(class_names)
     rels: List[Dict] = []
 
-    for s in segments:
+    for i, s in enumerate(segments, start=1):
+        if budget is not None and budget.check("relations", s.segment_id, i - 1):
+            break
+        emit(progress, "relations", i, len(segments))
         if s.label == "INFO":
             continue
 
-        txt_lower = s.text.lower()
-        txt_clean = re.sub(r"^\s*(req|fr|nfr|us|def)\s*[-:]?\s*\d+\s+", "", txt_lower)
-
-        found_in_segment = set()
-
-        # ====================================================================
-        # Pattern 1: "must/shall verb"
-        # ====================================================================
-        must_pattern = r'(?:each|every|a|an|the)\s+([\w\s]+?)\s+(?:must|shall)\s+(\w+)\s+.*?\b([\w\s]+?)(?:\s+(?:and|or|to|for|with)|\.|,|$)'
-
-        for match in re.finditer(must_pattern, txt_clean):
-            source_raw = match.group(1).strip()
-            verb = match.group(2)
-            target_raw = match.group(3).strip()
-            target_raw = re.sub(r'^(a|an|the|one|more|exactly|zero|multiple)\s+', '', target_raw).strip()
-
-            source_name = compound_variants.get(source_raw)
-            target_name = compound_variants.get(target_raw)
-
-            if source_name and target_name and source_name != target_name:
-                rel_key = (source_name, target_name, verb)
-                if rel_key not in found_in_segment:
-                    found_in_segment.add(rel_key)
-                    rels.append({
-                        "source": source_name,
-                        "target": target_name,
-                        "label": verb,
-                        "type": "association",
-                        "cardinality": _infer_cardinality(match.group(0)),
-                        "source_segments": [s.segment_id]
-                    })
-
-        # ====================================================================
-        # Pattern 2: Direct verb relationships
-        # ====================================================================
-        for source_variant, source_name in compound_variants.items():
-            for target_variant, target_name in compound_variants.items():
-                if source_name == target_name:
-                    continue
+        analysis = analyze(s.text)
+        found_in_segment: Set[tuple] = set()
+        _match_must_verb(analysis, s.segment_id, index, found_in_segment, rels)
+        _match_direct_verbs(analysis, s.segment_id, index, found_in_segment, rels)
+        _match_able_to(analysis, s.segment_id, index, found_in_segment, rels)
+        _match_passive(analysis, s.segment_id, index, found_in_segment, rels)
 
-                for verb in verbs:
-                    pattern = rf"\b{re.escape(source_variant)}\b(?:\W+\w+){{0,8}}\W+{re.escape(verb)}\W+(?:\w+\W+){{0,6}}\b{re.escape(target_variant)}\b"
-
-                    if re.search(pattern, txt_clean):
-                        rel_key = (source_name, target_name, verb)
-                        if rel_key not in found_in_segment:
-                            found_in_segment.add(rel_key)
-                            rels.append({
-                                "source": source_name,
-                                "target": target_name,
-                                "label": verb,
-                                "type": "association",
-                                "cardinality": _infer_cardinality(txt_clean),
-                                "source_segments": [s.segment_id]
-                            })
-                        break
-
-        # ====================================================================
-        # Pattern 3: "shall be able to save ... addresses"
-        # FIX: Extract source and verb, then search for target class in sentence
-        # ====================================================================
-        able_pattern = r'(?:a|an|the)\s+([\w]+)\s+shall be able to\s+([\w]+)'
-
-        for match in re.finditer(able_pattern, txt_clean):
-            source_raw = match.group(1).strip()
-            verb = match.group(2).strip()
-
-            source_name = compound_variants.get(source_raw)
-
-            if source_name:
-                # Now look for any known class name in the rest of the sentence
-                # Search after the verb
-                rest_of_sentence = txt_clean[match.end():]
-
-                target_name = None
-                for class_variant, class_name in compound_variants.items():
-                    if class_variant in rest_of_sentence and class_name != source_name:
-                        target_name = class_name
-                        break
-
-                if target_name:
-                    rel_key = (source_name, target_name, verb)
-                    if rel_key not in found_in_segment:
-                        found_in_segment.add(rel_key)
-                        rels.append({
-                            "source": source_name,
-                            "target": target_name,
-                            "label": verb,
-                            "type": "association",
-                            "cardinality": _infer_cardinality(txt_clean),
-                            "source_segments": [s.segment_id]
-                        })
-
-        # ====================================================================
-        # Pattern 4: "must be delivered to ... address"
-        # FIX: Extract source and verb, then search for target class
-        # ====================================================================
-        passive_pattern = r'(?:each|every|a|an|the)\s+([\w]+)\s+must be\s+([\w]+)\s+to'
-
-        for match in re.finditer(passive_pattern, txt_clean):
-            source_raw = match.group(1).strip()
-            verb = match.group(2).strip()
-
-            source_name = compound_variants.get(source_raw)
-
-            if source_name:
-                # Look for target class after "to"
-                rest_of_sentence = txt_clean[match.end():]
-
-                target_name = None
-                for class_variant, class_name in compound_variants.items():
-                    if class_variant in rest_of_sentence and class_name != source_name:
-                        target_name = class_name
-                        break
-
-                if target_name:
-                    rel_key = (source_name, target_name, verb)
-                    if rel_key not in found_in_segment:
-                        found_in_segment.add(rel_key)
-                        rels.append({
-                            "source": source_name,
-                            "target": target_name,
-                            "label": verb,
-                            "type": "association",
-                            "cardinality": _infer_cardinality(txt_clean),
-                            "source_segments": [s.segment_id]
-                        })
-
-    # Global deduplication
+    return rels
+
+
+def dedupe_relations(rels: List[Dict]) -> List[Dict]:
+    """Keep the first relation found for each unordered pair of classes"""
     seen_pairs = set()
     unique = []
 
@@ -386,6 +214,148 @@ def extract_relations(segments: List[Segment], class_names: Set[str]) -> List[Di
     return unique
 
 
+_RELATION_VERBS = [
+    "place", "places", "contain", "contains", "reference", "references",
+    "include", "includes", "have", "has", "create", "creates",
+    "write", "writes", "add", "adds", "save", "saves",
+    "deliver", "delivers", "delivered", "send", "sends"
+]
+
+# Pattern 2 allows up to 8 words between source and verb and 6 between verb and target
+_MAX_WORDS_BEFORE_VERB = 8
+_MAX_WORDS_AFTER_VERB = 6
+
+_MUST_PATTERN = re.compile(
+    r'(?:each|every|a|an|the)\s+([\w\s]+?)\s+(?:must|shall)\s+(\w+)\s+.*?\b([\w\s]+?)(?:\s+(?:and|or|to|for|with)|\.|,|$)'
+)
+_TARGET_QUANTIFIER = re.compile(r'^(a|an|the|one|more|exactly|zero|multiple)\s+')
+_ABLE_PATTERN = re.compile(r'(?:a|an|the)\s+([\w]+)\s+shall be able to\s+([\w]+)')
+_PASSIVE_PATTERN = re.compile(r'(?:each|every|a|an|the)\s+([\w]+)\s+must be\s+([\w]+)\s+to')
+
+
+def _add_relation(rels: List[Dict], found_in_segment: Set[tuple], source_name: str, target_name: str,
+                  verb: str, cardinality_text: str, segment_id: str):
+    """Record a relation unless the same (source, target, verb) was already found in this segment"""
+    rel_key = (source_name, target_name, verb)
+    if rel_key not in found_in_segment:
+        found_in_segment.add(rel_key)
+        rels.append({
+            "source": source_name,
+            "target": target_name,
+            "label": verb,
+            "type": "association",
+            "cardinality": _infer_cardinality(cardinality_text),
+            "source_segments": [segment_id]
+        })
+
+
+def _match_must_verb(analysis: SegmentAnalysis, segment_id: str, index: VariantIndex,
+                     found_in_segment: Set[tuple], rels: List[Dict]):
+    """Pattern 1: each <source> must/shall <verb> ... <target>"""
+    for match in _MUST_PATTERN.finditer(analysis.lower):
+        source_raw = match.group(1).strip()
+        verb = match.group(2)
+        target_raw = match.group(3).strip()
+        target_raw = _TARGET_QUANTIFIER.sub('', target_raw).strip()
+
+        source_name = index.get(source_raw)
+        target_name = index.get(target_raw)
+
+        if source_name and target_name and source_name != target_name:
+            _add_relation(rels, found_in_segment, source_name, target_name, verb, match.group(0), segment_id)
+
+
+def _match_direct_verbs(analysis: SegmentAnalysis, segment_id: str, index: VariantIndex,
+                        found_in_segment: Set[tuple], rels: List[Dict]):
+    """
+    Pattern 2: <source> ... <verb> ... <target> within a few words, for every pair of classes.
+    Works on the segment's words: only variants that occur in the segment are paired,
+    and the first verb (in _RELATION_VERBS order) placed between them wins.
+    """
+    words = analysis.lower_words
+    verb_positions = [(verb, words.positions.get(verb)) for verb in _RELATION_VERBS]
+    verb_positions = [(verb, found) for verb, found in verb_positions if found]
+    if not verb_positions:
+        return
+
+    # (variant, class, occurrences or None for regex-only variants) for the variants in this segment
+    present = []
+    for variant, phrase in index.phrases.items():
+        occurrences = words.find(phrase) if phrase is not None else None
+        if occurrences != []:
+            present.append((variant, index.variants[variant], occurrences))
+
+    for source_variant, source_name, sources in present:
+        for target_variant, target_name, targets in present:
+            if source_name == target_name:
+                continue
+
+            for verb, positions in verb_positions:
+                if sources is None or targets is None:
+                    found = _direct_verb_regex(source_variant, verb, target_variant).search(analysis.lower)
+                else:
+                    found = _verb_between(sources, positions, targets)
+                if found:
+                    _add_relation(rels, found_in_segment, source_name, target_name, verb, analysis.lower, segment_id)
+                    break
+
+
+def _verb_between(sources: List[Tuple[int, int]], verbs: Tuple[int, ...], targets: List[Tuple[int, int]]) -> bool:
+    """Is there a source, verb, target in that order with few enough words in between?"""
+    for _, source_last in sources:
+        for verb in verbs:
+            if not source_last < verb <= source_last + 1 + _MAX_WORDS_BEFORE_VERB:
+                continue
+            for target_first, _ in targets:
+                if verb < target_first <= verb + 1 + _MAX_WORDS_AFTER_VERB:
+                    return True
+    return False
+
+
+@lru_cache(maxsize=1024)
+def _direct_verb_regex(source_variant: str, verb: str, target_variant: str) -> re.Pattern:
+    """Pattern 2 as a regex, for class variants that are not plain words"""
+    return re.compile(
+        rf"\b{re.escape(source_variant)}\b(?:\W+\w+){{0,{_MAX_WORDS_BEFORE_VERB}}}\W+{re.escape(verb)}\W+"
+        rf"(?:\w+\W+){{0,{_MAX_WORDS_AFTER_VERB}}}\b{re.escape(target_variant)}\b"
+    )
+
+
+def _match_able_to(analysis: SegmentAnalysis, segment_id: str, index: VariantIndex,
+                   found_in_segment: Set[tuple], rels: List[Dict]):
+    """Pattern 3: the <source> shall be able to <verb> ... <target>"""
+    txt_clean = analysis.lower
+    for match in _ABLE_PATTERN.finditer(txt_clean):
+        source_name = index.get(match.group(1).strip())
+        if source_name:
+            # Any known class after the verb is the target
+            target_name = _first_class_in(txt_clean[match.end():], index, source_name)
+            if target_name:
+                _add_relation(rels, found_in_segment, source_name, target_name, match.group(2).strip(),
+                              txt_clean, segment_id)
+
+
+def _match_passive(analysis: SegmentAnalysis, segment_id: str, index: VariantIndex,
+                   found_in_segment: Set[tuple], rels: List[Dict]):
+    """Pattern 4: each <source> must be <verb> to ... <target>"""
+    txt_clean = analysis.lower
+    for match in _PASSIVE_PATTERN.finditer(txt_clean):
+        source_name = index.get(match.group(1).strip())
+        if source_name:
+            # Any known class after "to" is the target
+            target_name = _first_class_in(txt_clean[match.end():], index, source_name)
+            if target_name:
+                _add_relation(rels, found_in_segment, source_name, target_name, match.group(2).strip(),
+                              txt_clean, segment_id)
+
+
+def _first_class_in(text: str, index: VariantIndex, exclude: str) -> Optional[str]:
+    for class_variant, class_name in index.variants.items():
+        if class_variant in text and class_name != exclude:
+            return class_name
+    return None
+
+
 def _infer_cardinality(text: str) -> Dict[str, str]:
     """Infer cardinality from text"""
     text_lower = text.lower()
@@ -1,14 +1,28 @@
+import re
 from pathlib import Path
-import pypdf
-from docx import Document
+from typing import BinaryIO, Optional, Union
+from app.budget import Budget
+from app.progress import PipelineCancelled, ProgressCallback, emit
 
 
-def extract_text_from_file(file_path: str) -> str:
+_PDF_MAGIC = b"%PDF-"
+_ZIP_MAGIC = b"PK\x03\x04"
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0"
+
+# Number of leading bytes detect_file_type() needs to make a decision
+SNIFF_BYTES = 8
+
+
+def extract_text_from_file(file_path: str, progress: Optional[ProgressCallback] = None,
+                           budget: Optional[Budget] = None) -> str:
     """
     Extract text from PDF, DOCX, or TXT files
 
     Args:
         file_path: Path to the file
+        progress: Optional callback receiving per-page / per-paragraph events
+        budget: Optional budget; PDF/DOCX extraction stops between pages/paragraphs
+            once its time is spent and returns the text read so far
 
     Returns:
         Extracted text content
@@ -24,51 +38,134 @@ def extract_text_from_file(file_path: str) -> str:
     suffix = path.suffix.lower()
 
     if suffix == '.pdf':
-        return extract_from_pdf(path)
+        return extract_from_pdf(path, progress, budget)
     elif suffix in ['.docx', '.doc']:
-        return extract_from_docx(path)
+        return extract_from_docx(path, progress, budget)
     elif suffix == '.txt':
         return extract_from_txt(path)
     else:
         raise ValueError(f"Unsupported file type: {suffix}. Supported: .pdf, .docx, .txt")
 
 
-def extract_from_pdf(path: Path) -> str:
-    """Extract text from PDF file"""
-    text_parts = []
+def detect_file_type(head: bytes) -> str:
+    """
+    Detect the document type from its leading bytes (magic numbers)
 
-    try:
-        with open(path, 'rb') as file:
-            reader = pypdf.PdfReader(file)
+    Args:
+        head: The first bytes of the document (at least SNIFF_BYTES if available)
+
+    Returns:
+        The matching file suffix: '.pdf', '.docx' or '.txt'
+
+    Raises:
+        ValueError: If the content is a binary format we cannot read
+    """
+    if head.startswith(_PDF_MAGIC):
+        return '.pdf'
+    if head.startswith(_ZIP_MAGIC):
+        return '.docx'
+    if head.startswith(_OLE_MAGIC):
+        raise ValueError("Unsupported file type: legacy .doc. Supported: .pdf, .docx, .txt")
+    if b"\x00" in head:
+        raise ValueError("Unsupported file type: binary content. Supported: .pdf, .docx, .txt")
+    return '.txt'
+
+
+def extract_text_from_stream(stream: BinaryIO, file_type: str, progress: Optional[ProgressCallback] = None,
+                             budget: Optional[Budget] = None) -> str:
+    """
+    Extract text from an open binary file object (e.g. a spooled upload)
+
+    Args:
+        stream: Seekable binary file object positioned anywhere
+        file_type: File suffix as returned by detect_file_type()
+
+    Returns:
+        Extracted text content
+    """
+    stream.seek(0)
+
+    if file_type == '.pdf':
+        return extract_from_pdf(stream, progress, budget)
+    elif file_type == '.docx':
+        return extract_from_docx(stream, progress, budget)
+    elif file_type == '.txt':
+        return decode_text(stream.read())
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}. Supported: .pdf, .docx, .txt")
 
-            for page_num, page in enumerate(reader.pages, start=1):
-                page_text = page.extract_text()
-                if page_text.strip():
-                    text_parts.append(f"[Page {page_num}]\n{page_text}")
 
-        return '\n\n'.join(text_parts)
+def extract_from_pdf(source: Union[Path, BinaryIO], progress: Optional[ProgressCallback] = None,
+                     budget: Optional[Budget] = None) -> str:
+    """Extract text from PDF file (path or binary file object)"""
+    try:
+        if isinstance(source, Path):
+            with open(source, 'rb') as file:
+                return _read_pdf(file, progress, budget)
+        return _read_pdf(source, progress, budget)
 
+    except PipelineCancelled:
+        raise
     except Exception as e:
         raise RuntimeError(f"Failed to extract text from PDF: {e}")
 
 
-def extract_from_docx(path: Path) -> str:
-    """Extract text from DOCX file"""
+def _read_pdf(file: BinaryIO, progress: Optional[ProgressCallback] = None,
+              budget: Optional[Budget] = None) -> str:
+    # Imported on first use: pypdf is the slowest import of the whole app
+    import pypdf
+
+    text_parts = []
+    reader = pypdf.PdfReader(file)
+    num_pages = len(reader.pages)
+
+    for page_num, page in enumerate(reader.pages, start=1):
+        if budget is not None and budget.check("extract", f"page {page_num}", page_num - 1):
+            break
+        page_text = page.extract_text()
+        if page_text.strip():
+            text_parts.append(f"[Page {page_num}]\n{page_text}")
+        emit(progress, "extract", page_num, num_pages, unit="pages")
+
+    return '\n\n'.join(text_parts)
+
+
+def extract_from_docx(source: Union[Path, BinaryIO], progress: Optional[ProgressCallback] = None,
+                      budget: Optional[Budget] = None) -> str:
+    """Extract text from DOCX file (path or binary file object)"""
+    from docx import Document
+
     try:
-        doc = Document(path)
+        doc = Document(source)
         paragraphs = []
+        all_paragraphs = doc.paragraphs
 
-        for para in doc.paragraphs:
+        for i, para in enumerate(all_paragraphs, start=1):
+            if budget is not None and budget.check("extract", f"paragraph {i}", i - 1):
+                break
             text = para.text.strip()
             if text:
-                paragraphs.append(text)
+                paragraphs.append(_heading_marker(para) + text)
+            emit(progress, "extract", i, len(all_paragraphs), unit="paragraphs")
 
         return '\n'.join(paragraphs)
 
+    except PipelineCancelled:
+        raise
     except Exception as e:
         raise RuntimeError(f"Failed to extract text from DOCX: {e}")
 
 
+_HEADING_STYLE = re.compile(r"^(?:Heading ([1-6])|Title)$")
+
+
+def _heading_marker(paragraph) -> str:
+    """'## ' for a paragraph styled Heading 2 etc. ('# ' for Title), so segmentation sees the heading level"""
+    style = paragraph.style
+    match = _HEADING_STYLE.match(style.name or "") if style is not None else None
+    return "#" * int(match.group(1) or 1) + " " if match else ""
+
+
 def extract_from_txt(path: Path) -> str:
     """Extract text from TXT file"""
     try:
@@ -78,3 +175,11 @@ def extract_from_txt(path: Path) -> str:
         return path.read_text(encoding='latin-1')
     except Exception as e:
         raise RuntimeError(f"Failed to read text file: {e}")
+
+
+def decode_text(data: bytes) -> str:
+    """Decode raw text bytes the same way extract_from_txt() does"""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
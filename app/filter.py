@@ -2,7 +2,10 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from app.progress import ProgressCallback, emit
+from app.sections import SectionTracker
 
 
 LABEL_REQ = "REQ"
@@ -94,16 +97,65 @@ def split_into_candidates(raw_text: str) -> List[str]:
     return [ln for ln in lines if ln]
 
 
-def segment_text(raw_text: str, doc_id: str = "doc") -> List[Segment]:
+def segment_text(raw_text: str, doc_id: str = "doc", progress: Optional[ProgressCallback] = None) -> List[Segment]:
+    """
+    Split text into labelled segments. Headings and PDF page markers are
+    tracked on the way, so every segment carries its page and section
+    (see app.sections).
+    """
     candidates = split_into_candidates(raw_text)
+    sections = SectionTracker()
     segments: List[Segment] = []
     for i, chunk in enumerate(candidates, start=1):
-        seg_id = f"S{i}"
-        label = label_sentence(chunk)
-        segments.append(Segment(segment_id=seg_id, label=label, text=chunk))
+        segments.append(_make_segment(i, chunk, sections))
+        emit(progress, "segment", i, len(candidates))
     return segments
 
 
+def _make_segment(index: int, chunk: str, sections: SectionTracker) -> Segment:
+    text, page, section = sections.observe(chunk)
+    return Segment(segment_id=f"S{index}", label=label_sentence(text), text=text, page=page, section=section)
+
+
+class StreamingSegmenter:
+    """
+    Segments text that arrives in chunks (e.g. an upload in progress).
+    Feeding the whole text piecewise and calling close() yields exactly
+    the segments segment_text() would produce for the concatenated text.
+    """
+
+    def __init__(self, doc_id: str = "doc"):
+        self.doc_id = doc_id
+        self.segments: List[Segment] = []
+        self._pending = ""
+        self._sections = SectionTracker()
+
+    def feed(self, chunk: str) -> List[Segment]:
+        """Consume a chunk of text; returns the segments completed by it"""
+        lines = (self._pending + chunk).splitlines(keepends=True)
+        # The last line may continue in the next chunk unless it is terminated
+        if lines and lines[-1] == lines[-1].rstrip("\r\n\v\f\x1c\x1d\x1e\x85\u2028\u2029"):
+            self._pending = lines.pop()
+        else:
+            self._pending = ""
+        return self._add_lines(lines)
+
+    def close(self) -> List[Segment]:
+        """Flush the trailing unterminated line; returns all segments"""
+        pending, self._pending = self._pending, ""
+        self._add_lines([pending])
+        return self.segments
+
+    def _add_lines(self, lines: List[str]) -> List[Segment]:
+        added: List[Segment] = []
+        for line in lines:
+            chunk = line.strip()
+            if chunk:
+                added.append(_make_segment(len(self.segments) + 1, chunk, self._sections))
+                self.segments.append(added[-1])
+        return added
+
+
 def filter_relevant_segments(segments: List[Segment]) -> List[Segment]:
     """
     Keep segments that are relevant for extraction.
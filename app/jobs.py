@@ -0,0 +1,449 @@
+"""
+Persistent job queue for long-running analyses and diagram builds.
+
+Jobs live in a local SQLite database so they survive restarts. Any number of
+worker threads or processes can consume the same database: claiming a job is
+a single IMMEDIATE transaction, and running jobs send heartbeats so work
+abandoned by a crashed or restarted worker is requeued and resumed.
+
+Run standalone workers with:
+    python -m app.jobs --workers 4
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.progress import PipelineCancelled, ProgressEvent, ThrottledProgress
+
+
+JOB_KINDS = ("analyze_text", "analyze_file", "analyze_and_visualize", "analyze_corpus")
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+DEFAULT_DB_PATH = "data/jobs.sqlite3"
+# A running job whose worker has not sent a heartbeat for this long is requeued
+STALE_AFTER_SECONDS = 60.0
+HEARTBEAT_SECONDS = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    progress TEXT NOT NULL DEFAULT '{}',
+    checkpoint TEXT,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+"""
+
+_PAGE_MARKER = re.compile(r"^\[Page \d+\]$", re.MULTILINE)
+
+
+class JobCancelled(PipelineCancelled):
+    """Raised inside a running job once cancellation was requested"""
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+
+
+class JobStore:
+    """SQLite-backed job table shared by the API and all workers"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def create(self, kind: str, params: Dict) -> Dict:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}. Supported: {', '.join(JOB_KINDS)}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, params, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, STATUS_QUEUED, json.dumps(params), now, now)
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        query = "SELECT * FROM jobs"
+        args: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            args = (status,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, args + (limit,)).fetchall()
+        return [self._to_dict(r, include_result=False) for r in rows]
+
+    def request_cancel(self, job_id: str) -> Optional[Dict]:
+        """Cancel a queued job immediately, or flag a running one for cooperative cancellation"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, cancel_requested = 1, updated_at = ? WHERE id = ? AND status = ?",
+                (STATUS_CANCELLED, now, job_id, STATUS_QUEUED)
+            )
+            self._conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status = ?",
+                (now, job_id, STATUS_RUNNING)
+            )
+        return self.get(job_id)
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Atomically take the oldest queued job; returns None if there is none"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (STATUS_QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, "
+                        "heartbeat_at = ?, updated_at = ? WHERE id = ?",
+                        (STATUS_RUNNING, worker_id, now, now, row["id"])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def update_progress(self, job_id: str, progress: Dict, checkpoint: Optional[Dict] = None) -> bool:
+        """Store progress (and optionally a resume checkpoint); returns True if cancellation was requested"""
+        now = time.time()
+        with self._lock:
+            if checkpoint is not None:
+                self._conn.execute(
+                    "UPDATE jobs SET progress = ?, checkpoint = ?, heartbeat_at = ?, updated_at = ? WHERE id = ?",
+                    (json.dumps(progress), json.dumps(checkpoint), now, now, job_id)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET progress = ?, heartbeat_at = ?, updated_at = ? WHERE id = ?",
+                    (json.dumps(progress), now, now, job_id)
+                )
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def heartbeat(self, job_ids: List[str]):
+        if not job_ids:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ?",
+                [(now, job_id, STATUS_RUNNING) for job_id in job_ids]
+            )
+
+    def finish(self, job_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, now, job_id)
+            )
+
+    def requeue_stale(self, stale_after: float = STALE_AFTER_SECONDS) -> int:
+        """Put running jobs without a recent heartbeat back in the queue (e.g. after a restart)"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = CASE WHEN cancel_requested THEN ? ELSE ? END, "
+                "worker = NULL, updated_at = ? WHERE status = ? AND heartbeat_at < ?",
+                (STATUS_CANCELLED, STATUS_QUEUED, now, STATUS_RUNNING, now - stale_after)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row, include_result: bool = True) -> Dict:
+        job = {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "params": json.loads(row["params"]),
+            "progress": json.loads(row["progress"]),
+            "attempts": row["attempts"],
+            "cancel_requested": bool(row["cancel_requested"]),
+            "created_at": _iso(row["created_at"]),
+            "updated_at": _iso(row["updated_at"]),
+            "error": row["error"],
+        }
+        if include_result:
+            job["checkpoint"] = json.loads(row["checkpoint"]) if row["checkpoint"] else None
+            job["result"] = json.loads(row["result"]) if row["result"] else None
+        return job
+
+
+def validate_params(kind: str, params: Dict):
+    """Raise ValueError if a job of this kind lacks required parameters"""
+    required = {
+        "analyze_text": ["text"],
+        "analyze_file": ["path"],
+        "analyze_and_visualize": ["path", "board_id"],
+        "analyze_corpus": ["paths"],
+    }
+    if kind not in required:
+        raise ValueError(f"Unknown job kind: {kind}. Supported: {', '.join(JOB_KINDS)}")
+    missing = [p for p in required[kind] if not params.get(p)]
+    if missing:
+        raise ValueError(f"Job kind '{kind}' requires: {', '.join(missing)}")
+
+
+class JobRunner:
+    """
+    Executes one job stage by stage, recording progress after each stage and
+    checking for cancellation in between. A checkpoint with the built model is
+    stored before visualization so a resumed job does not re-run the analysis,
+    and every Miro item is added to it once created, so a resumed visualization
+    skips the items already on the board.
+
+    Stages receive a progress callback, so pages, segments and Miro items are
+    counted (and cancellation honoured) while the stage is running.
+    """
+
+    # Progress counter updated by live events of each stage
+    _EVENT_COUNTERS = {
+        "segment": "segments_labelled",
+        "classes": "segments_classified",
+        "relations": "segments_related",
+        "visualize.classes": "classes_created",
+        "visualize.relations": "relations_processed",
+        "corpus": "documents_processed",
+    }
+
+    def __init__(self, store: JobStore, job: Dict, run_stage: Optional[Callable] = None):
+        self.store = store
+        self.job = job
+        self.progress: Dict = dict(job.get("progress") or {})
+        # run_stage(fn, *args, progress=..., check_cancelled=...) lets the caller move CPU-bound
+        # stages to a process pool; it forwards progress where it can and calls check_cancelled()
+        # while waiting, which raises JobCancelled
+        self._run_stage = run_stage
+        self._on_event = ThrottledProgress(self._record_event, min_interval=1.0)
+
+    def report(self, stage: str, checkpoint: Optional[Dict] = None, **counts):
+        self.progress["stage"] = stage
+        self.progress.update(counts)
+        if self.store.update_progress(self.job["job_id"], self.progress, checkpoint):
+            raise JobCancelled(self.job["job_id"])
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation was requested (also refreshes the heartbeat)"""
+        if self.store.update_progress(self.job["job_id"], self.progress):
+            raise JobCancelled(self.job["job_id"])
+
+    def stage(self, fn: Callable, *args):
+        if self._run_stage is not None:
+            return self._run_stage(fn, *args, progress=self._on_event, check_cancelled=self.check_cancelled)
+        return fn(*args, self._on_event)
+
+    def _record_event(self, event: ProgressEvent):
+        if event.stage == "extract":
+            counter = f"{event.data.get('unit', 'pages')}_extracted"
+        else:
+            counter = self._EVENT_COUNTERS.get(event.stage)
+        if counter:
+            self.report(event.stage, **{counter: event.current})
+
+    def run(self) -> Dict:
+        from app.filter import segment_text
+        from app.model_builder import build_domain_model
+
+        if self.job["kind"] == "analyze_corpus":
+            return self._run_corpus()
+
+        params = self.job["params"]
+        doc_id = params.get("doc_id") or "doc"
+        checkpoint = self.job.get("checkpoint") or {}
+        model = checkpoint.get("model")
+
+        if model is None:
+            if self.job["kind"] == "analyze_text":
+                text = params["text"]
+                self.report("extract", characters=len(text))
+            else:
+                from app.file_processor import extract_text_from_file
+
+                self.report("extract")
+                text = self.stage(extract_text_from_file, params["path"])
+                self.report("extract", characters=len(text), pages_extracted=len(_PAGE_MARKER.findall(text)) or 1)
+
+            segments = self.stage(segment_text, text, doc_id)
+            self.report("segment", segments_labelled=len(segments))
+
+            model = self.stage(build_domain_model, doc_id, segments)
+            self.report("build", checkpoint={"model": model},
+                        classes=len(model["classes"]), relations=len(model["relations"]))
+
+        if self.job["kind"] != "analyze_and_visualize":
+            self.report("done")
+            return {"model": model}
+
+        from app.miro_visualizer import visualize_domain_model
+
+        created = dict(checkpoint.get("visualization") or {})
+        lock = threading.Lock()
+
+        def record(key: str, item: Dict):
+            with lock:
+                created[key] = item
+                self.report("visualize", checkpoint={"model": model, "visualization": dict(created)},
+                            items_created=len(created))
+
+        self.report("visualize", items_created=len(created))
+        result = visualize_domain_model(params["board_id"], model, self._on_event, created=created, on_created=record)
+        summary = result.get("summary", {})
+        self.report("done", items_created=summary.get("classes_created", 0) + summary.get("relations_created", 0))
+        return {"model": model, "visualization": result}
+
+    def _run_corpus(self) -> Dict:
+        from app.corpus import build_corpus_model, expand_documents
+
+        params = self.job["params"]
+        errors: Dict[str, str] = {}
+        self.report("corpus", documents_processed=0)
+        model = build_corpus_model(expand_documents(params["paths"]), workers=params.get("workers"),
+                                   progress=self._on_event, errors=errors)
+        self.report("done", documents_processed=model["quality"]["num_documents"] + len(errors),
+                    classes=len(model["classes"]), relations=len(model["relations"]))
+        return {"model": model, "errors": errors}
+
+
+class JobWorkerPool:
+    """
+    Worker threads that claim and run jobs from a JobStore.
+    Stale running jobs are requeued on start and periodically afterwards.
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2, poll_interval: float = 1.0,
+                 run_stage: Optional[Callable] = None):
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.run_stage = run_stage
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._active: Dict[str, str] = {}  # thread name -> job id
+        self._active_lock = threading.Lock()
+
+    def start(self):
+        self.store.requeue_stale()
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def run_one(self, worker_id: str) -> bool:
+        """Claim and run a single job; returns False if the queue was empty"""
+        job = self.store.claim(worker_id)
+        if job is None:
+            return False
+
+        with self._active_lock:
+            self._active[worker_id] = job["job_id"]
+        try:
+            result = JobRunner(self.store, job, self.run_stage).run()
+            self.store.finish(job["job_id"], STATUS_SUCCEEDED, result=result)
+        except JobCancelled:
+            self.store.finish(job["job_id"], STATUS_CANCELLED)
+        except Exception as e:
+            self.store.finish(job["job_id"], STATUS_FAILED, error=f"{type(e).__name__}: {e}")
+        finally:
+            with self._active_lock:
+                self._active.pop(worker_id, None)
+        return True
+
+    def _work(self):
+        worker_id = f"{self.worker_prefix}:{threading.current_thread().name}"
+        while not self._stop.is_set():
+            if not self.run_one(worker_id):
+                self._stop.wait(self.poll_interval)
+
+    def _heartbeat(self):
+        while not self._stop.wait(HEARTBEAT_SECONDS):
+            with self._active_lock:
+                active = list(self._active.values())
+            self.store.heartbeat(active)
+            self.store.requeue_stale()
+
+
+def get_job_store() -> JobStore:
+    """Job store at JOB_DB_PATH (default data/jobs.sqlite3)"""
+    return JobStore(os.getenv("JOB_DB_PATH", DEFAULT_DB_PATH))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run job workers against the shared job database")
+    parser.add_argument("--db", default=os.getenv("JOB_DB_PATH", DEFAULT_DB_PATH))
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    pool = JobWorkerPool(JobStore(args.db), workers=args.workers, poll_interval=args.poll_interval)
+    pool.start()
+    print(f"{args.workers} job workers consuming {args.db} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pool.stop(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
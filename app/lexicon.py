@@ -0,0 +1,261 @@
+"""
+Compiled word lists and per-token verdicts used by the extractors.
+
+The stopword, attribute-keyword and attribute-suffix rules are compiled once
+into frozensets and a reversed-suffix trie, and every verdict (is this token
+a class concept? an attribute? which data type?) is memoized in a bounded
+LRU cache. The same few thousand tokens recur throughout a document, so
+classification is a dict lookup after the first occurrence.
+
+Domain-specific lexicons are JSON files that extend the built-in lists:
+
+    {
+        "stopwords": ["ward", "shift"],
+        "attribute_keywords": ["dosage"],
+        "attribute_suffixes": ["level"],
+        "not_concepts": ["balance"],
+        "concepts": ["Address"],
+        "attribute_stopwords": ["patient"],
+        "type_rules": [{"type": "decimal", "contains": ["dosage"]}]
+    }
+
+Set REQUIREMENTS_LEXICON to one or more such files (separated by os.pathsep)
+to load them into the shared lexicon returned by get_lexicon().
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+STOPWORDS = frozenset({
+    "the", "a", "an", "and", "or", "to", "of", "in", "on", "for", "with", "by",
+    "is", "are", "be", "as", "at", "from", "this", "that", "these", "those",
+    "system", "shall", "must", "should", "can", "may", "will", "req", "fr",
+    "nfr", "us", "info", "def", "con",
+    "project", "document", "scope", "stakeholders", "each", "person",
+    "one", "more", "exactly", "zero", "all",
+    "within", "between", "greater", "less", "than", "equal", "not",
+    "i", "we", "you", "they", "it", "he", "she",
+    "commerce", "management", "specification", "version",
+    "introduction", "purpose", "functional", "non-functional",
+    "registered", "temporary", "financial", "item", "purchase",
+})
+
+ATTRIBUTE_KEYWORDS = frozenset({
+    "id", "name", "email", "password", "address", "phone", "date", "time",
+    "amount", "price", "quantity", "status", "description", "type", "code",
+    "number", "value", "flag", "url", "path", "key", "token", "timestamp",
+    "created", "updated", "modified", "deleted", "active", "enabled",
+    "firstname", "lastname", "username", "fullname", "displayname",
+    "street", "city", "state", "country", "zipcode", "postalcode",
+    "total", "subtotal", "discount", "tax", "shipping", "rating", "comment",
+    "proof", "stock", "unit", "transaction",
+})
+
+ATTRIBUTE_SUFFIXES = (
+    "id", "name", "date", "time", "amount", "price",
+    "count", "number", "code", "status", "type", "quantity",
+)
+
+# Words that read like nouns in requirements but are values, not classes
+NOT_CONCEPTS = frozenset({"email", "price", "quantity", "rating", "proof", "zero", "stock"})
+
+# Always accepted as classes, even though they look like attributes (case-sensitive)
+CONCEPTS = frozenset({"Address"})
+
+# Never taken as attribute names, on top of the stopwords
+ATTRIBUTE_STOPWORDS = frozenset({"user", "person", "item", "thing", "object", "has", "includes", "contains", "with"})
+
+# Checked in order; the first rule with a matching suffix or substring decides
+TYPE_RULES = (
+    {"type": "int", "suffixes": ["id"]},
+    {"type": "Date", "contains": ["date", "time", "timestamp"]},
+    {"type": "decimal", "contains": ["amount", "price", "cost", "total", "subtotal"]},
+    {"type": "int", "contains": ["quantity", "count", "number", "rating"]},
+    {"type": "boolean", "contains": ["is", "has", "enabled", "active"]},
+)
+
+DEFAULT_TYPE = "String"
+
+DEFAULT_CACHE_SIZE = int(os.getenv("LEXICON_CACHE_SIZE", "65536"))
+
+_CAMEL_CASE = re.compile(r"[a-z]+[A-Z][a-zA-Z]*")
+_CLASS_CAMEL_CASE = re.compile(r"[A-Z][a-z]+[A-Z]")
+# Bare numbers and requirement IDs such as "REQ-12", "fr 3" or "abc-7"
+_IDENTIFIER = re.compile(r"\d+|(?:req|fr|nfr|us)\s*[-:]?\s*\d+|[a-z]+-\d+")
+
+
+class SuffixTrie:
+    """Trie over reversed words: ends_with_any() walks the token backwards once instead of testing every suffix"""
+
+    _END = ""
+
+    def __init__(self, suffixes: Iterable[str] = ()):
+        self._root: Dict[str, Dict] = {}
+        for suffix in suffixes:
+            self.add(suffix)
+
+    def add(self, suffix: str):
+        node = self._root
+        for char in reversed(suffix):
+            node = node.setdefault(char, {})
+        node[self._END] = {}
+
+    def ends_with_any(self, word: str) -> bool:
+        node = self._root
+        if self._END in node:
+            return True
+        for char in reversed(word):
+            node = node.get(char)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+
+
+class Lexicon:
+    """
+    Args:
+        stopwords: Lower-case words that are never classes or attributes
+        attribute_keywords: Lower-case words that are attributes, not classes
+        attribute_suffixes: Lower-case endings that mark attributes ("customerid", "birthdate")
+        not_concepts: Lower-case words rejected as classes
+        concepts: Exact tokens always accepted as classes
+        attribute_stopwords: Lower-case words never used as attribute names (in addition to stopwords)
+        type_rules: Ordered data type rules, {"type": ..., "suffixes": [...], "contains": [...]}
+        cache_size: Entries per memoized verdict
+    """
+
+    def __init__(self, stopwords: Iterable[str] = STOPWORDS,
+                 attribute_keywords: Iterable[str] = ATTRIBUTE_KEYWORDS,
+                 attribute_suffixes: Iterable[str] = ATTRIBUTE_SUFFIXES,
+                 not_concepts: Iterable[str] = NOT_CONCEPTS,
+                 concepts: Iterable[str] = CONCEPTS,
+                 attribute_stopwords: Iterable[str] = ATTRIBUTE_STOPWORDS,
+                 type_rules: Sequence[Dict] = TYPE_RULES,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.stopwords = frozenset(stopwords)
+        self.attribute_keywords = frozenset(attribute_keywords)
+        self.attribute_suffixes = tuple(dict.fromkeys(attribute_suffixes))
+        self.not_concepts = frozenset(not_concepts)
+        self.concepts = frozenset(concepts)
+        self.attribute_stopwords = self.stopwords | frozenset(attribute_stopwords)
+        self.type_rules = tuple(
+            (rule["type"], SuffixTrie(rule.get("suffixes", ())), tuple(rule.get("contains", ())))
+            for rule in type_rules
+        )
+        self._suffixes = SuffixTrie(self.attribute_suffixes)
+        self._rules = [dict(r) for r in type_rules]
+
+        # Bound per instance so each lexicon has its own cache (and cache_info())
+        self.is_attribute = lru_cache(maxsize=cache_size)(self._is_attribute)
+        self.is_concept = lru_cache(maxsize=cache_size)(self._is_concept)
+        self.normalize_class_name = lru_cache(maxsize=cache_size)(self._normalize_class_name)
+        self.infer_data_type = lru_cache(maxsize=cache_size)(self._infer_data_type)
+        self.is_attribute_stopword = lru_cache(maxsize=cache_size)(self._is_attribute_stopword)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str], base: Optional["Lexicon"] = None, **kwargs) -> "Lexicon":
+        """Extend `base` (the built-in lists by default) with the entries of each JSON lexicon file"""
+        base = base or cls()
+        words = {
+            "stopwords": set(base.stopwords),
+            "attribute_keywords": set(base.attribute_keywords),
+            "attribute_suffixes": list(base.attribute_suffixes),
+            "not_concepts": set(base.not_concepts),
+            "concepts": set(base.concepts),
+            "attribute_stopwords": set(base.attribute_stopwords - base.stopwords),
+        }
+        type_rules: List[Dict] = list(base._rules)
+
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                config = json.load(f)
+            unknown = set(config) - set(words) - {"type_rules"}
+            if unknown:
+                raise ValueError(f"{path}: unknown lexicon keys: {', '.join(sorted(unknown))}")
+            for key, values in config.items():
+                if key == "type_rules":
+                    # Domain rules are more specific, so they are checked before the existing ones
+                    type_rules = list(values) + type_rules
+                elif key == "concepts":
+                    words[key].update(values)
+                elif key == "attribute_suffixes":
+                    words[key].extend(v.lower() for v in values)
+                else:
+                    words[key].update(v.lower() for v in values)
+
+        return cls(type_rules=type_rules, **words, **kwargs)
+
+    def cache_info(self) -> Dict[str, Dict]:
+        """Hit/miss counters per memoized verdict"""
+        return {
+            name: getattr(self, name).cache_info()._asdict()
+            for name in ("is_concept", "is_attribute", "normalize_class_name", "infer_data_type",
+                         "is_attribute_stopword")
+        }
+
+    def _is_attribute(self, token: str) -> bool:
+        """Likely an attribute rather than a class: keyword, attribute suffix or camelCase"""
+        low = token.lower()
+        return (low in self.attribute_keywords
+                or self._suffixes.ends_with_any(low)
+                or _CAMEL_CASE.fullmatch(token) is not None)
+
+    def _is_concept(self, token: str) -> bool:
+        """Valid class concept: not a stopword, requirement ID, number or attribute"""
+        if token in self.concepts:
+            return True
+        if len(token) < 3:
+            return False
+        low = token.lower()
+        if low in self.stopwords or low in self.not_concepts:
+            return False
+        if _IDENTIFIER.fullmatch(low):
+            return False
+        return not self.is_attribute(token)
+
+    @staticmethod
+    def _normalize_class_name(name: str) -> str:
+        """'orderitem' -> 'Orderitem'; names already in CamelCase ('OrderItem') are kept"""
+        if _CLASS_CAMEL_CASE.match(name):
+            return name
+        return name.capitalize()
+
+    def _infer_data_type(self, attr_name: str) -> str:
+        low = attr_name.lower()
+        for data_type, suffixes, contains in self.type_rules:
+            if suffixes.ends_with_any(low) or any(x in low for x in contains):
+                return data_type
+        return DEFAULT_TYPE
+
+    def _is_attribute_stopword(self, word: str) -> bool:
+        return word.lower() in self.attribute_stopwords
+
+
+_lexicon: Optional[Lexicon] = None
+_lexicon_lock = threading.Lock()
+
+
+def get_lexicon() -> Lexicon:
+    """Shared lexicon: the built-in lists extended by the files in REQUIREMENTS_LEXICON"""
+    global _lexicon
+    if _lexicon is None:
+        with _lexicon_lock:
+            if _lexicon is None:
+                paths = [p for p in os.getenv("REQUIREMENTS_LEXICON", "").split(os.pathsep) if p]
+                _lexicon = Lexicon.from_files(paths) if paths else Lexicon()
+    return _lexicon
+
+
+def set_lexicon(lexicon: Optional[Lexicon]):
+    """Replace the shared lexicon (None reloads it from the environment on next use)"""
+    global _lexicon
+    with _lexicon_lock:
+        _lexicon = lexicon
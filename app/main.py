@@ -1,17 +1,193 @@
-from pathlib import Path
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
 
-from app.filter import segment_text
-from app.model_builder import build_domain_model
-from app.file_processor import extract_text_from_file
+from app.budget import Budget
+from app.diff import diff_models
+from app.executor import BULK, INTERACTIVE, QueueFull, get_executor
+from app.jobs import JOB_KINDS, JobWorkerPool, get_job_store, validate_params
+from app.progress import ThrottledProgress
 
-app = FastAPI(title="Requirements to UML Prototype", version="0.1")
+# The pipeline (extract, file_processor with pypdf / python-docx), the upload
+# spool, the profiler and the renderer are imported inside the endpoints that use them:
+# analyses run in worker processes, so the API process only pays for them
+# on first use and /health is served right after the framework is loaded.
+
+
+# Segments per model-building task of a job: the bulk work an interactive request may have to wait for
+BULK_BATCH_SEGMENTS = int(os.getenv("BULK_BATCH_SEGMENTS", "500"))
+
+
+# How often a job waiting for a pool stage checks whether it was cancelled
+JOB_CANCEL_POLL_SECONDS = 1.0
+
+
+def _run_job_stage(fn, *args, progress=None, check_cancelled=None):
+    """
+    Run a CPU-bound job stage in the shared pool as bulk work, waiting while
+    bulk work is saturated. Model building is split into segment batches, so
+    interactive requests get the next free worker after at most one batch;
+    progress is reported (and cancellation honoured) per batch. Other stages
+    run as one task, polling check_cancelled() while they do.
+    """
+    from concurrent.futures import TimeoutError as FutureTimeout
+
+    from app.model_builder import build_domain_model
+
+    pool = get_executor().bulk_pool(BULK)
+    if fn is build_domain_model:
+        from app.shm_transport import parallel_build_domain_model
+
+        doc_id, segments = args
+        chunks = max(1, -(-len(segments) // BULK_BATCH_SEGMENTS))
+        return parallel_build_domain_model(doc_id, segments, chunks=chunks, pool=pool, progress=progress)
+
+    future = pool.submit(fn, *args)
+    while True:
+        try:
+            return future.result(timeout=JOB_CANCEL_POLL_SECONDS)
+        except FutureTimeout:
+            if check_cancelled is not None:
+                try:
+                    check_cancelled()
+                except BaseException:
+                    future.cancel()
+                    raise
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The model store (and segmentation through it) is only loaded when the server starts serving
+    from app.model_store import get_model_store
+
+    app.state.jobs = get_job_store()
+    app.state.models = get_model_store()
+    job_workers = int(os.getenv("JOB_WORKERS", "2"))
+    app.state.job_workers = JobWorkerPool(app.state.jobs, workers=job_workers, run_stage=_run_job_stage)
+    if job_workers > 0:
+        app.state.job_workers.start()
+    yield
+    app.state.job_workers.stop(timeout=5)
+    get_executor().shutdown(wait=False)
+    app.state.models.close()
+
+
+app = FastAPI(title="Requirements to UML Prototype", version="0.1", lifespan=lifespan)
+
+# Same default as upload.DEFAULT_MAX_UPLOAD_BYTES (not imported here to keep startup light)
+MAX_UPLOAD_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", 50 * 1024 * 1024))
 
 
 class ProcessRequest(BaseModel):
     doc_id: str = Field(default="doc", description="Document identifier")
     text: str = Field(..., description="Plain text requirements content")
+    max_seconds: Optional[float] = Field(default=None, gt=0, description="Wall-time budget (default: PIPELINE_MAX_SECONDS)")
+    max_segments: Optional[int] = Field(default=None, gt=0, description="Maximum relevant segments to extract from")
+    max_classes: Optional[int] = Field(default=None, gt=0, description="Maximum number of classes")
+    store: bool = Field(default=False, description="Also save the model in the model store")
+    canonical: bool = Field(default=False, description="Deterministic output: canonical order, no created_at, strong ETag")
+    sections: Optional[List[str]] = Field(default=None, description="Only extract these sections, by number (\"3.2\") or heading title")
+    priority: str = Field(default=INTERACTIVE, description=f"Scheduling class: '{INTERACTIVE}' or '{BULK}' (batch reprocessing)")
+
+    def budget(self) -> Budget:
+        return Budget.from_env(self.max_seconds, self.max_segments, self.max_classes)
+
+
+class JobRequest(BaseModel):
+    kind: str = Field(default="analyze_text", description=f"One of: {', '.join(JOB_KINDS)}")
+    doc_id: str = Field(default="doc", description="Document identifier")
+    text: Optional[str] = Field(default=None, description="Requirements text (analyze_text)")
+    path: Optional[str] = Field(default=None, description="Server-side file path (analyze_file, analyze_and_visualize)")
+    board_id: Optional[str] = Field(default=None, description="Miro board ID (analyze_and_visualize)")
+    paths: Optional[List[str]] = Field(default=None, description="Files and/or directories (analyze_corpus)")
+
+
+class DiffRequest(BaseModel):
+    old: Optional[Dict[str, Any]] = Field(default=None, description="Previous domain model")
+    new: Optional[Dict[str, Any]] = Field(default=None, description="Current domain model")
+    old_doc_id: Optional[str] = Field(default=None, description="Stored model to use instead of 'old'")
+    new_doc_id: Optional[str] = Field(default=None, description="Stored model to use instead of 'new'")
+
+
+_RENDER_MEDIA = {"svg": ("image/svg+xml", ".svg"), "plantuml": ("text/plain", ".puml"), "mermaid": ("text/plain", ".mmd")}
+
+
+class RenderRequest(BaseModel):
+    model: Dict[str, Any] = Field(..., description="Domain model to render")
+    format: str = Field(default="svg", description=f"One of: {', '.join(_RENDER_MEDIA)}")
+    board_id: Optional[str] = Field(default=None, description="Upload the SVG to this Miro board as one image")
+
+
+def _queue_full(e: QueueFull) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+_PROFILE_HEADER = Header(default=None, description="Profile this request: 'cprofile' or 'sample'")
+
+
+def _profile_mode(x_profile: Optional[str]) -> Optional[str]:
+    """Profiler requested with the X-Profile header (None if not requested)"""
+    if x_profile is None:
+        return None
+    from app.profiling import parse_mode, profiling_enabled
+
+    try:
+        mode = parse_mode(x_profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if mode and not profiling_enabled():
+        raise HTTPException(status_code=403, detail="Profiling is disabled on this server")
+    return mode
+
+
+def _priority(priority: str) -> str:
+    """Validated scheduling class of a request"""
+    if priority not in get_executor().weights:
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown priority: {priority}. Known: {', '.join(get_executor().weights)}")
+    return priority
+
+
+async def _run_pipeline(response: Response, profile: Optional[str], label: str, fn, *args,
+                        priority: str = INTERACTIVE):
+    """Run fn in the shared pool, under the requested profiler; the profile ID is returned as X-Profile-Id"""
+    if profile is None:
+        return await get_executor().run(fn, *args, priority=priority)
+    from app.profiling import profile_call
+
+    result, summary = await get_executor().run(profile_call, profile, fn, *args, label=label, priority=priority)
+    response.headers["X-Profile-Id"] = summary["profile_id"]
+    return result
+
+
+_IF_NONE_MATCH = Header(default=None, description="ETag of a model the client already has (answered with 304)")
+
+
+def _conditional_response(response: Response, body: Dict, canonical: bool, if_none_match: Optional[str]):
+    """
+    body with its ETag, or 304 Not Modified if the client already has it.
+    Canonical bodies are sent as their canonical bytes, so the tag is strong;
+    regular ones carry a created_at outside the hash, so it is weak.
+    """
+    from app.canonical import canonical_json, etag_matches, response_etag
+
+    etag = response_etag(body, weak=not canonical)
+    response.headers["ETag"] = etag
+    # A returned Response replaces the injected one, so carry over ETag and X-Profile-Id
+    headers = {k: v for k, v in response.headers.items() if k.lower() not in ("content-length", "content-type")}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    if canonical:
+        return Response(content=canonical_json(body), media_type="application/json", headers=headers)
+    return body
 
 
 @app.get("/health")
@@ -19,31 +195,318 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/health/pool")
+def pool_health():
+    return get_executor().stats()
+
+
 @app.post("/process")
-def process(req: ProcessRequest):
-    segments = segment_text(req.text, doc_id=req.doc_id)
-    model = build_domain_model(req.doc_id, segments)
-    return model
+async def process(req: ProcessRequest, response: Response, x_profile: Optional[str] = _PROFILE_HEADER,
+                  if_none_match: Optional[str] = _IF_NONE_MATCH):
+    from app.pipeline import analyze_text
+
+    profile = _profile_mode(x_profile)
+    priority = _priority(req.priority)
+    try:
+        model = await _run_pipeline(response, profile, req.doc_id, analyze_text, req.doc_id, req.text, None,
+                                    req.budget(), req.sections, priority=priority)
+    except QueueFull as e:
+        raise _queue_full(e)
+    if req.store:
+        await run_in_threadpool(app.state.models.save, model)
+    if req.canonical:
+        from app.canonical import canonicalize
+        model = canonicalize(model)
+    return _conditional_response(response, model, req.canonical, if_none_match)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/process/stream")
+async def process_stream(req: ProcessRequest):
+    """
+    Like /process (sections, store and canonical included), but streams progress
+    as server-sent events. Emits 'progress' events, then a final 'result' (or
+    'error') event. Disconnecting cancels the analysis cooperatively at the next segment.
+    """
+    from app.pipeline import analyze_text
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    budget = req.budget()
+    on_progress = ThrottledProgress(
+        lambda event: loop.call_soon_threadsafe(events.put_nowait, ("progress", event.to_dict()))
+    )
+
+    try:
+        future = get_executor().submit_local(analyze_text, req.doc_id, req.text, on_progress, budget,
+                                             req.sections, priority=_priority(req.priority))
+    except QueueFull as e:
+        raise _queue_full(e)
+    future.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, ("done", None)))
+
+    async def stream():
+        try:
+            while True:
+                kind, payload = await events.get()
+                if kind == "done":
+                    break
+                yield _sse(kind, payload)
+            try:
+                model = future.result()
+                if req.store:
+                    await run_in_threadpool(app.state.models.save, model)
+                if req.canonical:
+                    from app.canonical import canonicalize
+                    model = canonicalize(model)
+                yield _sse("result", model)
+            except Exception as e:
+                yield _sse("error", {"detail": f"Processing error: {str(e)}"})
+        finally:
+            budget.cancel()
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 @app.post("/process-file")
-def process_file(path: str, doc_id: str = "doc"):
-    """Process requirements from a file (PDF, DOCX, or TXT)"""
+async def process_file(response: Response, path: str, doc_id: str = "doc", max_seconds: Optional[float] = None,
+                       max_segments: Optional[int] = None, max_classes: Optional[int] = None, store: bool = False,
+                       canonical: bool = False, sections: Optional[List[str]] = Query(default=None),
+                       priority: str = INTERACTIVE, x_profile: Optional[str] = _PROFILE_HEADER,
+                       if_none_match: Optional[str] = _IF_NONE_MATCH):
+    """Process requirements from a file (PDF, DOCX, or TXT); canonical=true as for /process"""
+    from app.pipeline import analyze_file
+
+    profile = _profile_mode(x_profile)
+    priority = _priority(priority)
     try:
-        text = extract_text_from_file(path)
-        segments = segment_text(text, doc_id=doc_id)
-        model = build_domain_model(doc_id, segments)
+        budget = Budget.from_env(max_seconds, max_segments, max_classes)
+        result = await _run_pipeline(response, profile, doc_id, analyze_file, path, doc_id, None, budget, sections,
+                                     priority=priority)
+        if store:
+            await run_in_threadpool(app.state.models.save, result["model"])
+        if canonical:
+            from app.canonical import canonicalize
+            result = {**result, "model": canonicalize(result["model"])}
+        return _conditional_response(response, result, canonical, if_none_match)
+
+    except QueueFull as e:
+        raise _queue_full(e)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
+
+@app.post("/process-upload")
+async def process_upload(request: Request, response: Response, doc_id: str = "doc", priority: str = INTERACTIVE,
+                         x_profile: Optional[str] = _PROFILE_HEADER):
+    """
+    Process requirements uploaded as multipart/form-data (field 'file').
+    The file type is detected from its content, not its name.
+    """
+    from app.model_builder import build_domain_model
+    from app.upload import UploadSpool, UploadTooLarge, receive_multipart_upload
+
+    profile = _profile_mode(x_profile)
+    priority = _priority(priority)
+    executor = get_executor()
+    try:
+        # Refuse before reading the body rather than after spooling it
+        executor.check_admission(priority)
+    except QueueFull as e:
+        raise _queue_full(e)
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + 64 * 1024:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds limit of {MAX_UPLOAD_BYTES} bytes")
+
+    spool = UploadSpool(max_bytes=MAX_UPLOAD_BYTES, doc_id=doc_id)
+    try:
+        file_name = await receive_multipart_upload(request, spool)
+        text, segments = await run_in_threadpool(spool.finish)
+        model = await _run_pipeline(response, profile, doc_id, build_domain_model, doc_id, segments, None,
+                                    Budget.from_env(), priority=priority)
 
         return {
-            "file_path": path,
-            "file_type": Path(path).suffix,
+            "file_name": file_name,
+            "file_type": spool.file_type,
+            "sha256": spool.sha256,
+            "size": spool.size,
             "extracted_length": len(text),
             "model": model
         }
 
-    except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    except QueueFull as e:
+        raise _queue_full(e)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+    finally:
+        spool.close()
+
+
+@app.get("/profiles")
+def list_request_profiles(limit: int = Query(default=100, ge=1, le=1000)):
+    """Most recent request profiles (see the X-Profile header)"""
+    from app.profiling import list_profiles
+
+    return {"profiles": list_profiles(limit)}
+
+
+@app.get("/profiles/{profile_id}")
+def get_request_profile(profile_id: str):
+    """Summary of a saved profile, with its hottest functions"""
+    from app.profiling import get_profile
+
+    summary = get_profile(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_id}")
+    return summary
+
+
+@app.get("/profiles/{profile_id}/data")
+def download_profile(profile_id: str):
+    """The profile itself: a pstats dump (.prof) or folded stacks (.folded)"""
+    from app.profiling import profile_path
+
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_id}")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+
+
+@app.post("/jobs", status_code=202)
+def create_job(req: JobRequest):
+    """Queue a long-running analysis (and optional Miro build); poll GET /jobs/{id}"""
+    params = req.model_dump(exclude={"kind"}, exclude_none=True)
+    try:
+        validate_params(req.kind, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return app.state.jobs.create(req.kind, params)
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = app.state.jobs.request_cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+@app.post("/models", status_code=201)
+def store_model(model: Dict[str, Any]):
+    """Save a domain model (as returned by /process) in the model store, replacing one with the same doc_id"""
+    try:
+        doc_id = app.state.models.save(model)
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid domain model: {str(e)}")
+    return {"doc_id": doc_id}
+
+
+@app.get("/models")
+def list_models(limit: int = Query(default=100, ge=1, le=1000), offset: int = Query(default=0, ge=0)):
+    return {"models": app.state.models.list_documents(limit, offset), "totals": app.state.models.stats()}
+
+
+@app.get("/models/{doc_id}")
+def get_model(doc_id: str, include_segments: bool = True):
+    model = app.state.models.get(doc_id, include_segments)
+    if model is None:
+        raise HTTPException(status_code=404, detail=f"Model not found: {doc_id}")
+    return model
+
+
+@app.delete("/models/{doc_id}")
+def delete_model(doc_id: str):
+    if not app.state.models.delete(doc_id):
+        raise HTTPException(status_code=404, detail=f"Model not found: {doc_id}")
+    return {"deleted": doc_id}
+
+
+@app.get("/query/classes")
+def query_classes(name: str, attribute: Optional[str] = None, limit: int = Query(default=100, ge=1, le=1000)):
+    """Stored documents defining a class, optionally with a given attribute (case-insensitive)"""
+    return {"results": app.state.models.find_documents(name, attribute, limit)}
+
+
+@app.get("/query/relations")
+def query_relations(source: Optional[str] = None, target: Optional[str] = None, label: Optional[str] = None,
+                    limit: int = Query(default=100, ge=1, le=1000)):
+    """Stored relations by source class, target class and/or label (case-insensitive)"""
+    try:
+        return {"results": app.state.models.find_relations(source, target, label, limit)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/diff")
+def diff(req: DiffRequest):
+    """Added, removed and changed classes, attributes and relations between two models"""
+    models = {}
+    for side, model, doc_id in (("old", req.old, req.old_doc_id), ("new", req.new, req.new_doc_id)):
+        if model is None and doc_id:
+            model = app.state.models.get(doc_id, include_segments=False)
+            if model is None:
+                raise HTTPException(status_code=404, detail=f"Model not found: {doc_id}")
+        if model is None:
+            raise HTTPException(status_code=400, detail=f"Provide '{side}' or '{side}_doc_id'")
+        models[side] = model
+    try:
+        return diff_models(models["old"], models["new"])
+    except (KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid domain model: {str(e)}")
+
+
+@app.post("/render")
+def render_model(req: RenderRequest):
+    """
+    Render a domain model locally as SVG, PlantUML or Mermaid (no Miro calls).
+    The diagram is streamed into a temporary file that is served and then removed.
+    With board_id (SVG only), the rendered image is uploaded to Miro instead.
+    """
+    from app.render import render_to_file
+
+    if req.format not in _RENDER_MEDIA:
+        raise HTTPException(status_code=400,
+                            detail=f"Unsupported format: {req.format}. Supported: {', '.join(_RENDER_MEDIA)}")
+    if req.board_id and req.format != "svg":
+        raise HTTPException(status_code=400, detail="Uploading to Miro requires format 'svg'")
+
+    media_type, suffix = _RENDER_MEDIA[req.format]
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    try:
+        render_to_file(req.model, path, req.format)
+        if req.board_id:
+            from app.miro_client import upload_image
+
+            item = upload_image(req.board_id, path, title=req.model.get("metadata", {}).get("doc_id"))
+            os.remove(path)
+            return {"board_id": req.board_id, "image_id": item.get("id"), "item": item}
+    except (KeyError, TypeError) as e:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail=f"Invalid domain model: {str(e)}")
+    except Exception as e:
+        os.remove(path)
+        raise HTTPException(status_code=500, detail=f"Rendering error: {str(e)}")
+
+    doc_id = req.model.get("metadata", {}).get("doc_id", "domain_model")
+    return FileResponse(path, media_type=media_type, filename=f"{doc_id}{suffix}",
+                        background=BackgroundTask(os.remove, path))
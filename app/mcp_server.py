@@ -6,12 +6,11 @@ from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
-from app.file_processor import extract_text_from_file
-from app.filter import segment_text
-from app.model_builder import build_domain_model
-from app.miro_visualizer import visualize_domain_model
+from app.jobs import JobWorkerPool, get_job_store, validate_params
+from app.progress import STAGES, ThrottledProgress, overall_progress
 
 import asyncio
+import os
 import sys
 from pathlib import Path
 
@@ -22,6 +21,48 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 # Initialize MCP server
 server = Server("requirements-to-uml")
 
+_job_store = None
+_job_workers = None
+
+
+def _jobs():
+    """Open the shared job store and start in-process workers on first use"""
+    global _job_store, _job_workers
+    if _job_store is None:
+        _job_store = get_job_store()
+        workers = int(os.getenv("JOB_WORKERS", "2"))
+        if workers > 0:
+            _job_workers = JobWorkerPool(_job_store, workers=workers)
+            _job_workers.start()
+    return _job_store
+
+
+def _progress_notifier():
+    """
+    Progress callback that forwards pipeline events to the client as MCP
+    progress notifications. Returns None if the request has no progress token.
+    Must be created on the event loop; the callback itself may run in any thread.
+    """
+    ctx = server.request_context
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return None
+
+    loop = asyncio.get_running_loop()
+    last = {"value": -1.0}
+
+    def notify(event):
+        value = overall_progress(event)
+        # Progress must increase monotonically for a given token
+        if value <= last["value"]:
+            return
+        last["value"] = value
+        asyncio.run_coroutine_threadsafe(
+            ctx.session.send_progress_notification(token, value, float(len(STAGES))), loop
+        )
+
+    return ThrottledProgress(notify)
+
 
 @server.list_tools()
 async def list_tools() -> list[Tool]:
@@ -48,6 +89,16 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "Optional identifier for the document",
                         "default": "doc"
+                    },
+                    "sections": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Optional: only analyze these sections, by number (e.g. \"3.2\") or heading title"
+                    },
+                    "profile": {
+                        "type": "string",
+                        "enum": ["cprofile", "sample"],
+                        "description": "Optional: run the analysis under a profiler and save the profile on the server"
                     }
                 },
                 "required": ["requirements_text"]
@@ -71,6 +122,16 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "Optional identifier for the document",
                         "default": "doc"
+                    },
+                    "sections": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Optional: only analyze these sections, by number (e.g. \"3.2\") or heading title"
+                    },
+                    "profile": {
+                        "type": "string",
+                        "enum": ["cprofile", "sample"],
+                        "description": "Optional: run the analysis under a profiler and save the profile on the server"
                     }
                 },
                 "required": ["file_path"]
@@ -94,6 +155,22 @@ async def list_tools() -> list[Tool]:
                     "board_id": {
                         "type": "string",
                         "description": "Miro board ID where diagram should be created"
+                    },
+                    "previous_layout": {
+                        "type": "object",
+                        "description": (
+                            "Optional class positions from an earlier diagram of this model, "
+                            "{class: {\"x\": ..., \"y\": ...}}; those classes keep their place "
+                            "and only new classes are positioned"
+                        )
+                    },
+                    "dry_run": {
+                        "type": "boolean",
+                        "description": (
+                            "Optional: only validate the model and plan the diagram (API calls, estimated "
+                            "duration, relations to unknown classes) without writing to the board"
+                        ),
+                        "default": False
                     }
                 },
                 "required": ["domain_model", "board_id"]
@@ -121,14 +198,122 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "Optional document identifier",
                         "default": "doc"
+                    },
+                    "profile": {
+                        "type": "string",
+                        "enum": ["cprofile", "sample"],
+                        "description": "Optional: run the analysis under a profiler and save the profile on the server"
                     }
                 },
                 "required": ["file_path", "board_id"]
             }
+        ),
+        Tool(
+            name="start_analysis_job",
+            description=(
+                "Start a long-running analysis (and optionally Miro diagram build) as a background job. "
+                "Returns a job ID immediately; use get_job_status to follow progress. "
+                "Use this for large documents that would time out in analyze_and_visualize."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "file_path": {
+                        "type": "string",
+                        "description": "Absolute path to requirements file"
+                    },
+                    "board_id": {
+                        "type": "string",
+                        "description": "Optional Miro board ID; if given the diagram is created too"
+                    },
+                    "document_id": {
+                        "type": "string",
+                        "description": "Optional document identifier",
+                        "default": "doc"
+                    }
+                },
+                "required": ["file_path"]
+            }
+        ),
+        Tool(
+            name="get_job_status",
+            description=(
+                "Get status and per-stage progress of a background job. "
+                "Set cancel to true to cancel it."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "Job ID returned by start_analysis_job"
+                    },
+                    "cancel": {
+                        "type": "boolean",
+                        "description": "Cancel the job",
+                        "default": False
+                    }
+                },
+                "required": ["job_id"]
+            }
+        ),
+        Tool(
+            name="diff_domain_models",
+            description=(
+                "Compare two domain models (e.g. from two versions of a requirements document). "
+                "Returns added, removed and changed classes, attributes, relations and cardinalities, "
+                "with the segment IDs responsible for each change."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "old_model": {
+                        "type": "object",
+                        "description": "Domain model of the previous version"
+                    },
+                    "new_model": {
+                        "type": "object",
+                        "description": "Domain model of the current version"
+                    }
+                },
+                "required": ["old_model", "new_model"]
+            }
         )
     ]
 
 
+# Tools whose pipeline stages report progress notifications
+_PROGRESS_TOOLS = {
+    "analyze_requirements_text",
+    "analyze_requirements_file",
+    "create_miro_diagram",
+    "analyze_and_visualize",
+}
+
+
+async def _analyze(fn, *args, profile=None, label=None):
+    """
+    Run a pipeline function on a thread of the shared executor as interactive
+    work (so progress can be sent meanwhile, and queued bulk jobs wait),
+    under the profiler if requested. Returns (result, profile summary or None).
+    """
+    from app.executor import INTERACTIVE, get_executor
+
+    executor = get_executor()
+    if profile is None:
+        return await asyncio.wrap_future(executor.submit_local(fn, *args, priority=INTERACTIVE)), None
+    from app.profiling import profile_call
+
+    return await asyncio.wrap_future(
+        executor.submit_local(profile_call, profile, fn, *args, label=label, priority=INTERACTIVE))
+
+
+def _profile_note(summary) -> str:
+    if summary is None:
+        return ""
+    return f"\n\nProfile saved: {summary['profile_id']} ({summary['mode']}, {summary['duration_s']}s)"
+
+
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     """
@@ -137,14 +322,25 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     """
 
     try:
+        # Pipeline and Miro modules are loaded on the first tool call, not at server start
+        from app.diff import diff_models
+        from app.miro_visualizer import execute_plan, plan_visualization, visualize_domain_model
+        from app.pipeline import analyze_file, analyze_text
+        from app.profiling import parse_mode, profiling_enabled
+
+        progress = _progress_notifier() if name in _PROGRESS_TOOLS else None
+        profile = parse_mode(arguments.get("profile"))
+        if profile and not profiling_enabled():
+            raise ValueError("Profiling is disabled on this server")
+
         if name == "analyze_requirements_text":
             # Extract arguments
             requirements_text = arguments["requirements_text"]
             doc_id = arguments.get("document_id", "doc")
 
-            # Process with your existing pipeline
-            segments = segment_text(requirements_text, doc_id=doc_id)
-            model = build_domain_model(doc_id, segments)
+            # Process with your existing pipeline (in a thread so progress can be sent meanwhile)
+            model, profile_summary = await _analyze(analyze_text, doc_id, requirements_text, progress, None,
+                                                    arguments.get("sections"), profile=profile, label=doc_id)
 
             # Format response
             response = {
@@ -164,6 +360,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
                      f"Found {len(model['classes'])} classes and {len(model['relations'])} relationships.\n\n"
                      f"Classes: {', '.join([c['name'] for c in model['classes']])}\n\n"
                      f"Full domain model:\n{response}"
+                     f"{_profile_note(profile_summary)}"
             )]
 
         elif name == "analyze_requirements_file":
@@ -171,12 +368,10 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             file_path = arguments["file_path"]
             doc_id = arguments.get("document_id", "doc")
 
-            # Extract text from file
-            text = extract_text_from_file(file_path)
-
-            # Process
-            segments = segment_text(text, doc_id=doc_id)
-            model = build_domain_model(doc_id, segments)
+            # Extract text from file and process it
+            result, profile_summary = await _analyze(analyze_file, file_path, doc_id, progress, None,
+                                                     arguments.get("sections"), profile=profile, label=doc_id)
+            model = result["model"]
 
             response = {
                 "success": True,
@@ -197,6 +392,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
                      f"Found {len(model['classes'])} classes and {len(model['relations'])} relationships.\n\n"
                      f"Classes: {', '.join([c['name'] for c in model['classes']])}\n\n"
                      f"Full domain model:\n{response}"
+                     f"{_profile_note(profile_summary)}"
             )]
 
         elif name == "create_miro_diagram":
@@ -204,8 +400,32 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             domain_model = arguments["domain_model"]
             board_id = arguments["board_id"]
 
+            previous_layout = {
+                name: (pos["x"], pos["y"]) if isinstance(pos, dict) else tuple(pos)
+                for name, pos in (arguments.get("previous_layout") or {}).items()
+            }
+
+            # Validate and prepare every call first; nothing is written if the model is invalid
+            plan = await asyncio.to_thread(plan_visualization, domain_model, None, previous_layout or None)
+            if arguments.get("dry_run") or plan.errors:
+                summary = plan.summary()
+                verdict = "Dry run: nothing was written to the board." if not plan.errors else (
+                    "The domain model is invalid; nothing was written to the board.")
+                return [TextContent(
+                    type="text",
+                    text=f"{verdict}\n\n"
+                         f"- API calls: {summary['calls']['total']} ({summary['calls']['shapes']} shapes, "
+                         f"{summary['calls']['connectors']} connectors, {summary['calls']['frames']} frames)\n"
+                         f"- Estimated duration: {summary['estimated_seconds']} s at "
+                         f"{summary['rate_limit_per_second']} requests/s\n"
+                         f"- Dangling relations: {len(summary['dangling_relations'])}\n\n"
+                         f"Full plan:\n{summary}"
+                )]
+            if not plan.boxes:
+                raise ValueError("No classes to visualize")
+
             # Create visualization
-            result = visualize_domain_model(board_id, domain_model)
+            result = await asyncio.to_thread(execute_plan, board_id, plan, progress)
 
             miro_url = f"https://miro.com/app/board/{board_id}"
 
@@ -226,12 +446,12 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             doc_id = arguments.get("document_id", "doc")
 
             # Step 1: Analyze
-            text = extract_text_from_file(file_path)
-            segments = segment_text(text, doc_id=doc_id)
-            model = build_domain_model(doc_id, segments)
+            analysis, profile_summary = await _analyze(analyze_file, file_path, doc_id, progress,
+                                                       profile=profile, label=doc_id)
+            model = analysis["model"]
 
             # Step 2: Visualize
-            result = visualize_domain_model(board_id, model)
+            result = await asyncio.to_thread(visualize_domain_model, board_id, model, progress)
 
             miro_url = f"https://miro.com/app/board/{board_id}"
 
@@ -246,8 +466,68 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
                      f"🎨 UML Diagram: {miro_url}\n\n"
                      f"✅ Created {result['summary']['classes_created']} class boxes "
                      f"and {result['summary']['relations_created']} connectors."
+                     f"{_profile_note(profile_summary)}"
             )]
 
+        elif name == "start_analysis_job":
+            board_id = arguments.get("board_id")
+            kind = "analyze_and_visualize" if board_id else "analyze_file"
+            params = {
+                "path": arguments["file_path"],
+                "doc_id": arguments.get("document_id", "doc")
+            }
+            if board_id:
+                params["board_id"] = board_id
+            validate_params(kind, params)
+
+            job = _jobs().create(kind, params)
+
+            return [TextContent(
+                type="text",
+                text=f"Job started.\n\n"
+                     f"Job ID: {job['job_id']}\n"
+                     f"Kind: {kind}\n"
+                     f"Use get_job_status with this ID to follow progress."
+            )]
+
+        elif name == "get_job_status":
+            job_id = arguments["job_id"]
+            store = _jobs()
+            job = store.request_cancel(job_id) if arguments.get("cancel") else store.get(job_id)
+
+            if job is None:
+                return [TextContent(type="text", text=f"Job not found: {job_id}")]
+
+            text = (f"Job {job_id}: {job['status']}\n\n"
+                    f"Progress: {job['progress']}")
+            if job["error"]:
+                text += f"\n\nError: {job['error']}"
+            if job["result"]:
+                model = job["result"]["model"]
+                text += (f"\n\nFound {len(model['classes'])} classes and {len(model['relations'])} relationships.\n\n"
+                         f"Full result:\n{job['result']}")
+
+            return [TextContent(type="text", text=text)]
+
+        elif name == "diff_domain_models":
+            result = diff_models(arguments["old_model"], arguments["new_model"])
+            summary = result["summary"]
+
+            if result["identical"]:
+                text = "The two domain models are structurally identical."
+            else:
+                text = (f"Domain model diff:\n\n"
+                        f"- Classes: +{summary['classes']['added']} / -{summary['classes']['removed']} / "
+                        f"~{summary['classes']['changed']}\n"
+                        f"- Attributes: +{summary['attributes']['added']} / -{summary['attributes']['removed']} / "
+                        f"~{summary['attributes']['changed']}\n"
+                        f"- Relations: +{summary['relations']['added']} / -{summary['relations']['removed']} / "
+                        f"~{summary['relations']['changed']} "
+                        f"({summary['cardinalities_changed']} cardinality changes)\n\n"
+                        f"Full diff:\n{result}")
+
+            return [TextContent(type="text", text=text)]
+
         else:
             return [TextContent(
                 type="text",
@@ -1,13 +1,88 @@
+import json
 import os
-import requests
-from dotenv import load_dotenv
-
-load_dotenv()
+import threading
+import time
+from pathlib import Path
 
 MIRO_API_BASE = "https://api.miro.com/v2"
 
 
+class RateLimiter:
+    """Token bucket shared by all threads writing to Miro"""
+
+    def __init__(self, rate: float, burst: int = 10):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def estimate_seconds(self, calls: int) -> float:
+        """Time the limiter needs to let `calls` more requests through, from its current state"""
+        with self._lock:
+            tokens = min(self.burst, self._tokens + (time.monotonic() - self._updated) * self.rate)
+        return max(0.0, calls - tokens) / self.rate
+
+
+_env_loaded = False
+_rate_limiter = None
+_init_lock = threading.Lock()
+
+
+def load_env():
+    """
+    Load .env once, on first Miro use. requests and python-dotenv are
+    imported lazily so importing this module (e.g. for the box sizing
+    helpers) stays cheap.
+    """
+    global _env_loaded
+    with _init_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _env_loaded = True
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Token bucket shared by all writer threads (MIRO_RATE_LIMIT requests/s, default 10)"""
+    global _rate_limiter
+    load_env()
+    with _init_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(float(os.getenv("MIRO_RATE_LIMIT", "10")))
+        return _rate_limiter
+
+
+def miro_post(url: str, max_retries: int = 3, **kwargs):
+    """POST through the shared rate limiter, retrying on 429 with the server's Retry-After"""
+    import requests
+
+    kwargs.setdefault("headers", get_headers())
+    for attempt in range(max_retries + 1):
+        get_rate_limiter().acquire()
+        response = requests.post(url, **kwargs)
+        if response.status_code != 429 or attempt == max_retries:
+            break
+        time.sleep(float(response.headers.get("Retry-After", 2 ** attempt)))
+    response.raise_for_status()
+    return response.json()
+
+
 def get_headers():
+    load_env()
     token = os.getenv("MIRO_API_TOKEN")
     if not token:
         raise RuntimeError("MIRO_API_TOKEN not found in environment")
@@ -51,9 +126,22 @@ def divider_for_width(width_px: int) -> str:
     return "─" * num_chars
 
 
-def create_class_box(board_id: str, class_name: str, attributes: list, x: int = 0, y: int = 0):
-    """Create a UML class box using rectangle shape"""
+def create_item(board_id: str, kind: str, payload: dict):
+    """Create a board item of one kind ("shapes", "connectors", "frames") from a prepared payload"""
+    return miro_post(f"{MIRO_API_BASE}/boards/{board_id}/{kind}", json=payload)
 
+
+def create_class_box(board_id: str, class_name: str, attributes: list, x: int = 0, y: int = 0,
+                     parent_id: str = None):
+    """
+    Create a UML class box using rectangle shape.
+    With parent_id the box is placed in that frame (x/y relative to its top-left corner).
+    """
+    return create_item(board_id, "shapes", class_box_payload(class_name, attributes, x, y, parent_id))
+
+
+def class_box_payload(class_name: str, attributes: list, x: int = 0, y: int = 0, parent_id: str = None) -> dict:
+    """Shape payload for a UML class box (see create_class_box)"""
     # Calculate dimensions
     width = estimate_width(class_name, attributes)
     num_lines = 2 + len(attributes)  # class name + divider + attributes
@@ -71,8 +159,6 @@ def create_class_box(board_id: str, class_name: str, attributes: list, x: int =
         else:
             content += f"<p>{attr}</p>"
 
-    url = f"{MIRO_API_BASE}/boards/{board_id}/shapes"
-
     payload = {
         "data": {
             "shape": "rectangle",
@@ -95,14 +181,62 @@ def create_class_box(board_id: str, class_name: str, attributes: list, x: int =
             "height": height
         }
     }
+    if parent_id:
+        payload["parent"] = {"id": parent_id}
+
+    return payload
 
-    response = requests.post(url, json=payload, headers=get_headers())
-    response.raise_for_status()
-    return response.json()
+
+def create_frame(board_id: str, title: str, x: int, y: int, width: int, height: int):
+    """Create a frame (x/y is its centre) to group class boxes"""
+    return create_item(board_id, "frames", frame_payload(title, x, y, width, height))
+
+
+def frame_payload(title: str, x: int, y: int, width: int, height: int) -> dict:
+    """Frame payload (see create_frame)"""
+    return {
+        "data": {
+            "title": title,
+            "format": "custom",
+            "type": "freeform"
+        },
+        "style": {
+            "fillColor": "#F5F6F8"
+        },
+        "position": {
+            "x": x,
+            "y": y
+        },
+        "geometry": {
+            "width": width,
+            "height": height
+        }
+    }
+
+
+def upload_image(board_id: str, image_path: str, x: int = 0, y: int = 0, title: str = None):
+    """Upload a local image file (e.g. a rendered SVG diagram) as a single image item"""
+    url = f"{MIRO_API_BASE}/boards/{board_id}/images"
+
+    data = {"position": {"x": x, "y": y}}
+    if title:
+        data["title"] = title
+
+    # Multipart upload: let requests set the Content-Type with the boundary
+    headers = {k: v for k, v in get_headers().items() if k != "Content-Type"}
+    path = Path(image_path)
+    with open(path, "rb") as f:
+        files = {
+            "data": (None, json.dumps(data), "application/json"),
+            "resource": (path.name, f, "image/svg+xml" if path.suffix.lower() == ".svg" else "application/octet-stream")
+        }
+        return miro_post(url, files=files, headers=headers, max_retries=0)
 
 
 def test_connection():
     """Sanity check: list boards"""
+    import requests
+
     url = f"{MIRO_API_BASE}/boards"
     response = requests.get(url, headers=get_headers())
     response.raise_for_status()
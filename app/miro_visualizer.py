@@ -1,8 +1,19 @@
 # app/miro_visualizer.py
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
 import math
-from app.miro_client import create_class_box, get_headers, MIRO_API_BASE
-import requests
+import os
+import threading
+from app.miro_client import RateLimiter, class_box_payload, create_item, frame_payload, get_rate_limiter
+from app.partition import partition_classes
+from app.progress import PipelineCancelled, ProgressCallback, emit
+
+logger = logging.getLogger(__name__)
+
+# Called with (key, record) after each frame, box or connector is created on the board
+CreatedCallback = Callable[[str, Dict], None]
 
 
 def calculate_layout(num_classes: int, spacing: int = 400) -> List[Tuple[int, int]]:
@@ -31,15 +42,114 @@ def calculate_layout(num_classes: int, spacing: int = 400) -> List[Tuple[int, in
     return positions
 
 
+def calculate_incremental_layout(class_names: List[str], previous_layout: Optional[Dict[str, Tuple[int, int]]],
+                                 relations: Optional[List[Dict]] = None,
+                                 spacing: int = 400) -> Dict[str, Tuple[int, int]]:
+    """
+    Layout that keeps the previous positions (class -> (x, y)) as a warm start.
+    Classes that already had a position stay where they were; only new
+    classes (and old ones whose slot collides with another) are placed, each
+    in the free grid slot nearest to the classes it is related to, or next to
+    the bottom-right box if it has no placed neighbours. Without a previous
+    layout this is calculate_layout in the given order.
+    Returns class name -> (x, y)
+    """
+    if not previous_layout:
+        return dict(zip(class_names, calculate_layout(len(class_names), spacing)))
+
+    pinned = [n for n in class_names if n in previous_layout]
+    # Align new slots with the existing grid (calculate_layout grids are offset by half a cell for odd sizes)
+    ox, oy = previous_layout[pinned[0]] if pinned else (0, 0)
+    occupied = set()
+    layout: Dict[str, Tuple[int, int]] = {}
+    to_place: List[str] = []
+
+    for name in class_names:
+        if name not in previous_layout:
+            to_place.append(name)
+            continue
+        x, y = previous_layout[name]
+        cells = _cells_covered(x - ox, y - oy, spacing)
+        if cells & occupied:
+            to_place.append(name)
+            continue
+        occupied |= cells
+        layout[name] = (int(x), int(y))
+
+    if not to_place:
+        return layout
+
+    neighbours: Dict[str, List[str]] = {}
+    for rel in relations or []:
+        neighbours.setdefault(rel["source"], []).append(rel["target"])
+        neighbours.setdefault(rel["target"], []).append(rel["source"])
+
+    corner = max(layout.values(), key=lambda p: (p[1], p[0])) if layout else (ox, oy)
+    for name in to_place:
+        placed = [layout[n] for n in neighbours.get(name, ()) if n in layout]
+        if name in previous_layout:
+            anchor = previous_layout[name]
+        elif placed:
+            anchor = (sum(x for x, _ in placed) / len(placed), sum(y for _, y in placed) / len(placed))
+        else:
+            anchor = corner
+        col, row = _nearest_free_cell((anchor[0] - ox) / spacing, (anchor[1] - oy) / spacing, occupied)
+        occupied.add((col, row))
+        layout[name] = (int(ox + col * spacing), int(oy + row * spacing))
+        if not placed and name not in previous_layout:
+            corner = max(corner, layout[name], key=lambda p: (p[1], p[0]))
+
+    return layout
+
+
+def _cells_covered(x: float, y: float, spacing: int) -> set:
+    """Grid cells a box centred at (x, y) (relative to the grid origin) overlaps"""
+    cols = {math.floor(x / spacing), math.ceil(x / spacing)}
+    rows = {math.floor(y / spacing), math.ceil(y / spacing)}
+    return {(c, r) for c in cols for r in rows if abs(c * spacing - x) < spacing and abs(r * spacing - y) < spacing}
+
+
+def _nearest_free_cell(col: float, row: float, occupied: set) -> Tuple[int, int]:
+    """Spiral search: free cell closest to (col, row), scanning square rings outwards"""
+    start = (round(col), round(row))
+    best: Optional[Tuple[float, Tuple[int, int]]] = None
+    radius = 0
+    # A cell in ring r is at least r - 0.5 cells away, so stop once no ring can beat the best so far
+    while best is None or radius - 0.5 <= best[0]:
+        for dc in range(-radius, radius + 1):
+            for dr in range(-radius, radius + 1):
+                if max(abs(dc), abs(dr)) != radius:
+                    continue
+                cell = (start[0] + dc, start[1] + dr)
+                if cell in occupied:
+                    continue
+                distance = math.hypot(cell[0] - col, cell[1] - row)
+                if best is None or (distance, cell[1], cell[0]) < (best[0], best[1][1], best[1][0]):
+                    best = (distance, cell)
+        radius += 1
+    return best[1]
+
+
+def layout_from_result(result: Dict) -> Dict[str, Tuple[int, int]]:
+    """Class positions of a previous visualize_domain_model() result, usable as previous_layout"""
+    return {box["class"]: (box["position"]["x"], box["position"]["y"]) for box in result.get("boxes", [])}
+
+
 def create_connector(board_id: str, start_id: str, end_id: str, label: str = "", cardinality: dict = None):
     """
     Create a connector with multiplicities at both ends
     """
-    url = f"{MIRO_API_BASE}/boards/{board_id}/connectors"
-
     payload = {
         "startItem": {"id": start_id},
         "endItem": {"id": end_id},
+        **connector_payload(label, cardinality)
+    }
+    return create_item(board_id, "connectors", payload)
+
+
+def connector_payload(label: str = "", cardinality: dict = None) -> Dict:
+    """Connector payload without its endpoints (startItem / endItem are added once the boxes exist)"""
+    payload = {
         "shape": "curved",
         "style": {
             "strokeColor": "#1A1A1A",
@@ -75,100 +185,401 @@ def create_connector(board_id: str, start_id: str, end_id: str, label: str = "",
     if captions:
         payload["captions"] = captions
 
-    response = requests.post(url, json=payload, headers=get_headers())
-    response.raise_for_status()
-    return response.json()
+    return payload
+
+
+@dataclass
+class PlannedFrame:
+    title: str
+    classes: List[str]
+    payload: Dict
+
+
+@dataclass
+class PlannedBox:
+    class_name: str
+    payload: Dict                   # shape payload; a framed box gets its parent ID when the frame exists
+    position: Tuple[int, int]       # board position reported in the result
+    frame: Optional[int] = None     # index into plan.frames
+
 
+@dataclass
+class PlannedConnector:
+    source: str
+    target: str
+    label: str
+    cardinality: Dict
+    payload: Dict                   # connector payload without startItem / endItem
+    frame: Optional[int] = None     # frame holding both ends; None between frames or without frames
 
-def visualize_domain_model(board_id: str, domain_model: Dict) -> Dict:
+
+@dataclass
+class VisualizationPlan:
     """
-    Visualize the complete domain model in Miro
-    Returns summary of created items
+    Every Miro call needed to draw a model, prepared up front.
+    A plan with errors (schema violations, ambiguous class names) cannot be executed.
+    """
+    frames: List[PlannedFrame] = field(default_factory=list)
+    boxes: List[PlannedBox] = field(default_factory=list)
+    connectors: List[PlannedConnector] = field(default_factory=list)
+    dangling: List[Dict] = field(default_factory=list)  # relations with an endpoint that is not a class
+    errors: List[str] = field(default_factory=list)
+    estimated_seconds: float = 0.0
+    rate_limit: float = 0.0
+
+    @property
+    def calls(self) -> int:
+        return len(self.frames) + len(self.boxes) + len(self.connectors)
+
+    def summary(self) -> Dict:
+        return {
+            "valid": not self.errors,
+            "errors": self.errors,
+            "calls": {"frames": len(self.frames), "shapes": len(self.boxes), "connectors": len(self.connectors),
+                      "total": self.calls},
+            "estimated_seconds": round(self.estimated_seconds, 1),
+            "rate_limit_per_second": self.rate_limit,
+            "dangling_relations": self.dangling,
+        }
+
+
+def plan_visualization(domain_model: Dict, frame_size: Optional[int] = None,
+                       previous_layout: Optional[Dict[str, Tuple[int, int]]] = None,
+                       rate_limiter: Optional[RateLimiter] = None) -> VisualizationPlan:
     """
+    Validate the model, resolve every relation endpoint and build all shape,
+    frame and connector payloads, without calling Miro. The duration estimate
+    assumes the shared rate limiter (MIRO_RATE_LIMIT) in its current state.
+    Layout and frames are as described for visualize_domain_model().
+    """
+    from app.model_schema import validate_domain_model
+
+    plan = VisualizationPlan(errors=validate_domain_model(domain_model))
+    if plan.errors:
+        return plan
+
     classes = domain_model.get("classes", [])
     relations = domain_model.get("relations", [])
+    names = [cls["name"] for cls in classes]
+    duplicates = sorted({n for n in names if names.count(n) > 1}) if len(set(names)) < len(names) else []
+    plan.errors = [f"classes: duplicate class name '{n}' (relation endpoints would be ambiguous)" for n in duplicates]
+    if plan.errors or not classes:
+        return plan
+
+    known = set(names)
+    resolved = []
+    for i, rel in enumerate(relations):
+        missing = [end for end in ("source", "target") if rel[end] not in known]
+        if missing:
+            plan.dangling.append({"relation": i, "source": rel["source"], "target": rel["target"],
+                                  "label": rel.get("label", ""), "missing": missing})
+        else:
+            resolved.append(rel)
+
+    frame_size = frame_size or int(os.getenv("MIRO_FRAME_SIZE", "25"))
+    if len(classes) > frame_size and not previous_layout:
+        _plan_frames(plan, classes, resolved, frame_size)
+    else:
+        layout = calculate_incremental_layout(names, previous_layout, relations)
+        for cls in classes:
+            x, y = layout[cls["name"]]
+            plan.boxes.append(PlannedBox(cls["name"], class_box_payload(cls["name"], _attribute_lines(cls), x, y),
+                                         (x, y)))
+        plan.connectors = [_plan_connector(rel) for rel in resolved]
+
+    rate_limiter = rate_limiter or get_rate_limiter()
+    plan.rate_limit = rate_limiter.rate
+    plan.estimated_seconds = rate_limiter.estimate_seconds(plan.calls)
+    return plan
+
+
+def _attribute_lines(cls: Dict) -> List[str]:
+    return [f"{attr['name']}: {attr.get('type', 'String')}" for attr in cls.get("attributes", [])]
+
 
-    if not classes:
+def _plan_connector(rel: Dict, frame: Optional[int] = None) -> PlannedConnector:
+    label = rel.get("label", "")
+    cardinality = rel.get("cardinality", {"source": "1", "target": "0..*"})
+    return PlannedConnector(rel["source"], rel["target"], label, cardinality, connector_payload(label, cardinality),
+                            frame)
+
+
+def _plan_frames(plan: VisualizationPlan, classes: List[Dict], relations: List[Dict], frame_size: int,
+                 spacing: int = 400, frame_gap: int = 200):
+    """
+    One frame per cluster of related classes; boxes are positioned relative
+    to their frame. Connectors within a frame are tagged with it, the ones
+    between frames come last.
+    """
+    by_name = {cls["name"]: cls for cls in classes}
+    clusters = partition_classes({"classes": classes, "relations": relations}, frame_size)
+    cluster_of = {name: i for i, names in enumerate(clusters) for name in names}
+
+    # Frame sizes from each cluster's own grid, then a grid of frames
+    grids = [math.ceil(math.sqrt(len(names))) for names in clusters]
+    sizes = [(cols * spacing, math.ceil(len(names) / cols) * spacing) for names, cols in zip(clusters, grids)]
+    cell = max(max(w, h) for w, h in sizes) + frame_gap
+    frame_positions = calculate_layout(len(clusters), cell)
+
+    for index, names in enumerate(clusters):
+        (fx, fy), (width, height) = frame_positions[index], sizes[index]
+        title = f"Cluster {index + 1}: {names[0]}"
+        plan.frames.append(PlannedFrame(title, names, frame_payload(title, fx, fy, width, height)))
+        for name, (x, y) in zip(names, calculate_layout(len(names), spacing)):
+            # Children are positioned relative to the frame's top-left corner
+            rel_x, rel_y = x + (grids[index] * spacing) // 2 + spacing // 2, y + height // 2 + spacing // 2
+            payload = class_box_payload(name, _attribute_lines(by_name[name]), rel_x, rel_y)
+            plan.boxes.append(PlannedBox(name, payload, (fx - width // 2 + rel_x, fy - height // 2 + rel_y), index))
+
+    inter = []
+    for rel in relations:
+        source, target = cluster_of[rel["source"]], cluster_of[rel["target"]]
+        if source == target:
+            plan.connectors.append(_plan_connector(rel, source))
+        else:
+            inter.append(_plan_connector(rel))
+    plan.connectors.extend(inter)
+
+
+def visualize_domain_model(board_id: str, domain_model: Dict,
+                           progress: Optional[ProgressCallback] = None,
+                           frame_size: Optional[int] = None, workers: Optional[int] = None,
+                           previous_layout: Optional[Dict[str, Tuple[int, int]]] = None,
+                           created: Optional[Dict[str, Dict]] = None,
+                           on_created: Optional[CreatedCallback] = None) -> Dict:
+    """
+    Visualize the complete domain model in Miro
+    Models with more than `frame_size` classes (MIRO_FRAME_SIZE, default 25)
+    are partitioned into clusters, one Miro frame each, written concurrently
+    by `workers` threads (MIRO_WRITE_WORKERS, default 4).
+    With a previous_layout (see layout_from_result), classes keep their earlier
+    positions and only new ones are placed; frames are not used then.
+    The model is planned first (see plan_visualization): a model that fails
+    validation raises ValueError before anything is written.
+    Emits visualize.classes / visualize.relations progress events
+    created / on_created resume an interrupted run, see execute_plan()
+    Returns summary of created items
+    """
+    plan = plan_visualization(domain_model, frame_size, previous_layout)
+    if not plan.errors and not plan.boxes:
         return {"error": "No classes to visualize"}
+    return execute_plan(board_id, plan, progress, workers, created, on_created)
+
+
+def execute_plan(board_id: str, plan: VisualizationPlan, progress: Optional[ProgressCallback] = None,
+                 workers: Optional[int] = None, created: Optional[Dict[str, Dict]] = None,
+                 on_created: Optional[CreatedCallback] = None) -> Dict:
+    """
+    Replay a plan against a board. Returns summary of created items
+
+    on_created(key, record) is called after each item is written; passing the
+    collected records back as `created` when the same plan is replayed (e.g. a
+    job resumed after a crash) reuses those items instead of creating them again.
+    """
+    if plan.errors:
+        raise ValueError("Invalid domain model: " + "; ".join(plan.errors))
+    ledger = _Ledger(created, on_created, plan)
+
+    class_steps = _Steps(progress, "visualize.classes", len(plan.boxes))
+    relation_steps = _Steps(progress, "visualize.relations", len(plan.connectors) + len(plan.dangling))
+    for rel in plan.dangling:
+        end = rel["missing"][0]
+        logger.warning("%s class '%s' not found", end.capitalize(), rel[end])
+        relation_steps.step(message=f"{end.capitalize()} class '{rel[end]}' not found",
+                            source=rel["source"], target=rel["target"])
+
+    if plan.frames:
+        workers = workers or int(os.getenv("MIRO_WRITE_WORKERS", "4"))
+        result = _execute_in_frames(board_id, plan, class_steps, relation_steps, workers, ledger)
+    else:
+        class_id_map = {}  # class_name -> miro_shape_id
+        logger.info("Creating %d class boxes...", len(plan.boxes))
+        boxes = [_create_box(board_id, box, class_id_map, class_steps, ledger) for box in plan.boxes]
+        logger.info("Creating %d connectors...", len(plan.connectors))
+        connectors = [c for c in (_create_relation(board_id, conn, class_id_map, relation_steps, ledger)
+                                  for conn in plan.connectors) if c]
+        result = {
+            "board_id": board_id,
+            "summary": {
+                "classes_created": len(boxes),
+                "relations_created": len(connectors)
+            },
+            "boxes": boxes,
+            "connectors": connectors
+        }
+
+    if plan.dangling:
+        result["dangling_relations"] = plan.dangling
+    return result
+
 
-    # Calculate positions
-    positions = calculate_layout(len(classes))
-
-    # Create class boxes and store their IDs
-    class_id_map = {}  # class_name -> miro_shape_id
-    created_boxes = []
-
-    print(f"\nCreating {len(classes)} class boxes...")
-    for i, cls in enumerate(classes):
-        class_name = cls["name"]
-        attributes = [
-            f"{attr['name']}: {attr.get('type', 'String')}"
-            for attr in cls.get("attributes", [])
-        ]
-        x, y = positions[i]
-
-        result = create_class_box(
-            board_id=board_id,
-            class_name=class_name,
-            attributes=attributes,
-            x=x,
-            y=y
-        )
-
-        class_id_map[class_name] = result["id"]
-        created_boxes.append({
-            "class": class_name,
+class _Steps:
+    """Thread-safe progress counter for one stage"""
+
+    def __init__(self, progress: Optional[ProgressCallback], stage: str, total: int):
+        self.progress = progress
+        self.stage = stage
+        self.total = total
+        self._done = 0
+        self._lock = threading.Lock()
+
+    def step(self, message: str = "", **data):
+        with self._lock:
+            self._done += 1
+            emit(self.progress, self.stage, self._done, self.total, message=message, **data)
+
+
+class _Ledger:
+    """Items of the plan created by an earlier run, and the callback recording new ones"""
+
+    def __init__(self, created: Optional[Dict[str, Dict]], on_created: Optional[CreatedCallback],
+                 plan: VisualizationPlan):
+        self.created = dict(created or {})
+        self.on_created = on_created
+        # Connectors are keyed by position in the plan: their endpoints and labels need not be unique
+        self._connector_keys = {id(conn): f"connector:{i}" for i, conn in enumerate(plan.connectors)}
+
+    def connector_key(self, conn: PlannedConnector) -> str:
+        return self._connector_keys[id(conn)]
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.created.get(key)
+
+    def add(self, key: str, record: Dict):
+        if self.on_created is not None:
+            self.on_created(key, record)
+
+
+def _create_box(board_id: str, box: PlannedBox, class_id_map: Dict[str, str], steps: _Steps, ledger: _Ledger,
+                frame_id: Optional[str] = None) -> Dict:
+    """Create one planned class box, inside frame_id if given"""
+    key = f"box:{box.class_name}"
+    created = ledger.get(key)
+    if created is None:
+        payload = {**box.payload, "parent": {"id": frame_id}} if frame_id else box.payload
+        result = create_item(board_id, "shapes", payload)
+        bx, by = box.position
+        created = {
+            "class": box.class_name,
             "miro_id": result["id"],
-            "position": {"x": x, "y": y}
-        })
-        print(f"  [OK] Created {class_name} with ID: {result['id']}")
+            "position": {"x": bx, "y": by}
+        }
+        if frame_id:
+            created["frame_id"] = frame_id
+        logger.debug("Created %s with ID: %s", box.class_name, result["id"])
+        ledger.add(key, created)
 
-    # Create connectors for relations
-    created_connectors = []
-    print(f"\nCreating {len(relations)} connectors...")
-    for rel in relations:
-        source_name = rel["source"]
-        target_name = rel["target"]
-        label = rel.get("label", "")
-        cardinality = rel.get("cardinality", {"source": "1", "target": "0..*"})  # Get cardinality
+    class_id_map[box.class_name] = created["miro_id"]
+    steps.step(class_name=box.class_name, miro_id=created["miro_id"])
+    return created
 
-        print(f"\nAttempting: {source_name} -> {target_name}")
 
-        # Check if both classes exist
-        if source_name not in class_id_map:
-            print(f"  [WARNING] Source class '{source_name}' not found in class_id_map")
-            continue
+def _create_relation(board_id: str, conn: PlannedConnector, class_id_map: Dict[str, str],
+                     steps: _Steps, ledger: _Ledger) -> Optional[Dict]:
+    """Create one planned connector; failures are logged and reported as progress messages, not raised"""
+    key = ledger.connector_key(conn)
+    created = ledger.get(key)
+    if created is not None:
+        steps.step(source=conn.source, target=conn.target)
+        return created
+    try:
+        payload = {
+            "startItem": {"id": class_id_map[conn.source]},
+            "endItem": {"id": class_id_map[conn.target]},
+            **conn.payload
+        }
+        connector = create_item(board_id, "connectors", payload)
+        logger.debug("Created connector: %s [%s] --%s-> [%s] %s", conn.source,
+                     conn.cardinality.get("source"), conn.label, conn.cardinality.get("target"), conn.target)
+        created = {
+            "from": conn.source,
+            "to": conn.target,
+            "label": conn.label,
+            "cardinality": conn.cardinality,
+            "miro_id": connector["id"]
+        }
+        ledger.add(key, created)
+        steps.step(source=conn.source, target=conn.target)
+        return created
+    except PipelineCancelled:
+        raise
+    except Exception as e:
+        logger.error("Failed to create connector %s -> %s: %s", conn.source, conn.target, e)
+        steps.step(message=f"Failed to create connector {conn.source} -> {conn.target}: {e}",
+                   source=conn.source, target=conn.target)
+        return None
 
-        if target_name not in class_id_map:
-            print(f"  [WARNING] Target class '{target_name}' not found in class_id_map")
-            continue
 
+def _execute_in_frames(board_id: str, plan: VisualizationPlan, class_steps: _Steps, relation_steps: _Steps,
+                       workers: int, ledger: _Ledger) -> Dict:
+    """
+    Frames (with their boxes and intra-cluster connectors) are written
+    concurrently; connectors between clusters are created last, once every
+    box exists.
+    """
+    boxes_of: List[List[PlannedBox]] = [[] for _ in plan.frames]
+    for box in plan.boxes:
+        boxes_of[box.frame].append(box)
+    intra: List[List[PlannedConnector]] = [[] for _ in plan.frames]
+    inter: List[PlannedConnector] = []
+    for conn in plan.connectors:
+        (intra[conn.frame] if conn.frame is not None else inter).append(conn)
+
+    class_id_map: Dict[str, str] = {}
+    stop = threading.Event()
+
+    def write_frame(index: int) -> Dict:
+        planned = plan.frames[index]
+        key = f"frame:{index}"
+        written = ledger.get(key)
+        if written is None:
+            frame = create_item(board_id, "frames", planned.payload)
+            written = {"frame_id": frame["id"], "title": frame.get("data", {}).get("title"),
+                       "classes": planned.classes}
+            ledger.add(key, written)
+        boxes = []
+        for box in boxes_of[index]:
+            if stop.is_set():
+                break
+            boxes.append(_create_box(board_id, box, class_id_map, class_steps, ledger, written["frame_id"]))
+        return {**written, "boxes": boxes}
+
+    def write_connectors(conns: List[PlannedConnector]) -> List[Dict]:
+        created = []
+        for conn in conns:
+            if stop.is_set():
+                break
+            connector = _create_relation(board_id, conn, class_id_map, relation_steps, ledger)
+            if connector:
+                created.append(connector)
+        return created
+
+    def run_all(pool: ThreadPoolExecutor, fn, items) -> List:
+        futures = [pool.submit(fn, item) for item in items]
         try:
-            connector = create_connector(
-                board_id=board_id,
-                start_id=class_id_map[source_name],
-                end_id=class_id_map[target_name],
-                label=label,
-                cardinality=cardinality  # Pass cardinality
-            )
-            created_connectors.append({
-                "from": source_name,
-                "to": target_name,
-                "label": label,
-                "cardinality": cardinality,
-                "miro_id": connector["id"]
-            })
-            print(f"  [OK] Created connector: {source_name} [{cardinality['source']}] --{label}-> [{cardinality['target']}] {target_name}")
-        except Exception as e:
-            print(f"  [FAILED] Failed to create connector {source_name} -> {target_name}")
-            print(f"    Error: {e}")
+            return [f.result() for f in futures]
+        except BaseException:
+            stop.set()
+            raise
+
+    logger.info("Creating %d class boxes in %d frames with %d writers...", len(plan.boxes), len(plan.frames), workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = run_all(pool, write_frame, range(len(plan.frames)))
+        logger.info("Creating %d connectors (%d between frames)...", len(plan.connectors), len(inter))
+        connectors = [c for group in run_all(pool, write_connectors, intra) for c in group]
+        # Split the inter-frame connectors so they are written concurrently too
+        chunks = [inter[i::workers] for i in range(workers)]
+        connectors += [c for group in run_all(pool, write_connectors, chunks) for c in group]
 
+    boxes = [box for frame in frames for box in frame.pop("boxes")]
     return {
         "board_id": board_id,
         "summary": {
-            "classes_created": len(created_boxes),
-            "relations_created": len(created_connectors)
+            "classes_created": len(boxes),
+            "relations_created": len(connectors),
+            "frames_created": len(frames)
         },
-        "boxes": created_boxes,
-        "connectors": created_connectors
+        "frames": frames,
+        "boxes": boxes,
+        "connectors": connectors
     }
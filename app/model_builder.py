@@ -1,22 +1,60 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Sequence, Set
 
+from app.budget import REASON_MAX_SEGMENTS, Budget
+from app.consolidate import class_aliases, merge_attributes, merge_classes, remap_relations
 from app.filter import Segment, filter_relevant_segments, quality_metrics
 from app.extract import extract_candidate_classes, extract_attributes, extract_relations
+from app.progress import ProgressCallback, emit
+from app.sections import section_index
 
 
-def build_domain_model(doc_id: str, all_segments: List[Segment]) -> Dict:
+def build_domain_model(doc_id: str, all_segments: List[Segment],
+                       progress: Optional[ProgressCallback] = None,
+                       budget: Optional[Budget] = None) -> Dict:
+    """
+    Build the domain model for one document.
+    With a budget, extraction stops early once it is spent and the model's
+    quality section reports truncated=True and where it stopped.
+    """
     kept = filter_relevant_segments(all_segments)
     q = quality_metrics(all_segments, kept)
+    emit(progress, "filter", len(all_segments), len(all_segments), kept_segments=len(kept))
 
-    class_map = extract_candidate_classes(kept)  # class -> set(segment_id)
-    class_names: Set[str] = set(class_map.keys())
+    if budget is not None:
+        budget.start()
+        if budget.max_segments is not None and len(kept) > budget.max_segments:
+            budget.stop("filter", REASON_MAX_SEGMENTS, kept[budget.max_segments].segment_id, budget.max_segments)
+            kept = kept[:budget.max_segments]
 
-    attrs_map = extract_attributes(kept)
-    relations = extract_relations(kept, class_names)
+    class_map = extract_candidate_classes(kept, progress, budget)  # class -> set(segment_id)
+    # Sorted, not set order: which class a variant like "orders" resolves to, and so which
+    # relation survives deduplication, must not depend on the hash seed
+    class_names: List[str] = sorted(class_map)
 
+    # Near-duplicates ("Customers", "Orderitem") are merged into one class afterwards; relations
+    # are still extracted with every spelling, so text naming either one is recognised
+    aliases = class_aliases(class_map, kept)
+
+    attrs_map = extract_attributes(kept, progress, budget)
+    relations = extract_relations(kept, class_names, progress, budget)
+
+    return assemble_domain_model(doc_id, all_segments, q, merge_classes(class_map, aliases),
+                                 merge_attributes(attrs_map, aliases), remap_relations(relations, aliases),
+                                 budget, aliases)
+
+
+def assemble_domain_model(doc_id: str, all_segments: Sequence[Segment], q: Dict,
+                          class_map: Dict[str, Set[str]], attrs_map: Dict[str, List[Dict]],
+                          relations: List[Dict], budget: Optional[Budget] = None,
+                          aliases: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Model dict from the extraction results (shared by the sequential and parallel builders).
+    `aliases` (merged class -> canonical class) is reported in the quality section.
+    """
+    class_names = class_map.keys()
     classes: List[Dict] = []
     for cls_name in sorted(class_names):
         classes.append({
@@ -40,12 +78,15 @@ def build_domain_model(doc_id: str, all_segments: List[Segment]) -> Dict:
             }
             for s in all_segments
         ],
+        "sections": section_index(all_segments),
         "classes": classes,
         "relations": relations,
         "quality": {
             **q,
             "num_classes": len(classes),
-            "num_relations": len(relations)
+            "num_relations": len(relations),
+            "merged_classes": dict(sorted((aliases or {}).items())),
+            **(budget.report() if budget is not None else {"truncated": False})
         }
     }
     return model
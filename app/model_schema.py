@@ -0,0 +1,38 @@
+"""
+Validation of domain models against schema/domain_model.schema.json.
+
+The schema is loaded and checked once and kept as a ready-to-use validator
+instance, so validating a model costs only the walk over the model itself.
+jsonschema is imported on first use.
+"""
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "schema" / "domain_model.schema.json"
+
+# More problems than this are not worth listing: the model is clearly not a domain model
+MAX_ERRORS = 50
+
+
+@lru_cache(maxsize=1)
+def get_validator():
+    """Compiled validator for the domain model schema (built once per process)"""
+    from jsonschema import Draft202012Validator
+
+    schema = json.loads(SCHEMA_PATH.read_text(encoding="utf-8"))
+    Draft202012Validator.check_schema(schema)
+    return Draft202012Validator(schema)
+
+
+def validate_domain_model(model: Dict) -> List[str]:
+    """Schema violations as "classes/3/name: ..." messages; empty if the model is valid"""
+    messages = []
+    for error in get_validator().iter_errors(model):
+        messages.append(f"{'/'.join(str(p) for p in error.absolute_path) or '(root)'}: {error.message}")
+        if len(messages) == MAX_ERRORS:
+            break
+    return messages
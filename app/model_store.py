@@ -0,0 +1,308 @@
+"""
+Persistent store for built domain models.
+
+Models are kept in a local SQLite database with one normalized table per
+model part, indexed on class name, attribute name and relation endpoints, so
+lookups like "which documents define a Customer with an email attribute" do
+not require reprocessing any document. The segment texts of a model are
+stored together as one zlib-compressed blob (compressing them one by one is
+both slower and larger); names are matched case-insensitively.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from app.filter import Segment
+from app.sections import section_index
+
+
+DEFAULT_DB_PATH = "data/models.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    created_at TEXT,
+    version TEXT,
+    quality TEXT NOT NULL DEFAULT '{}',
+    segment_text BLOB,
+    stored_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS classes (
+    id INTEGER PRIMARY KEY,
+    model_id INTEGER NOT NULL REFERENCES models (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    source_segments TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attributes (
+    class_id INTEGER NOT NULL REFERENCES classes (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    type TEXT NOT NULL,
+    source_segments TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS relations (
+    model_id INTEGER NOT NULL REFERENCES models (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    source TEXT NOT NULL COLLATE NOCASE,
+    target TEXT NOT NULL COLLATE NOCASE,
+    label TEXT NOT NULL COLLATE NOCASE,
+    type TEXT NOT NULL,
+    source_cardinality TEXT,
+    target_cardinality TEXT,
+    source_segments TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    model_id INTEGER NOT NULL REFERENCES models (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    segment_id TEXT NOT NULL,
+    label TEXT NOT NULL,
+    page INTEGER,
+    section TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_classes_name ON classes (name, model_id);
+CREATE INDEX IF NOT EXISTS idx_classes_model ON classes (model_id);
+CREATE INDEX IF NOT EXISTS idx_attributes_name ON attributes (name, class_id);
+CREATE INDEX IF NOT EXISTS idx_attributes_class ON attributes (class_id, name);
+CREATE INDEX IF NOT EXISTS idx_relations_source ON relations (source, model_id);
+CREATE INDEX IF NOT EXISTS idx_relations_target ON relations (target, model_id);
+CREATE INDEX IF NOT EXISTS idx_relations_model ON relations (model_id);
+CREATE INDEX IF NOT EXISTS idx_segments_model ON segments (model_id);
+"""
+
+
+class ModelStore:
+    """SQLite-backed store of domain models, keyed by doc_id (saving again replaces)"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+
+    def save(self, model: Dict) -> str:
+        """Store one model (replacing any model with the same doc_id); returns the doc_id"""
+        return self.save_many([model])[0]
+
+    def save_many(self, models: Iterable[Dict]) -> List[str]:
+        """Store models in a single transaction; bulk inserts use executemany per table"""
+        doc_ids = []
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for model in models:
+                    doc_ids.append(self._insert(model, now))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return doc_ids
+
+    def get(self, doc_id: str, include_segments: bool = True) -> Optional[Dict]:
+        """Rebuild a stored model in the shape produced by build_domain_model"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM models WHERE doc_id = ?", (doc_id,)).fetchone()
+            if row is None:
+                return None
+            model_id = row["id"]
+            class_rows = self._conn.execute(
+                "SELECT id, name, source_segments FROM classes WHERE model_id = ? ORDER BY position", (model_id,)
+            ).fetchall()
+            attr_rows = self._conn.execute(
+                "SELECT a.class_id, a.name, a.type, a.source_segments FROM attributes a "
+                "JOIN classes c ON c.id = a.class_id WHERE c.model_id = ? ORDER BY a.class_id, a.position",
+                (model_id,)
+            ).fetchall()
+            rel_rows = self._conn.execute(
+                "SELECT * FROM relations WHERE model_id = ? ORDER BY position", (model_id,)
+            ).fetchall()
+            seg_rows = self._conn.execute(
+                "SELECT * FROM segments WHERE model_id = ? ORDER BY position", (model_id,)
+            ).fetchall() if include_segments else []
+
+        attributes: Dict[int, List[Dict]] = {}
+        for a in attr_rows:
+            attributes.setdefault(a["class_id"], []).append({
+                "name": a["name"], "type": a["type"], "source_segments": json.loads(a["source_segments"])
+            })
+
+        model = {
+            "metadata": {"doc_id": row["doc_id"], "created_at": row["created_at"], "version": row["version"]},
+            "classes": [
+                {"name": c["name"], "attributes": attributes.get(c["id"], []),
+                 "source_segments": json.loads(c["source_segments"])}
+                for c in class_rows
+            ],
+            "relations": [
+                {"source": r["source"], "target": r["target"], "label": r["label"], "type": r["type"],
+                 "cardinality": {"source": r["source_cardinality"], "target": r["target_cardinality"]},
+                 "source_segments": json.loads(r["source_segments"])}
+                for r in rel_rows
+            ],
+            "quality": json.loads(row["quality"]),
+        }
+        if include_segments:
+            texts = json.loads(zlib.decompress(row["segment_text"])) if row["segment_text"] else []
+            model["segments"] = [
+                {"segment_id": s["segment_id"], "label": s["label"], "text": text,
+                 "source": {"page": s["page"], "section": s["section"]}}
+                for s, text in zip(seg_rows, texts)
+            ]
+            # Derived from the segments' sections, so it is rebuilt rather than stored
+            model["sections"] = section_index([
+                Segment(s["segment_id"], s["label"], text, s["page"] or 0, s["section"] or "")
+                for s, text in zip(seg_rows, texts)
+            ])
+        return model
+
+    def delete(self, doc_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM models WHERE doc_id = ?", (doc_id,))
+        return cursor.rowcount > 0
+
+    def list_documents(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT m.doc_id, m.created_at, "
+                "(SELECT COUNT(*) FROM classes c WHERE c.model_id = m.id) AS num_classes, "
+                "(SELECT COUNT(*) FROM relations r WHERE r.model_id = m.id) AS num_relations "
+                "FROM models m ORDER BY m.doc_id LIMIT ? OFFSET ?",
+                (limit, offset)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def find_documents(self, class_name: str, attribute: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """
+        Documents defining a class (optionally with a given attribute), with the
+        matching source segments, in the order the models were stored
+        """
+        if attribute:
+            # CROSS JOIN pins the join order: walk the class-name index in model order, probe attributes per class
+            query = (
+                "SELECT m.doc_id, c.name AS class, a.name AS attribute, a.type, a.source_segments "
+                "FROM classes c CROSS JOIN attributes a ON a.class_id = c.id JOIN models m ON m.id = c.model_id "
+                "WHERE c.name = ? AND a.name = ? ORDER BY c.model_id LIMIT ?"
+            )
+            args: tuple = (class_name, attribute, limit)
+        else:
+            query = (
+                "SELECT m.doc_id, c.name AS class, c.source_segments "
+                "FROM classes c JOIN models m ON m.id = c.model_id "
+                "WHERE c.name = ? ORDER BY c.model_id LIMIT ?"
+            )
+            args = (class_name, limit)
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [{**dict(r), "source_segments": json.loads(r["source_segments"])} for r in rows]
+
+    def find_relations(self, source: Optional[str] = None, target: Optional[str] = None,
+                       label: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Relations matching any combination of source class, target class and label"""
+        conditions, args = [], []
+        for column, value in (("r.source", source), ("r.target", target), ("r.label", label)):
+            if value:
+                conditions.append(f"{column} = ?")
+                args.append(value)
+        if not conditions:
+            raise ValueError("At least one of source, target or label is required")
+        query = (
+            "SELECT m.doc_id, r.source, r.target, r.label, r.type, r.source_cardinality, "
+            "r.target_cardinality, r.source_segments FROM relations r JOIN models m ON m.id = r.model_id "
+            f"WHERE {' AND '.join(conditions)} ORDER BY r.model_id, r.position LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(query, tuple(args) + (limit,)).fetchall()
+        return [
+            {"doc_id": r["doc_id"], "source": r["source"], "target": r["target"], "label": r["label"],
+             "type": r["type"], "cardinality": {"source": r["source_cardinality"], "target": r["target_cardinality"]},
+             "source_segments": json.loads(r["source_segments"])}
+            for r in rows
+        ]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM models) AS models, (SELECT COUNT(*) FROM classes) AS classes, "
+                "(SELECT COUNT(*) FROM attributes) AS attributes, (SELECT COUNT(*) FROM relations) AS relations, "
+                "(SELECT COUNT(*) FROM segments) AS segments"
+            ).fetchone()
+        return dict(row)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _insert(self, model: Dict, now: float) -> str:
+        # Caller holds the lock and an open transaction
+        metadata = model.get("metadata", {})
+        doc_id = metadata.get("doc_id")
+        if not doc_id:
+            raise ValueError("Model has no metadata.doc_id")
+
+        segments = model.get("segments", [])
+        segment_text = zlib.compress(json.dumps([s.get("text", "") for s in segments]).encode("utf-8"))
+
+        self._conn.execute("DELETE FROM models WHERE doc_id = ?", (doc_id,))
+        model_id = self._conn.execute(
+            "INSERT INTO models (doc_id, created_at, version, quality, segment_text, stored_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (doc_id, metadata.get("created_at"), metadata.get("version"), json.dumps(model.get("quality", {})),
+             segment_text, now)
+        ).lastrowid
+
+        attr_rows = []
+        for position, cls in enumerate(model.get("classes", [])):
+            class_id = self._conn.execute(
+                "INSERT INTO classes (model_id, position, name, source_segments) VALUES (?, ?, ?, ?)",
+                (model_id, position, cls["name"], json.dumps(cls.get("source_segments", [])))
+            ).lastrowid
+            attr_rows.extend(
+                (class_id, i, a["name"], a.get("type", "String"), json.dumps(a.get("source_segments", [])))
+                for i, a in enumerate(cls.get("attributes", []))
+            )
+        self._conn.executemany(
+            "INSERT INTO attributes (class_id, position, name, type, source_segments) VALUES (?, ?, ?, ?, ?)",
+            attr_rows
+        )
+
+        self._conn.executemany(
+            "INSERT INTO relations (model_id, position, source, target, label, type, source_cardinality, "
+            "target_cardinality, source_segments) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (model_id, i, r["source"], r["target"], r.get("label", ""), r.get("type", "association"),
+                 r.get("cardinality", {}).get("source"), r.get("cardinality", {}).get("target"),
+                 json.dumps(r.get("source_segments", [])))
+                for i, r in enumerate(model.get("relations", []))
+            ]
+        )
+
+        self._conn.executemany(
+            "INSERT INTO segments (model_id, position, segment_id, label, page, section) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (model_id, i, s["segment_id"], s.get("label", ""), s.get("source", {}).get("page"),
+                 s.get("source", {}).get("section"))
+                for i, s in enumerate(segments)
+            ]
+        )
+        return doc_id
+
+
+def get_model_store() -> ModelStore:
+    """Model store at MODEL_DB_PATH (default data/models.sqlite3)"""
+    return ModelStore(os.getenv("MODEL_DB_PATH", DEFAULT_DB_PATH))
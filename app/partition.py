@@ -0,0 +1,140 @@
+"""
+Partition the class graph of a domain model into clusters of bounded size.
+
+Used to split large diagrams into Miro frames: classes are grouped by
+connected component, components that are too big are split into
+modularity-based communities (Louvain), and small clusters are packed
+together so a board does not end up with one frame per isolated class.
+Everything is deterministic for a given model.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+
+def _class_edges(relations: Iterable[Dict], names: Set[str]) -> Dict[Tuple[str, str], float]:
+    """Undirected weighted edges between known classes; parallel relations add up"""
+    edges: Dict[Tuple[str, str], float] = defaultdict(float)
+    for rel in relations:
+        source, target = rel["source"], rel["target"]
+        if source in names and target in names and source != target:
+            edges[tuple(sorted((source, target)))] += 1.0
+    return edges
+
+
+def connected_components(nodes: Sequence[str], edges: Iterable[Tuple[str, str]]) -> List[List[str]]:
+    """Union-find components, each listed in node order, ordered by first node"""
+    parent = {n: n for n in nodes}
+
+    def find(n: str) -> str:
+        while parent[n] != n:
+            parent[n] = parent[parent[n]]
+            n = parent[n]
+        return n
+
+    for a, b in edges:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+
+    components: Dict[str, List[str]] = {}
+    for n in nodes:
+        components.setdefault(find(n), []).append(n)
+    return list(components.values())
+
+
+def louvain_communities(nodes: Sequence[str], edges: Dict[Tuple[str, str], float]) -> List[List[str]]:
+    """
+    Modularity-based communities (Louvain: local moving, then aggregation,
+    repeated until modularity stops improving). Communities are listed in
+    node order.
+    """
+    # Work on integer ids; `members` maps each current super-node to original nodes
+    index = {n: i for i, n in enumerate(nodes)}
+    members: List[List[str]] = [[n] for n in nodes]
+    weights: Dict[Tuple[int, int], float] = {(index[a], index[b]): w for (a, b), w in edges.items()}
+
+    while True:
+        count = len(members)
+        adjacency: List[Dict[int, float]] = [defaultdict(float) for _ in range(count)]
+        for (a, b), w in weights.items():
+            adjacency[a][b] += w
+            adjacency[b][a] += w
+        degree = [sum(adj.values()) for adj in adjacency]
+        total_weight = sum(degree) / 2
+        if total_weight == 0:
+            break
+
+        community = list(range(count))
+        community_degree = degree[:]
+        moved, improved = True, False
+        while moved:
+            moved = False
+            for node in range(count):
+                current = community[node]
+                links: Dict[int, float] = defaultdict(float)
+                for neighbour, w in adjacency[node].items():
+                    if neighbour != node:
+                        links[community[neighbour]] += w
+
+                community_degree[current] -= degree[node]
+                scale = degree[node] / (2 * total_weight)
+                best, best_gain = current, links.get(current, 0.0) - community_degree[current] * scale
+                for candidate in sorted(links):
+                    gain = links[candidate] - community_degree[candidate] * scale
+                    if gain > best_gain + 1e-12:
+                        best, best_gain = candidate, gain
+                community_degree[best] += degree[node]
+                if best != current:
+                    community[node] = best
+                    moved = improved = True
+
+        labels = {c: i for i, c in enumerate(dict.fromkeys(community))}
+        if len(labels) == count or not improved:
+            break
+
+        merged: List[List[str]] = [[] for _ in labels]
+        for node, c in enumerate(community):
+            merged[labels[c]].extend(members[node])
+        # Edges inside a community become self-loops so super-node degrees stay correct
+        aggregated: Dict[Tuple[int, int], float] = defaultdict(float)
+        for (a, b), w in weights.items():
+            ca, cb = labels[community[a]], labels[community[b]]
+            aggregated[(min(ca, cb), max(ca, cb))] += w
+        members, weights = merged, dict(aggregated)
+
+    return [sorted(group, key=index.__getitem__) for group in sorted(members, key=lambda g: min(index[n] for n in g))]
+
+
+def partition_classes(domain_model: Dict, max_size: int = 25) -> List[List[str]]:
+    """
+    Split the classes of a model into clusters of at most `max_size` classes.
+    Returns class names per cluster, largest clusters first.
+    """
+    names = [cls["name"] for cls in domain_model.get("classes", [])]
+    edges = _class_edges(domain_model.get("relations", []), set(names))
+    order = {n: i for i, n in enumerate(names)}
+
+    clusters: List[List[str]] = []
+    for component in connected_components(names, edges):
+        if len(component) <= max_size:
+            clusters.append(component)
+            continue
+        members = set(component)
+        sub_edges = {pair: w for pair, w in edges.items() if pair[0] in members}
+        for community in louvain_communities(component, sub_edges):
+            # A community can still be too big (e.g. a star); fall back to fixed-size chunks
+            clusters.extend(community[i:i + max_size] for i in range(0, len(community), max_size))
+
+    # First-fit decreasing: pack small clusters into shared frames
+    clusters.sort(key=lambda c: (-len(c), order[c[0]]))
+    packed: List[List[str]] = []
+    for cluster in clusters:
+        for frame in packed:
+            if len(frame) + len(cluster) <= max_size:
+                frame.extend(cluster)
+                break
+        else:
+            packed.append(list(cluster))
+    return packed
@@ -0,0 +1,49 @@
+"""
+Pipeline entry points used by the API and worker processes.
+Everything here is a plain module-level function so it can be pickled
+and executed in a process pool.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from app.budget import Budget
+from app.filter import segment_text
+from app.model_builder import build_domain_model
+from app.progress import ProgressCallback
+from app.sections import select_sections
+
+
+def analyze_text(doc_id: str, text: str, progress: Optional[ProgressCallback] = None,
+                 budget: Optional[Budget] = None, sections: Optional[Sequence[str]] = None) -> Dict:
+    """
+    Segment plain requirements text and build its domain model.
+    With sections (numbers like "3.2" or heading titles), only those
+    sections and their subsections are extracted; the model's segments,
+    classes and relations then cover just them, with the segment IDs of
+    the full document.
+    """
+    segments = segment_text(text, doc_id=doc_id, progress=progress)
+    if sections:
+        segments = select_sections(segments, sections)
+    model = build_domain_model(doc_id, segments, progress, budget)
+    if sections:
+        model["metadata"]["selected_sections"] = list(sections)
+    return model
+
+
+def analyze_file(path: str, doc_id: str = "doc", progress: Optional[ProgressCallback] = None,
+                 budget: Optional[Budget] = None, sections: Optional[Sequence[str]] = None) -> Dict:
+    """Extract text from a PDF/DOCX/TXT file and build its domain model (optionally of some sections only)"""
+    from app.file_processor import extract_text_from_file
+
+    text = extract_text_from_file(path, progress, budget)
+    model = analyze_text(doc_id, text, progress, budget, sections)
+
+    return {
+        "file_path": path,
+        "file_type": Path(path).suffix,
+        "extracted_length": len(text),
+        "model": model
+    }
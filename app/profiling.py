@@ -0,0 +1,311 @@
+"""
+On-demand profiling of single pipeline runs.
+
+A request opts in (X-Profile header on the API, `profile` argument on the
+MCP tools) and the analysis runs under one of two profilers:
+
+- "cprofile": deterministic, every call is counted; exact but slows the
+  run down noticeably. Saved as a pstats dump (<id>.prof), readable with
+  `python -m pstats` or snakeviz.
+- "sample": a background thread records the analysing thread's stack every
+  PROFILE_SAMPLE_INTERVAL_MS; low overhead, suitable for production-sized
+  documents. Saved as folded stacks (<id>.folded), the input format of
+  flamegraph.pl / speedscope.
+
+Profiles never contain document text, only function names, and are written
+to PROFILE_DIR next to a <id>.json summary with the hottest functions.
+Sample count, distinct stacks, file size and the number of kept profiles
+are bounded (see the PROFILE_* settings below).
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODES = ("cprofile", "sample")
+
+DEFAULT_PROFILE_DIR = "data/profiles"
+
+# Sampling interval is clamped to this range (milliseconds)
+MIN_SAMPLE_INTERVAL_MS = 1.0
+MAX_SAMPLE_INTERVAL_MS = 1000.0
+
+_TOP_FUNCTIONS = 15
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def profiling_enabled() -> bool:
+    return os.getenv("PROFILE_ENABLED", "1").lower() not in ("0", "false", "no")
+
+
+def profile_dir() -> Path:
+    return Path(os.getenv("PROFILE_DIR", DEFAULT_PROFILE_DIR))
+
+
+def parse_mode(value: Optional[str]) -> Optional[str]:
+    """Profiler requested by a header / tool argument: None (off), "cprofile" or "sample"; ValueError if unknown"""
+    if value is None:
+        return None
+    mode = value.strip().lower()
+    if mode in ("", "0", "false", "no", "off"):
+        return None
+    if mode in ("1", "true", "yes", "on"):
+        return "cprofile"
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiler: {value}. Use one of: {', '.join(MODES)}")
+    return mode
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for one thread: a daemon thread snapshots the
+    target thread's stack at a fixed interval and counts folded stacks.
+
+    Args:
+        interval_ms: Time between samples (clamped to 1..1000 ms)
+        max_samples: Stop sampling after this many samples
+        max_stacks: Distinct stacks kept; further new stacks are counted as "[truncated]"
+        max_depth: Innermost frames kept per stack
+    """
+
+    def __init__(self, interval_ms: float = 5.0, max_samples: int = 100_000, max_stacks: int = 20_000,
+                 max_depth: int = 64):
+        self.interval = min(max(interval_ms, MIN_SAMPLE_INTERVAL_MS), MAX_SAMPLE_INTERVAL_MS) / 1000
+        self.max_samples = max_samples
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.truncated = False
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[Any, str] = {}
+
+    def start(self):
+        """Start sampling the calling thread"""
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            if key not in self.stacks and len(self.stacks) >= self.max_stacks:
+                key = "[truncated]"
+                self.truncated = True
+            self.stacks[key] += 1
+            self.samples += 1
+            if self.samples >= self.max_samples:
+                self.truncated = True
+                break
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def write(self, path: Path, max_bytes: int) -> bool:
+        """Write folded stacks, most frequent first, up to max_bytes; returns False if lines were dropped"""
+        written = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                line = f"{stack} {count}\n"
+                written += len(line.encode("utf-8"))
+                if written > max_bytes:
+                    return False
+                f.write(line)
+        return True
+
+    def top(self, limit: int = _TOP_FUNCTIONS) -> List[Dict]:
+        """Functions with the most samples on top of the stack (self time) and anywhere on it (total time)"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        samples = max(self.samples, 1)
+        return [{"function": name, "self_pct": round(100 * count / samples, 1),
+                 "total_pct": round(100 * total[name] / samples, 1)}
+                for name, count in own.most_common(limit)]
+
+
+def _short_path(filename: str) -> str:
+    """Paths relative to the project or site-packages, so profiles do not expose the deployment layout"""
+    parts = Path(filename).parts
+    if "site-packages" in parts:
+        return "/".join(parts[len(parts) - parts[::-1].index("site-packages"):])
+    if "app" in parts:
+        return "/".join(parts[len(parts) - 1 - parts[::-1].index("app"):])
+    return os.path.basename(filename)
+
+
+def _cprofile_top(profiler: cProfile.Profile, limit: int = _TOP_FUNCTIONS) -> List[Dict]:
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [{"function": f"{func} ({_short_path(file)}:{line})", "calls": nc,
+             "self_s": round(tt, 4), "cumulative_s": round(ct, 4)}
+            for (file, line, func), (cc, nc, tt, ct, callers) in rows]
+
+
+def profile_call(mode: str, fn: Callable, *args, label: Optional[str] = None, **kwargs) -> Tuple[Any, Dict]:
+    """
+    Run fn(*args, **kwargs) under the given profiler and save the profile.
+    Returns (result, summary) where summary holds the profile_id. A module-level
+    function, so it can be submitted to the process pool like the pipeline itself.
+    If fn raises, the profile is still saved and its id is logged.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiler: {mode}. Use one of: {', '.join(MODES)}")
+
+    profile_id = uuid.uuid4().hex
+    started = time.perf_counter()
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = SamplingProfiler(
+            interval_ms=_env_float("PROFILE_SAMPLE_INTERVAL_MS", 5.0),
+            max_samples=int(_env_float("PROFILE_MAX_SAMPLES", 100_000)),
+        )
+        profiler.start()
+
+    error = None
+    try:
+        result = fn(*args, **kwargs)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        if mode == "cprofile":
+            profiler.disable()
+        else:
+            profiler.stop()
+        summary = _save(profile_id, mode, profiler, time.perf_counter() - started, label, error)
+        if error is not None:
+            logger.info("Profile %s saved for failed run: %s", profile_id, error)
+    return result, summary
+
+
+def _save(profile_id: str, mode: str, profiler, duration: float, label: Optional[str],
+          error: Optional[BaseException]) -> Dict:
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    max_bytes = int(_env_float("PROFILE_MAX_BYTES", 20 * 1024 * 1024))
+
+    summary: Dict[str, Any] = {
+        "profile_id": profile_id,
+        "mode": mode,
+        "label": label,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "duration_s": round(duration, 4),
+        "failed": error is not None,
+        "truncated": False,
+    }
+    if mode == "cprofile":
+        path = directory / f"{profile_id}.prof"
+        profiler.dump_stats(str(path))
+        if path.stat().st_size > max_bytes:
+            # Fall back to a text report of the heaviest functions, which is always small
+            path.unlink()
+            path = directory / f"{profile_id}.txt"
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats("tottime").print_stats(200)
+            path.write_text(report.getvalue()[:max_bytes], encoding="utf-8")
+            summary["truncated"] = True
+        summary["top"] = _cprofile_top(profiler)
+    else:
+        path = directory / f"{profile_id}.folded"
+        complete = profiler.write(path, max_bytes)
+        summary.update({
+            "samples": profiler.samples,
+            "interval_ms": profiler.interval * 1000,
+            "truncated": profiler.truncated or not complete,
+            "top": profiler.top(),
+        })
+
+    summary["file"] = path.name
+    summary["size"] = path.stat().st_size
+    (directory / f"{profile_id}.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    _prune(directory, int(_env_float("PROFILE_MAX_FILES", 100)))
+    return summary
+
+
+def _prune(directory: Path, keep: int):
+    """Delete the oldest profiles beyond `keep`"""
+    summaries = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in summaries[keep:]:
+        for path in directory.glob(f"{stale.stem}.*"):
+            path.unlink(missing_ok=True)
+
+
+def _valid_id(profile_id: str) -> bool:
+    return len(profile_id) == 32 and all(c in "0123456789abcdef" for c in profile_id)
+
+
+def get_profile(profile_id: str) -> Optional[Dict]:
+    """Summary of a saved profile, or None"""
+    if not _valid_id(profile_id):
+        return None
+    try:
+        return json.loads((profile_dir() / f"{profile_id}.json").read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    """Path of the saved profile data (.prof / .folded / .txt), or None"""
+    summary = get_profile(profile_id)
+    if summary is None:
+        return None
+    path = profile_dir() / summary["file"]
+    return path if path.exists() else None
+
+
+def list_profiles(limit: int = 100) -> List[Dict]:
+    """Most recent profile summaries first"""
+    directory = profile_dir()
+    if not directory.exists():
+        return []
+    summaries = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
+    profiles = []
+    for path in summaries:
+        try:
+            summary = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            continue
+        profiles.append({k: v for k, v in summary.items() if k != "top"})
+    return profiles
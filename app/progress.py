@@ -0,0 +1,87 @@
+"""
+Structured progress events for the extraction pipeline and the visualizer.
+
+Pipeline functions accept an optional `progress` callback and call it with
+ProgressEvent objects. Sinks (SSE stream, MCP progress notifications, job
+store) decide how to forward them. A callback may raise PipelineCancelled to
+stop the work that is emitting events.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Optional
+
+
+# Pipeline stages in execution order; used to turn events into overall progress
+STAGES = (
+    "extract",
+    "segment",
+    "filter",
+    "classes",
+    "attributes",
+    "relations",
+    "visualize.classes",
+    "visualize.relations",
+)
+
+
+@dataclass
+class ProgressEvent:
+    stage: str
+    current: int = 0
+    total: Optional[int] = None
+    message: str = ""
+    data: Dict = field(default_factory=dict)
+
+    @property
+    def done(self) -> bool:
+        return self.total is not None and self.current >= self.total
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+class PipelineCancelled(Exception):
+    """Raised by a progress callback to abort the pipeline early"""
+
+
+def emit(progress: Optional[ProgressCallback], stage: str, current: int = 0,
+         total: Optional[int] = None, message: str = "", **data):
+    """Send a progress event if a callback was given"""
+    if progress is not None:
+        progress(ProgressEvent(stage=stage, current=current, total=total, message=message, data=data))
+
+
+def overall_progress(event: ProgressEvent, stages=STAGES) -> float:
+    """Map an event onto a monotonically increasing 0..len(stages) scale"""
+    try:
+        index = stages.index(event.stage)
+    except ValueError:
+        return 0.0
+    fraction = min(1.0, event.current / event.total) if event.total else 0.0
+    return index + fraction
+
+
+class ThrottledProgress:
+    """
+    Forwards at most one event per `min_interval` seconds per stage, but always
+    forwards the first and last event of each stage and any event with a message.
+    """
+
+    def __init__(self, callback: ProgressCallback, min_interval: float = 0.1):
+        self.callback = callback
+        self.min_interval = min_interval
+        self._stage: Optional[str] = None
+        self._last = 0.0
+
+    def __call__(self, event: ProgressEvent):
+        now = time.monotonic()
+        if (event.stage != self._stage or event.done or event.message
+                or now - self._last >= self.min_interval):
+            self._stage = event.stage
+            self._last = now
+            self.callback(event)
@@ -0,0 +1,225 @@
+"""
+Offline UML rendering: SVG, PlantUML and Mermaid straight from a domain model.
+
+A local alternative to the Miro visualizer that needs no network access or
+token. SVG output uses the same grid layout (calculate_layout) and box sizing
+(estimate_width / estimate_height) as the Miro boxes. All renderers write
+line by line to a text stream, so large diagrams are never assembled in
+memory as one string.
+
+Run with:
+    python -m app.render data/output/domain_model.json data/output/domain_model.svg
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from app.miro_client import estimate_height, estimate_width
+from app.miro_visualizer import calculate_layout
+
+
+FORMATS = ("svg", "plantuml", "mermaid")
+SUFFIX_FORMATS = {".svg": "svg", ".puml": "plantuml", ".plantuml": "plantuml", ".mmd": "mermaid", ".mermaid": "mermaid"}
+
+_LINE_HEIGHT = 20
+_MARGIN = 40
+
+
+def attribute_lines(cls: Dict) -> List[str]:
+    """Attribute rows as shown in the Miro boxes ("name: Type")"""
+    return [f"{attr['name']}: {attr.get('type', 'String')}" for attr in cls.get("attributes", [])]
+
+
+def format_for_path(path: str) -> str:
+    fmt = SUFFIX_FORMATS.get(Path(path).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"Cannot infer format from '{path}'. Use one of: {', '.join(SUFFIX_FORMATS)}")
+    return fmt
+
+
+def render(domain_model: Dict, fmt: str, out: TextIO):
+    """Write the model to `out` in the given format (svg, plantuml or mermaid)"""
+    renderers = {"svg": render_svg, "plantuml": render_plantuml, "mermaid": render_mermaid}
+    if fmt not in renderers:
+        raise ValueError(f"Unsupported format: {fmt}. Supported: {', '.join(FORMATS)}")
+    renderers[fmt](domain_model, out)
+
+
+def render_to_file(domain_model: Dict, path: str, fmt: Optional[str] = None) -> str:
+    """Render into a file, inferring the format from its suffix if not given; returns the format"""
+    fmt = fmt or format_for_path(path)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        render(domain_model, fmt, f)
+    return fmt
+
+
+def box_geometry(domain_model: Dict, spacing: Optional[int] = None) -> Tuple[Dict[str, Tuple[int, int, int, int]], int]:
+    """
+    Centre position and size of every class box: name -> (x, y, width, height).
+    Without an explicit spacing, the grid is widened so the largest box fits.
+    """
+    classes = domain_model.get("classes", [])
+    sizes = [
+        (estimate_width(cls["name"], attribute_lines(cls)), estimate_height(2 + len(cls.get("attributes", []))))
+        for cls in classes
+    ]
+    if spacing is None:
+        spacing = max([400] + [max(w, h) + _MARGIN for w, h in sizes])
+    positions = calculate_layout(len(classes), spacing)
+    return {cls["name"]: (x, y, w, h) for cls, (x, y), (w, h) in zip(classes, positions, sizes)}, spacing
+
+
+def render_svg(domain_model: Dict, out: TextIO, spacing: Optional[int] = None):
+    geometry, _ = box_geometry(domain_model, spacing)
+    if geometry:
+        min_x = min(x - w / 2 for x, _, w, _ in geometry.values()) - _MARGIN
+        min_y = min(y - h / 2 for _, y, _, h in geometry.values()) - _MARGIN
+        max_x = max(x + w / 2 for x, _, w, _ in geometry.values()) + _MARGIN
+        max_y = max(y + h / 2 for _, y, _, h in geometry.values()) + _MARGIN
+    else:
+        min_x = min_y = 0
+        max_x = max_y = 2 * _MARGIN
+    width, height = int(max_x - min_x), int(max_y - min_y)
+
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    out.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+              f'viewBox="{int(min_x)} {int(min_y)} {width} {height}" '
+              f'font-family="Helvetica, Arial, sans-serif" font-size="14">\n')
+    out.write('<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" markerHeight="8" '
+              'orient="auto-start-reverse"><path d="M 0 0 L 10 5 L 0 10 z" fill="#1A1A1A"/></marker></defs>\n')
+    out.write(f'<rect x="{int(min_x)}" y="{int(min_y)}" width="{width}" height="{height}" fill="#FFFFFF"/>\n')
+
+    # Connectors first so the boxes are drawn over their ends
+    for rel in domain_model.get("relations", []):
+        if rel["source"] in geometry and rel["target"] in geometry:
+            _write_svg_connector(out, rel, geometry[rel["source"]], geometry[rel["target"]])
+
+    for cls in domain_model.get("classes", []):
+        _write_svg_class(out, cls, geometry[cls["name"]])
+
+    out.write("</svg>\n")
+
+
+def _write_svg_class(out: TextIO, cls: Dict, box: Tuple[int, int, int, int]):
+    x, y, w, h = box
+    left, top = x - w / 2, y - h / 2
+    out.write(f'<g class="uml-class" id={quoteattr("class-" + _identifier(cls["name"]))}>\n')
+    out.write(f'  <rect x="{left:.0f}" y="{top:.0f}" width="{w}" height="{h}" '
+              f'fill="#FFFFFF" stroke="#1A1A1A" stroke-width="2"/>\n')
+    out.write(f'  <text x="{left + 20:.0f}" y="{top + 30:.0f}" font-weight="bold">{escape(cls["name"])}</text>\n')
+    divider_y = top + 30 + _LINE_HEIGHT / 2
+    out.write(f'  <line x1="{left:.0f}" y1="{divider_y:.0f}" x2="{left + w:.0f}" y2="{divider_y:.0f}" '
+              f'stroke="#1A1A1A" stroke-width="1"/>\n')
+    for i, line in enumerate(attribute_lines(cls), start=2):
+        out.write(f'  <text x="{left + 20:.0f}" y="{top + 30 + i * _LINE_HEIGHT:.0f}">- {escape(line)}</text>\n')
+    out.write("</g>\n")
+
+
+def _write_svg_connector(out: TextIO, rel: Dict, source: Tuple[int, int, int, int],
+                         target: Tuple[int, int, int, int]):
+    (x1, y1), (x2, y2) = _clip_to_box(source, target), _clip_to_box(target, source)
+    out.write('<g class="uml-relation">\n')
+    out.write(f'  <line x1="{x1:.0f}" y1="{y1:.0f}" x2="{x2:.0f}" y2="{y2:.0f}" '
+              f'stroke="#1A1A1A" stroke-width="2" marker-end="url(#arrow)"/>\n')
+    cardinality = rel.get("cardinality", {})
+    # Same caption positions as the Miro connectors: 14% / 50% / 86% along the line
+    for fraction, text in ((0.14, cardinality.get("source")), (0.5, rel.get("label")), (0.86, cardinality.get("target"))):
+        if text:
+            tx, ty = x1 + (x2 - x1) * fraction, y1 + (y2 - y1) * fraction
+            out.write(f'  <text x="{tx:.0f}" y="{ty - 6:.0f}" text-anchor="middle" font-size="12">'
+                      f'{escape(text)}</text>\n')
+    out.write("</g>\n")
+
+
+def _clip_to_box(box: Tuple[int, int, int, int], towards: Tuple[int, int, int, int]) -> Tuple[float, float]:
+    """Point where the line from the box centre towards another box leaves the box"""
+    x, y, w, h = box
+    dx, dy = towards[0] - x, towards[1] - y
+    if dx == 0 and dy == 0:
+        return float(x), float(y)
+    scale = min(w / 2 / abs(dx) if dx else float("inf"), h / 2 / abs(dy) if dy else float("inf"))
+    return x + dx * scale, y + dy * scale
+
+
+def _identifier(name: str) -> str:
+    """Class name usable as an unquoted PlantUML / Mermaid identifier"""
+    ident = re.sub(r"\W", "_", name)
+    return ident if ident and not ident[0].isdigit() else f"_{ident}"
+
+
+def render_plantuml(domain_model: Dict, out: TextIO):
+    out.write("@startuml\n")
+    out.write("hide circle\nskinparam classAttributeIconSize 0\n\n")
+    for cls in domain_model.get("classes", []):
+        ident = _identifier(cls["name"])
+        header = f'class "{cls["name"]}" as {ident}' if ident != cls["name"] else f"class {ident}"
+        out.write(f"{header} {{\n")
+        for attr in cls.get("attributes", []):
+            out.write(f"  - {attr['name']} : {attr.get('type', 'String')}\n")
+        out.write("}\n")
+    out.write("\n")
+    for rel in domain_model.get("relations", []):
+        out.write(_relation_line(rel) + "\n")
+    out.write("@enduml\n")
+
+
+def render_mermaid(domain_model: Dict, out: TextIO):
+    out.write("classDiagram\n")
+    for cls in domain_model.get("classes", []):
+        ident = _identifier(cls["name"])
+        label = f'["{cls["name"]}"]' if ident != cls["name"] else ""
+        out.write(f"  class {ident}{label} {{\n")
+        for attr in cls.get("attributes", []):
+            out.write(f"    -{attr.get('type', 'String')} {attr['name']}\n")
+        out.write("  }\n")
+    for rel in domain_model.get("relations", []):
+        out.write("  " + _relation_line(rel) + "\n")
+
+
+def _relation_line(rel: Dict) -> str:
+    # PlantUML and Mermaid share the same relation syntax
+    cardinality = rel.get("cardinality", {})
+    line = _identifier(rel["source"])
+    if cardinality.get("source"):
+        line += f' "{cardinality["source"]}"'
+    line += " --> "
+    if cardinality.get("target"):
+        line += f'"{cardinality["target"]}" '
+    line += _identifier(rel["target"])
+    if rel.get("label"):
+        line += f" : {rel['label']}"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a domain model as SVG, PlantUML or Mermaid")
+    parser.add_argument("model", help="Domain model JSON (as returned by /process)")
+    parser.add_argument("out", help="Output file (.svg, .puml or .mmd)")
+    parser.add_argument("--format", choices=FORMATS, help="Output format (default: from the file suffix)")
+    parser.add_argument("--board-id", help="Also upload the rendered SVG to this Miro board as one image")
+    args = parser.parse_args()
+
+    model = json.loads(Path(args.model).read_text(encoding="utf-8"))
+    # Accept both a bare model and an analyze_file()-style result wrapping it
+    model = model.get("model", model)
+
+    fmt = render_to_file(model, args.out, args.format)
+    print(f"Rendered {len(model.get('classes', []))} classes as {fmt} to {args.out}")
+
+    if args.board_id:
+        if fmt != "svg":
+            parser.error("--board-id requires SVG output")
+        from app.miro_client import upload_image
+
+        item = upload_image(args.board_id, args.out, title=model.get("metadata", {}).get("doc_id"))
+        print(f"Uploaded to Miro board {args.board_id} as image {item.get('id')}")
+
+
+if __name__ == "__main__":
+    main()
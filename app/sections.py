@@ -0,0 +1,157 @@
+"""
+Document structure: headings, sections and the section index.
+
+Segmentation passes every line through a SectionTracker, which recognises
+- numbered headings ("3.2 Order Management", "2. DEFINITIONS") in any input,
+- Markdown-style headings ("## Order Management"); extract_from_docx writes
+  paragraphs with a Heading/Title style this way, and the marker is removed
+  from the segment text again,
+- "[Page n]" markers written by extract_from_pdf,
+and stamps each segment with its page and section path: the headings
+from chapter down to the innermost one, joined by " > ".
+
+section_index() turns the stamped segments into a section -> segment range
+index; select_sections() uses it to keep only the chosen chapters (with
+their subsections), so the extractors never see the rest of the document.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+_NUMBERED_HEADING = re.compile(r"^(\d{1,2}(?:\.\d{1,3}){0,5})\.?\s+([A-Z][^\n]{0,100})$")
+_MARKDOWN_HEADING = re.compile(r"^(#{1,6})\s+(\S.*)$")
+_PAGE_MARKER = re.compile(r"^\[Page (\d+)\]$")
+# Sentences, list items and table-of-contents lines that look like numbered headings
+_NOT_A_TITLE = re.compile(r"\b(?:shall|must|should|will|may)\b|\.{3,}|[.:;,]$", re.IGNORECASE)
+_MAX_TITLE_WORDS = 12
+
+SECTION_SEPARATOR = " > "
+
+
+@dataclass(frozen=True)
+class Heading:
+    level: int
+    number: str   # "3.2", or "" for unnumbered headings
+    title: str    # "Order Management"
+    text: str     # the heading line as it appears in the segment
+
+
+def parse_heading(line: str) -> Optional[Heading]:
+    """Heading for a stripped line, or None if the line is body text"""
+    match = _MARKDOWN_HEADING.match(line)
+    if match:
+        text = match.group(2).strip()
+        numbered = parse_heading(text)
+        number, title = (numbered.number, numbered.title) if numbered else ("", text)
+        return Heading(len(match.group(1)), number, title, text)
+
+    match = _NUMBERED_HEADING.match(line)
+    if match is None:
+        return None
+    title = match.group(2).strip()
+    if _NOT_A_TITLE.search(title) or len(title.split()) > _MAX_TITLE_WORDS:
+        return None
+    number = match.group(1)
+    return Heading(number.count(".") + 1, number, title, line)
+
+
+def parse_page_marker(line: str) -> Optional[int]:
+    match = _PAGE_MARKER.match(line)
+    return int(match.group(1)) if match else None
+
+
+@dataclass
+class SectionTracker:
+    """Heading stack and current page while walking a document line by line"""
+    page: int = 0
+    stack: List[Heading] = field(default_factory=list)
+
+    def observe(self, line: str) -> Tuple[str, int, str]:
+        """(segment text, page, section) for a stripped, non-empty line"""
+        page = parse_page_marker(line)
+        if page is not None:
+            self.page = page
+            return line, self.page, self.section
+
+        heading = parse_heading(line)
+        if heading is not None:
+            while self.stack and self.stack[-1].level >= heading.level:
+                self.stack.pop()
+            self.stack.append(heading)
+            return heading.text, self.page, self.section
+        return line, self.page, self.section
+
+    @property
+    def section(self) -> str:
+        return SECTION_SEPARATOR.join(h.text for h in self.stack)
+
+
+def section_index(segments: Sequence) -> List[Dict]:
+    """
+    One entry per heading, in document order: its section path, number,
+    title, depth and parent, and the [start, stop) positions and first/last
+    segment IDs of the section including its subsections.
+    """
+    entries: List[Dict] = []
+    open_sections: List[Dict] = []
+    previous = None
+
+    def close(until_level: int, stop: int):
+        while open_sections and open_sections[-1]["level"] >= until_level:
+            entry = open_sections.pop()
+            entry["stop"] = stop
+            entry["last_segment"] = segments[stop - 1].segment_id
+            entry["num_segments"] = stop - entry["start"]
+
+    for position, segment in enumerate(segments):
+        # A section starts at its heading: the segment whose text ends the new section path
+        path = segment.section.split(SECTION_SEPARATOR) if segment.section else []
+        starts = segment.section != previous and path and path[-1] == segment.text
+        previous = segment.section
+        if not starts:
+            continue
+        heading = parse_heading(segment.text)
+        close(len(path), position)
+        entry = {
+            "section": segment.section,
+            "number": heading.number if heading else "",
+            "title": heading.title if heading else segment.text,
+            "level": len(path),
+            "parent": SECTION_SEPARATOR.join(path[:-1]) or None,
+            "start": position,
+            "first_segment": segment.segment_id,
+        }
+        entries.append(entry)
+        open_sections.append(entry)
+    close(0, len(segments))
+    return entries
+
+
+def _matches(entry: Dict, selector: str) -> bool:
+    selector = selector.strip().rstrip(".")
+    if not selector:
+        return False
+    number = entry["number"]
+    if number and (number == selector or number.startswith(selector + ".")):
+        return True
+    heading = entry["section"].rsplit(SECTION_SEPARATOR, 1)[-1]
+    return selector.lower() in (entry["title"].lower(), heading.lower(), entry["section"].lower())
+
+
+def select_sections(segments: Sequence, selectors: Iterable[str],
+                    index: Optional[List[Dict]] = None) -> List:
+    """
+    Segments of the sections matching any selector, in document order.
+    A selector is a section number ("3" also selects 3.1, 3.2.4 ...) or a
+    heading title ("Order Management", case-insensitive); subsections are
+    always included. Segments keep their IDs from the full document.
+    """
+    selectors = [s for s in selectors if s and s.strip()]
+    index = section_index(segments) if index is None else index
+    selected = [False] * len(segments)
+    for entry in index:
+        if any(_matches(entry, s) for s in selectors):
+            selected[entry["start"]:entry["stop"]] = [True] * (entry["stop"] - entry["start"])
+    return [segment for segment, keep in zip(segments, selected) if keep]
@@ -0,0 +1,235 @@
+"""
+Columnar segment storage for corpus-scale work.
+
+SegmentColumns holds any number of segments in a handful of NumPy arrays
+instead of one Segment object (and several str objects) each: all texts in
+one contiguous UTF-8 buffer addressed by an offset array, segment IDs the
+same way, and labels, pages and sections as small integer codes. It is a
+read-only Sequence[Segment]: indexing and iteration materialize Segment
+objects on demand, so filter_relevant_segments, the extractors and
+build_domain_model accept it in place of List[Segment].
+
+Contiguous slices are zero-copy views on the same buffers, save() writes
+plain .npy files and load() memory-maps them, so a stored corpus opens
+instantly and only the pages actually read are paged in. Pickling (e.g.
+sending a slice to a worker process) ships only the slice's own bytes.
+"""
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from app.filter import LABEL_CON, LABEL_DEF, LABEL_INFO, LABEL_REQ, Segment
+
+
+FORMAT_VERSION = 1
+
+# Code 0..3 for the standard labels; unknown labels are appended to the vocabulary
+DEFAULT_LABELS = (LABEL_REQ, LABEL_DEF, LABEL_CON, LABEL_INFO)
+
+# Constructor arguments / .npy files, in storage order
+COLUMNS = ("text", "text_offsets", "ids", "id_offsets", "labels", "pages", "sections")
+
+
+class SegmentColumns(Sequence):
+    """
+    Build with from_segments() or load(); the constructor takes the raw
+    columns. Offsets are absolute positions in the shared buffers, so a
+    slice is just a view on a window of the offset arrays.
+    """
+
+    def __init__(self, text: np.ndarray, text_offsets: np.ndarray, ids: np.ndarray, id_offsets: np.ndarray,
+                 labels: np.ndarray, pages: np.ndarray, sections: np.ndarray,
+                 label_names: Sequence[str], section_names: Sequence[str]):
+        self._text = text
+        self._text_offsets = text_offsets
+        self._ids = ids
+        self._id_offsets = id_offsets
+        self._labels = labels
+        self._pages = pages
+        self._sections = sections
+        self.label_names = tuple(label_names)
+        self.section_names = tuple(section_names)
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Segment]) -> "SegmentColumns":
+        """Pack segments into columns; `segments` may be a generator, it is consumed once"""
+        text, ids = bytearray(), bytearray()
+        text_offsets, id_offsets = [0], [0]
+        labels: List[int] = []
+        pages: List[int] = []
+        sections: List[int] = []
+        label_codes: Dict[str, int] = {name: i for i, name in enumerate(DEFAULT_LABELS)}
+        section_codes: Dict[str, int] = {"": 0}
+
+        for s in segments:
+            text += s.text.encode("utf-8")
+            text_offsets.append(len(text))
+            ids += s.segment_id.encode("utf-8")
+            id_offsets.append(len(ids))
+            labels.append(label_codes.setdefault(s.label, len(label_codes)))
+            pages.append(s.page)
+            sections.append(section_codes.setdefault(s.section, len(section_codes)))
+
+        if len(label_codes) > 256:
+            raise ValueError(f"Too many distinct labels ({len(label_codes)}), at most 256 are supported")
+        return cls(
+            text=np.frombuffer(bytes(text), dtype=np.uint8),
+            text_offsets=np.array(text_offsets, dtype=np.int64),
+            ids=np.frombuffer(bytes(ids), dtype=np.uint8),
+            id_offsets=np.array(id_offsets, dtype=np.int64),
+            labels=np.array(labels, dtype=np.uint8),
+            pages=np.array(pages, dtype=np.int32),
+            sections=np.array(sections, dtype=np.int32),
+            label_names=list(label_codes),
+            section_names=list(section_codes),
+        )
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def __getitem__(self, index: Union[int, slice, Sequence[int], np.ndarray]):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return self._view(start, max(start, stop))
+            return self.take(np.arange(start, stop, step))
+        if isinstance(index, (list, tuple, np.ndarray)):
+            return self.take(index)
+
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("segment index out of range")
+        return self._segment(index)
+
+    def __iter__(self) -> Iterator[Segment]:
+        # Plain Python ints and one memoryview per buffer: no NumPy scalars per segment
+        text, ids = memoryview(self._text), memoryview(self._ids)
+        text_offsets, id_offsets = self._text_offsets.tolist(), self._id_offsets.tolist()
+        label_names, section_names = self.label_names, self.section_names
+        for i, (label, page, section) in enumerate(zip(self._labels.tolist(), self._pages.tolist(),
+                                                       self._sections.tolist())):
+            yield Segment(
+                segment_id=str(ids[id_offsets[i]:id_offsets[i + 1]], "utf-8"),
+                label=label_names[label],
+                text=str(text[text_offsets[i]:text_offsets[i + 1]], "utf-8"),
+                page=page,
+                section=section_names[section],
+            )
+
+    def __getstate__(self):
+        # Ship only what this (possibly sliced) view covers
+        return self.compact().__dict__
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes referenced by this view (buffers shared with other views are counted in full)"""
+        return sum(array.nbytes for array in self.arrays().values())
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Column arrays by name, as taken by the constructor (offsets are absolute unless compacted)"""
+        return {name: getattr(self, f"_{name}") for name in COLUMNS}
+
+    def texts(self) -> Iterator[str]:
+        text, offsets = memoryview(self._text), self._text_offsets.tolist()
+        for i in range(len(self)):
+            yield str(text[offsets[i]:offsets[i + 1]], "utf-8")
+
+    def label_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self._labels, minlength=len(self.label_names))
+        return {name: int(count) for name, count in zip(self.label_names, counts) if count}
+
+    def where(self, labels: Optional[Iterable[str]] = None, sections: Optional[Iterable[str]] = None) -> "SegmentColumns":
+        """Segments with one of the given labels and/or in one of the given sections"""
+        mask = np.ones(len(self), dtype=bool)
+        if labels is not None:
+            codes = [i for i, name in enumerate(self.label_names) if name in set(labels)]
+            mask &= np.isin(self._labels, codes)
+        if sections is not None:
+            codes = [i for i, name in enumerate(self.section_names) if name in set(sections)]
+            mask &= np.isin(self._sections, codes)
+        return self.take(np.flatnonzero(mask))
+
+    def take(self, indices: Union[Sequence[int], np.ndarray]) -> "SegmentColumns":
+        """Copy of the selected segments (arbitrary order) with compact buffers"""
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) and (indices.min() < -len(self) or indices.max() >= len(self)):
+            raise IndexError("segment index out of range")
+        indices = np.where(indices < 0, indices + len(self), indices)
+        text, text_offsets = _gather(self._text, self._text_offsets, indices)
+        ids, id_offsets = _gather(self._ids, self._id_offsets, indices)
+        return SegmentColumns(text, text_offsets, ids, id_offsets, self._labels[indices], self._pages[indices],
+                              self._sections[indices], self.label_names, self.section_names)
+
+    def compact(self) -> "SegmentColumns":
+        """Copy whose buffers hold exactly this view's bytes (offsets rebased to 0)"""
+        text, text_offsets = _window(self._text, self._text_offsets)
+        ids, id_offsets = _window(self._ids, self._id_offsets)
+        return SegmentColumns(text, text_offsets, ids, id_offsets, np.array(self._labels), np.array(self._pages),
+                              np.array(self._sections), self.label_names, self.section_names)
+
+    def save(self, path: Union[str, Path]):
+        """Write the columns as .npy files plus meta.json into directory `path`"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        columns = self.compact()
+        for name, array in columns.arrays().items():
+            np.save(path / f"{name}.npy", array, allow_pickle=False)
+        meta = {"version": FORMAT_VERSION, "count": len(columns),
+                "label_names": list(columns.label_names), "section_names": list(columns.section_names)}
+        # Written last: a directory without meta.json is an incomplete save
+        (path / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = True) -> "SegmentColumns":
+        """Open columns written by save(); with mmap the arrays are read-only memory maps"""
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported segment store version: {meta.get('version')}")
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r" if mmap else None, allow_pickle=False)
+                  for name in COLUMNS}
+        return cls(**arrays, label_names=meta["label_names"], section_names=meta["section_names"])
+
+    def _view(self, start: int, stop: int) -> "SegmentColumns":
+        return SegmentColumns(self._text, self._text_offsets[start:stop + 1], self._ids,
+                              self._id_offsets[start:stop + 1], self._labels[start:stop], self._pages[start:stop],
+                              self._sections[start:stop], self.label_names, self.section_names)
+
+    def _segment(self, i: int) -> Segment:
+        t0, t1 = int(self._text_offsets[i]), int(self._text_offsets[i + 1])
+        i0, i1 = int(self._id_offsets[i]), int(self._id_offsets[i + 1])
+        return Segment(
+            segment_id=self._ids[i0:i1].tobytes().decode("utf-8"),
+            label=self.label_names[self._labels[i]],
+            text=self._text[t0:t1].tobytes().decode("utf-8"),
+            page=int(self._pages[i]),
+            section=self.section_names[self._sections[i]],
+        )
+
+
+def _window(buffer: np.ndarray, offsets: np.ndarray):
+    start, stop = int(offsets[0]), int(offsets[-1])
+    return np.array(buffer[start:stop]), offsets - start
+
+
+def _gather(buffer: np.ndarray, offsets: np.ndarray, indices: np.ndarray):
+    """Concatenate the byte ranges of the selected items into a new buffer"""
+    starts, ends = offsets[indices], offsets[indices + 1]
+    lengths = ends - starts
+    new_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    if not len(indices):
+        return np.zeros(0, dtype=np.uint8), new_offsets
+    # Byte positions to copy: for each item, starts[k] .. ends[k]-1
+    positions = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+    return buffer[positions], new_offsets
@@ -0,0 +1,228 @@
+"""
+Shared-memory handoff of segments to worker processes.
+
+Submitting pipeline work to a process pool normally pickles every Segment
+(and its text) into each task and the full result dicts back. Here the
+relevant segments are packed once into columns (see segment_store) and
+copied into a single multiprocessing.shared_memory block. Tasks carry only
+a SharedSegmentsHandle (block name, column layout, label/section names) and
+a [start, stop) range; workers map the block and read the segments in
+place. Results come back as compact tuples keyed by segment position, not
+as model dicts with repeated segment IDs.
+
+parallel_build_domain_model() builds a model this way in two rounds -
+classes and attributes per range, then relations per range against the
+merged class names - and merges the ranges in order, so the model is
+identical to build_domain_model() on the same segments.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from app.consolidate import class_aliases, merge_attributes, merge_classes, remap_relations
+from app.extract import collect_relations, dedupe_relations, extract_attributes, extract_candidate_classes
+from app.filter import Segment, filter_relevant_segments, quality_metrics
+from app.model_builder import assemble_domain_model
+from app.progress import ProgressCallback, emit
+from app.segment_store import COLUMNS, SegmentColumns
+
+_ALIGNMENT = 8
+
+# Compact result records; `position` indexes the shared segments
+ClassRecord = Tuple[str, List[int]]                          # (class, positions)
+AttributeRecord = Tuple[str, str, str, int]                  # (class, attribute, type, position)
+RelationRecord = Tuple[str, str, str, str, str, str, int]    # (source, target, label, type, card source, card target, position)
+
+
+@dataclass(frozen=True)
+class SharedSegmentsHandle:
+    """What a worker needs to map the segments: a few hundred bytes, whatever the document size"""
+    name: str
+    layout: Tuple[Tuple[str, str, int, int], ...]  # (column, dtype, byte offset, length)
+    label_names: Tuple[str, ...]
+    section_names: Tuple[str, ...]
+    count: int
+
+
+class SharedSegments:
+    """
+    Owner side of a shared segment block. Use as a context manager: the block
+    is unlinked on exit, so workers must be done with it by then.
+    """
+
+    def __init__(self, segments: Union[SegmentColumns, Iterable[Segment]]):
+        columns = segments if isinstance(segments, SegmentColumns) else SegmentColumns.from_segments(segments)
+        arrays = columns.compact().arrays()
+
+        layout, size = [], 0
+        for name in COLUMNS:
+            array = arrays[name]
+            layout.append((name, array.dtype.str, size, len(array)))
+            size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+        self.shm = SharedMemory(create=True, size=max(size, 1))
+        for name, dtype, offset, length in layout:
+            np.ndarray((length,), dtype=dtype, buffer=self.shm.buf, offset=offset)[:] = arrays[name]
+        self.handle = SharedSegmentsHandle(self.shm.name, tuple(layout), columns.label_names,
+                                           columns.section_names, len(columns))
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self) -> "SharedSegments":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _run_on_range(handle: SharedSegmentsHandle, start: int, stop: int, fn: Callable):
+    """
+    Map the block, call fn(segments[start:stop], start) on the shared
+    columns and unmap it again. fn must return plain Python objects: all
+    views on the block are gone once it returns, so the mapping can close.
+    """
+    # Registers the block with the resource tracker shared with the owner (a no-op
+    # there); the owner's unlink unregisters it
+    shm = SharedMemory(name=handle.name)
+    try:
+        arrays = {name: np.ndarray((length,), dtype=dtype, buffer=shm.buf, offset=offset)
+                  for name, dtype, offset, length in handle.layout}
+        columns = SegmentColumns(**arrays, label_names=handle.label_names, section_names=handle.section_names)
+        del arrays
+        return fn(columns[start:stop], start)
+    finally:
+        columns = None
+        try:
+            shm.close()
+        except BufferError:
+            # A view is still referenced (e.g. by a traceback); the mapping goes away with it
+            pass
+
+
+def _positions(segments: SegmentColumns, start: int) -> Dict[str, int]:
+    return {segment_id: start + i for i, segment_id in enumerate(s.segment_id for s in segments)}
+
+
+def _extract(segments: SegmentColumns, start: int) -> Tuple[List[ClassRecord], List[AttributeRecord]]:
+    position = _positions(segments, start)
+    classes = [(name, [position[s] for s in segment_ids])
+               for name, segment_ids in extract_candidate_classes(segments).items()]
+    attributes = [(class_name, attr["name"], attr["type"], position[attr["source_segments"][0]])
+                  for class_name, attrs in extract_attributes(segments).items() for attr in attrs]
+    return classes, attributes
+
+
+def _relations(segments: SegmentColumns, start: int, class_names: Sequence[str]) -> List[RelationRecord]:
+    position = _positions(segments, start)
+    return [(r["source"], r["target"], r["label"], r["type"], r["cardinality"]["source"],
+             r["cardinality"]["target"], position[r["source_segments"][0]])
+            for r in collect_relations(segments, class_names)]
+
+
+def extract_range(handle: SharedSegmentsHandle, start: int, stop: int
+                  ) -> Tuple[List[ClassRecord], List[AttributeRecord]]:
+    """Worker task, round 1: candidate classes and attributes of segments [start, stop)"""
+    return _run_on_range(handle, start, stop, _extract)
+
+
+def relations_range(handle: SharedSegmentsHandle, start: int, stop: int,
+                    class_names: Sequence[str]) -> List[RelationRecord]:
+    """Worker task, round 2: relations of segments [start, stop), before global deduplication"""
+    return _run_on_range(handle, start, stop, lambda segments, offset: _relations(segments, offset, class_names))
+
+
+def split_ranges(count: int, chunks: int) -> List[Tuple[int, int]]:
+    """`chunks` contiguous, near-equal [start, stop) ranges covering 0..count"""
+    chunks = max(1, min(chunks, count))
+    bounds = [count * i // chunks for i in range(chunks + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(chunks) if bounds[i] < bounds[i + 1]]
+
+
+def parallel_build_domain_model(doc_id: str, all_segments: Sequence[Segment], workers: Optional[int] = None,
+                                chunks: Optional[int] = None, pool: Optional[Executor] = None,
+                                progress: Optional[ProgressCallback] = None) -> Dict:
+    """
+    build_domain_model() with extraction spread over worker processes that
+    read the segments from shared memory. Produces the same model.
+
+    Args:
+        workers: Worker processes for a private pool (default: CPU count; 0 = run in this process)
+        chunks: Segment ranges per round (default: 4 per worker)
+        pool: Existing executor to use instead of a private pool
+        progress: Receives "classes" / "relations" events per finished range
+    """
+    kept = filter_relevant_segments(all_segments)
+    q = quality_metrics(all_segments, kept)
+    emit(progress, "filter", len(all_segments), len(all_segments), kept_segments=len(kept))
+
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    ranges = split_ranges(len(kept), chunks or 4 * max(workers, 1))
+    segment_ids = [s.segment_id for s in kept]
+
+    own_pool = None
+    if pool is None and workers > 0:
+        pool = own_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def run(fn, stage: str, *extra) -> List:
+        results = []
+        futures = []
+        if pool is None:
+            calls = (fn(shared.handle, start, stop, *extra) for start, stop in ranges)
+        else:
+            futures = [pool.submit(fn, shared.handle, start, stop, *extra) for start, stop in ranges]
+            calls = (f.result() for f in futures)
+        try:
+            for (start, stop), result in zip(ranges, calls):
+                results.append(result)
+                emit(progress, stage, stop, len(kept))
+        except BaseException:
+            # E.g. cancelled from the progress callback: ranges not started yet are dropped
+            for future in futures:
+                future.cancel()
+            raise
+        return results
+
+    try:
+        with SharedSegments(kept) as shared:
+            class_map: Dict[str, Set[str]] = {}
+            attrs_map: Dict[str, List[Dict]] = {}
+            seen_attributes: Dict[str, Set[str]] = {}
+            # Ranges are merged in order, so first occurrences win exactly as in one sequential pass
+            for classes, attributes in run(extract_range, "classes"):
+                for name, positions in classes:
+                    class_map.setdefault(name, set()).update(segment_ids[p] for p in positions)
+                for class_name, attr_name, data_type, position in attributes:
+                    seen = seen_attributes.setdefault(class_name, set())
+                    if attr_name.lower() not in seen:
+                        seen.add(attr_name.lower())
+                        attrs_map.setdefault(class_name, []).append(
+                            {"name": attr_name, "type": data_type, "source_segments": [segment_ids[position]]})
+
+            # Same order as build_domain_model passes to extract_relations
+            class_names = sorted(class_map)
+            rels = [
+                {"source": source, "target": target, "label": label, "type": rel_type,
+                 "cardinality": {"source": card_source, "target": card_target},
+                 "source_segments": [segment_ids[position]]}
+                for records in run(relations_range, "relations", class_names)
+                for source, target, label, rel_type, card_source, card_target, position in records
+            ]
+    finally:
+        if own_pool is not None:
+            own_pool.shutdown()
+
+    aliases = class_aliases(class_map, kept)
+    return assemble_domain_model(doc_id, all_segments, q, merge_classes(class_map, aliases),
+                                 merge_attributes(attrs_map, aliases),
+                                 remap_relations(dedupe_relations(rels), aliases), aliases=aliases)
@@ -0,0 +1,74 @@
+# test_analysis.py
+import re
+
+from app.analysis import analyze, variant_index
+from app.extract import _RELATION_VERBS, _direct_verb_regex, collect_relations, extract_candidate_classes
+from app.filter import Segment
+
+
+def test_segment_views():
+    analysis = analyze("REQ-12 Each customer must place an orderItem, the_x order.")
+
+    assert analysis.words.words[:3] == ("REQ", "12", "Each")
+    assert analysis.words.offsets[:3] == (0, 4, 7)
+    assert analysis.words.separators[:2] == ("-", " ")
+    assert [(d, n) for _, d, n in analysis.noun_phrases] == [("an", "orderItem")]
+    assert analysis.lower == "each customer must place an orderitem, the_x order."
+    assert analyze("REQ-12 Each customer must place an orderItem, the_x order.") is analysis
+
+
+def test_noun_phrases_match_the_class_pattern():
+    pattern = r"\b(?:a|an|the|each|every)\s+([a-z][a-z]+(?:[A-Z][a-z]+)?)\b"
+    for text in ("each the order and a b-c of an orderItemList", "the  café or the\tcart, a (box)",
+                 "an order\nthe a customer", "the orders_ every 2nd the Order every item"):
+        assert [n for _, _, n in analyze(text).noun_phrases] == re.findall(pattern, text), text
+
+
+def test_variant_index_is_built_once_per_class_list():
+    index = variant_index(["OrderItem", "Customer"])
+
+    assert index is variant_index(("OrderItem", "Customer"))
+    assert index.get("order items") == index.get("orderitemes") == "OrderItem"
+    assert index.phrases["order item"] == ("order", "item")
+    assert variant_index(["A.B"]).phrases["a.b"] is None
+
+
+def test_direct_verbs_agree_with_the_regex():
+    names = ["Customer", "OrderItem", "Order"]
+    texts = [
+        "the customer will then place a single order item",
+        "customer x x x x x x x x place a b c d e f order",
+        "customer x x x x x x x x x place order",
+        "customer places a b c d e f g orders",
+        "the order  item has a customer",
+        "orderitems - each - references -- the customer.",
+        "customer placed an order; customers send orders",
+    ]
+    index = variant_index(names)
+    for text in texts:
+        expected = []
+        for source, source_name in index.variants.items():
+            for target, target_name in index.variants.items():
+                if source_name == target_name:
+                    continue
+                for verb in _RELATION_VERBS:
+                    if _direct_verb_regex(source, verb, target).search(text):
+                        expected.append((source_name, target_name, verb))
+                        break
+        found = collect_relations([Segment("S1", "REQ", text)], names)
+        direct = [(r["source"], r["target"], r["label"]) for r in found]
+        assert direct == list(dict.fromkeys(expected)), text
+
+
+def test_extraction_results():
+    segments = [
+        Segment("S1", "REQ", "REQ-1 The shop lets each customer place one or more orders."),
+        Segment("S2", "REQ", "REQ-2 The shop lets each order contain an orderItem for every product."),
+    ]
+    classes = extract_candidate_classes(segments)
+
+    assert classes == {"Customer": {"S1"}, "Order": {"S2"}, "Orderitem": {"S2"}, "Product": {"S2"}}
+    relations = collect_relations(segments, sorted(classes))
+    assert [(r["source"], r["target"], r["label"]) for r in relations] == [
+        ("Customer", "Order", "place"), ("Order", "Orderitem", "contain"), ("Order", "Product", "contain"),
+    ]
@@ -0,0 +1,94 @@
+# test_batch.py
+import json
+import threading
+import time
+from pathlib import Path
+
+from app.batch import BatchPipeline, StageSpec, default_stages, write_model
+from app.canonical import strip_timestamps
+from app.corpus import expand_documents
+from app.pipeline import analyze_file
+
+INPUT = Path(__file__).resolve().parents[2] / "data" / "input"
+FILES = [str(INPUT / name) for name in ("sample_requirements.txt", "requirements.pdf", "Library_Management_SRS.docx")]
+
+
+def test_models_match_the_sequential_pipeline(tmp_path):
+    models = {}
+    lock = threading.Lock()
+
+    def sink(path, model):
+        with lock:
+            models[path] = model
+
+    stats = BatchPipeline(default_stages(workers=2, kind="thread"), queue_size=2).run(FILES, sink)
+
+    assert stats["documents"] == 3 and stats["errors"] == {}
+    for path in FILES:
+        assert strip_timestamps(models[path]) == strip_timestamps(analyze_file(path, Path(path).name)["model"])
+    assert list(stats["stages"]) == ["read", "extract", "segment", "build", "sink"]
+    assert all(s["processed"] == 3 and s["max_queue_depth"] <= 2 for s in stats["stages"].values())
+
+    BatchPipeline(default_stages(workers=1, kind="thread")).run(FILES[:1], write_model(tmp_path))
+    assert (tmp_path / "sample_requirements.txt.json").exists()
+
+
+def test_same_named_files_get_their_own_ids_and_outputs(tmp_path):
+    inputs = tmp_path / "in"
+    for folder in ("a", "b"):
+        (inputs / folder).mkdir(parents=True)
+        (inputs / folder / "spec.txt").write_text(
+            f"REQ-1 A customer shall be able to place an order in folder {folder}.", encoding="utf-8")
+    out = tmp_path / "out"
+
+    stats = BatchPipeline(default_stages(workers=1, kind="thread")).run(expand_documents([str(inputs)]),
+                                                                        write_model(out))
+
+    assert stats["errors"] == {}
+    for folder in ("a", "b"):
+        model = json.loads((out / folder / "spec.txt.json").read_text(encoding="utf-8"))
+        assert model["metadata"]["doc_id"] == f"{folder}/spec.txt"
+
+    direct = str(inputs / "a" / "spec.txt")
+    stats = BatchPipeline(default_stages(workers=1, kind="thread")).run(expand_documents([direct]),
+                                                                        write_model(tmp_path / "direct"))
+    assert stats["errors"] == {} and (tmp_path / "direct" / "spec.txt.json").exists()
+
+    again = write_model(out)
+    again("x", {"metadata": {"doc_id": "a/spec.txt"}})
+    try:
+        again("y", {"metadata": {"doc_id": "a/spec.txt"}})
+        assert False, "expected FileExistsError"
+    except FileExistsError:
+        pass
+    try:
+        again("z", {"metadata": {"doc_id": "."}})
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_failures_skip_the_remaining_stages(tmp_path):
+    bad = tmp_path / "notes.rtf"
+    bad.write_text("{\\rtf1}")
+    seen = []
+
+    stats = BatchPipeline(default_stages(workers=1, kind="thread")).run(
+        [FILES[0], str(bad), str(tmp_path / "missing.txt")], lambda path, model: seen.append(path))
+
+    assert seen == [FILES[0]]
+    assert stats["documents"] == 3
+    assert stats["errors"][str(bad)].startswith("extract: ValueError: Unsupported file type: .rtf")
+    assert stats["errors"][str(tmp_path / "missing.txt")].startswith("read: FileNotFoundError")
+
+
+def test_a_slow_stage_fills_its_queue_and_blocks_the_one_before():
+    stages = [StageSpec("fast", lambda path, payload: path, workers=2),
+              StageSpec("slow", lambda path, payload: time.sleep(0.02) or payload)]
+
+    stats = BatchPipeline(stages, queue_size=3).run((f"doc{i}" for i in range(20)), lambda path, result: None)
+
+    assert stats["documents"] == 20
+    assert stats["stages"]["slow"]["max_queue_depth"] == 3
+    assert stats["stages"]["fast"]["blocked_s"] > stats["stages"]["slow"]["blocked_s"]
+    assert stats["stages"]["slow"]["utilization"] > stats["stages"]["fast"]["utilization"]
@@ -0,0 +1,46 @@
+# test_budget.py
+import pickle
+
+from app.budget import Budget
+from app.filter import segment_text
+from app.model_builder import build_domain_model
+
+NOUNS = ["customer", "order", "product", "invoice"]
+TEXT = "\n".join(
+    f"REQ-{i} A {NOUNS[i % 4]} shall be able to save a {NOUNS[(i + 1) % 4]}." for i in range(1, 9)
+)
+
+
+def test_unbudgeted_model_is_not_truncated():
+    model = build_domain_model("doc", segment_text(TEXT))
+    assert model["quality"]["truncated"] is False
+
+
+def test_max_segments_truncates_and_reports_position():
+    model = build_domain_model("doc", segment_text(TEXT), budget=Budget(max_segments=5))
+    quality = model["quality"]
+    assert quality["truncated"] is True
+    assert quality["truncation"]["reason"] == "max_segments"
+    assert quality["truncation"]["position"] == "S6"
+    assert all(int(c["source_segments"][0][1:]) <= 5 for c in model["classes"])
+
+
+def test_max_classes_caps_class_count():
+    model = build_domain_model("doc", segment_text(TEXT), budget=Budget(max_classes=3))
+    assert len(model["classes"]) == 3
+    assert model["quality"]["truncation"]["reason"] == "max_classes"
+
+
+def test_cancelled_budget_returns_partial_model():
+    budget = Budget()
+    budget.cancel()
+    model = build_domain_model("doc", segment_text(TEXT), budget=budget)
+    assert model["classes"] == []
+    assert model["quality"]["truncation"]["reason"] == "cancelled"
+    assert model["quality"]["truncation"]["stage"] == "classes"
+
+
+def test_budget_survives_pickling_for_worker_processes():
+    budget = pickle.loads(pickle.dumps(Budget(max_seconds=1.5, max_segments=10)))
+    assert budget.max_seconds == 1.5
+    assert not budget.check("classes")
@@ -0,0 +1,93 @@
+# test_canonical.py
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from app.canonical import canonical_json, canonicalize, content_hash, etag_matches, segment_sort_key
+from app.main import app
+from app.pipeline import analyze_text
+
+
+TEXT = """REQ-1 Each customer must place one or more orders.
+DEF An Order has an orderDate and a status.
+REQ-2 Each order must be delivered to exactly one address."""
+
+HASH_SCRIPT = f"""
+from app.canonical import content_hash
+from app.pipeline import analyze_text
+print(content_hash(analyze_text("doc-1", {TEXT!r})))
+"""
+
+
+def test_canonical_form_ignores_order_and_timestamp():
+    model = analyze_text("doc-1", TEXT)
+    shuffled = {
+        **model,
+        "metadata": {**model["metadata"], "created_at": "2000-01-01T00:00:00+00:00"},
+        "classes": [{**c, "attributes": c["attributes"][::-1], "source_segments": c["source_segments"][::-1]}
+                    for c in model["classes"][::-1]],
+        "relations": model["relations"][::-1],
+    }
+
+    canonical = canonicalize(model)
+    assert "created_at" not in canonical["metadata"]
+    assert canonical_json(canonicalize(shuffled)) == canonical_json(canonical)
+    assert content_hash(shuffled) == content_hash(model) == canonical["metadata"]["content_hash"]
+    assert content_hash({**model, "classes": model["classes"][1:]}) != content_hash(model)
+    assert sorted(["S10", "S2", "S1"], key=segment_sort_key) == ["S1", "S2", "S10"]
+
+
+def test_content_hash_is_the_same_across_processes():
+    hashes = set()
+    for seed in ("1", "2", "3"):
+        env = {**os.environ, "PYTHONHASHSEED": seed}
+        out = subprocess.run([sys.executable, "-c", HASH_SCRIPT], env=env, capture_output=True, text=True, check=True)
+        hashes.add(out.stdout.strip())
+    assert len(hashes) == 1
+
+
+def test_truncation_timing_is_not_part_of_the_hash():
+    from app.budget import Budget
+
+    first = analyze_text("doc-1", TEXT, budget=Budget(max_segments=1))
+    second = analyze_text("doc-1", TEXT, budget=Budget(max_segments=1))
+    second["quality"]["truncation"]["elapsed_s"] = first["quality"]["truncation"]["elapsed_s"] + 1.5
+
+    assert canonical_json(canonicalize(first)) == canonical_json(canonicalize(second))
+    assert "elapsed_s" not in canonicalize(first)["quality"]["truncation"]
+    assert "elapsed_s" in first["quality"]["truncation"]
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_process_returns_etag_and_304():
+    client = TestClient(app)
+    body = {"doc_id": "doc-1", "text": TEXT, "canonical": True}
+
+    first = client.post("/process", json=body)
+    second = client.post("/process", json=body)
+    etag = first.headers["etag"]
+    assert not etag.startswith("W/") and etag == second.headers["etag"]
+    assert first.content == second.content
+    assert first.json()["metadata"]["content_hash"]
+
+    unchanged = client.post("/process", json=body, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304 and unchanged.content == b""
+    changed = client.post("/process", json={**body, "text": TEXT + "\nREQ-3 Each order has a total."},
+                          headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+    # Regular output keeps created_at; its tag is weak but still validates
+    regular = client.post("/process", json={**body, "canonical": False})
+    assert regular.headers["etag"].startswith("W/") and "created_at" in regular.json()["metadata"]
+    assert client.post("/process", json={**body, "canonical": False},
+                       headers={"If-None-Match": regular.headers["etag"]}).status_code == 304
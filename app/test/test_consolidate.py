@@ -0,0 +1,53 @@
+# test_consolidate.py
+import numpy as np
+
+from app.consolidate import (class_aliases, embed_classes, merge_attributes, merge_classes, remap_relations,
+                             similar_pairs)
+from app.filter import Segment
+
+
+SEGMENTS = [
+    Segment("S1", "REQ", "REQ-1 The shop lets each customer place an order."),
+    Segment("S2", "REQ", "REQ-2 The shop lets each customer cancel an order."),
+    Segment("S3", "REQ", "REQ-3 The shop lists the customers of an orderItem."),
+    Segment("S4", "DEF", "DEF An OrderItem has a quantity and a price."),
+    Segment("S5", "REQ", "REQ-4 The shop ships an orderitem with a product."),
+]
+CLASS_MAP = {"Customer": {"S1", "S2"}, "Customers": {"S3"}, "Order": {"S1", "S2"},
+             "OrderItem": {"S3", "S4"}, "Orderitem": {"S5"}, "Product": {"S5"}}
+
+
+def test_spelling_variants_merge_into_the_most_frequent_name():
+    aliases = class_aliases(CLASS_MAP, SEGMENTS)
+
+    assert aliases == {"Customers": "Customer", "Orderitem": "OrderItem"}
+    assert merge_classes(CLASS_MAP, aliases)["Customer"] == {"S1", "S2", "S3"}
+    assert class_aliases({"Customer": {"S1"}, "Client": {"S1"}}, SEGMENTS) == {}
+
+
+def test_blocked_pairs_match_the_full_matrix():
+    names, vectors = embed_classes(CLASS_MAP, SEGMENTS)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-6)
+
+    full = vectors @ vectors.T
+    expected = sorted((i, j) for i, j in zip(*np.nonzero(full >= 0.3)) if i < j)
+    for block_size in (1, 2, 5, 64):
+        assert sorted(similar_pairs(vectors, 0.3, block_size)) == expected
+
+
+def test_attributes_and_relations_are_remapped():
+    aliases = {"Orderitem": "OrderItem", "Customers": "Customer"}
+    attrs = merge_attributes({
+        "OrderItem": [{"name": "quantity", "type": "int", "source_segments": ["S4"]}],
+        "Orderitem": [{"name": "Quantity", "type": "int", "source_segments": ["S5"]},
+                      {"name": "price", "type": "decimal", "source_segments": ["S5"]}],
+    }, aliases)
+    assert attrs == {"OrderItem": [{"name": "quantity", "type": "int", "source_segments": ["S4", "S5"]},
+                                   {"name": "price", "type": "decimal", "source_segments": ["S5"]}]}
+
+    relations = remap_relations([
+        {"source": "Customers", "target": "Customer", "label": "has"},
+        {"source": "Customer", "target": "Orderitem", "label": "places"},
+        {"source": "OrderItem", "target": "Customers", "label": "references"},
+    ], aliases)
+    assert relations == [{"source": "Customer", "target": "OrderItem", "label": "places"}]
@@ -0,0 +1,97 @@
+# test_corpus.py
+from app.corpus import (build_corpus_model, expand_documents, finalize, merge_partials, normalize_key,
+                         summarize_model)
+
+
+def _model(doc_id, classes, relations=()):
+    return {
+        "metadata": {"doc_id": doc_id},
+        "classes": [
+            {"name": name, "attributes": [{"name": a, "type": "String", "source_segments": ["S1"]} for a in attrs],
+             "source_segments": ["S1"]}
+            for name, attrs in classes
+        ],
+        "relations": [
+            {"source": s, "target": t, "label": "has", "type": "association",
+             "cardinality": {"source": "1", "target": "0..*"}, "source_segments": ["S2"]}
+            for s, t in relations
+        ],
+    }
+
+
+A = summarize_model(_model("a", [("Customer", ["email"]), ("Order", [])], [("Customer", "Order")]))
+B = summarize_model(_model("b", [("Customers", ["Email"]), ("Invoice", [])]))
+C = summarize_model(_model("c", [("Order", ["date"]), ("Invoice", [])], [("Order", "Invoice")]))
+
+
+def test_normalize_key_folds_case_separators_and_plurals():
+    assert normalize_key("OrderItems") == normalize_key("order item") == "orderitem"
+    assert normalize_key("Categories") == "category"
+    assert normalize_key("Address") == "address"
+
+
+def test_merge_is_associative_and_commutative():
+    reference = merge_partials(A, B, C)
+    assert merge_partials(merge_partials(A, B), C) == reference
+    assert merge_partials(A, merge_partials(B, C)) == reference
+    assert merge_partials(C, A, B) == reference
+    assert finalize(merge_partials(B, C, A))["classes"] == finalize(reference)["classes"]
+
+
+def test_finalize_consolidates_names_and_keeps_provenance():
+    model = finalize(merge_partials(A, B, C))
+    classes = {c["name"]: c for c in model["classes"]}
+
+    assert set(classes) == {"Customer", "Invoice", "Order"}
+    assert classes["Customer"]["aliases"] == ["Customers"]
+    assert classes["Customer"]["sources"] == {"a": ["S1"], "b": ["S1"]}
+    assert [a["name"] for a in classes["Customer"]["attributes"]] == ["Email"]
+    assert classes["Invoice"]["num_documents"] == 2
+    assert {(r["source"], r["target"]) for r in model["relations"]} == {("Customer", "Order"), ("Order", "Invoice")}
+    assert model["quality"]["num_documents"] == 3
+
+
+def test_build_corpus_model_inline_collects_errors(tmp_path):
+    (tmp_path / "a.txt").write_text("REQ-1 A customer shall be able to place an order.", encoding="utf-8")
+    errors = {}
+    model = build_corpus_model([str(tmp_path / "a.txt"), str(tmp_path / "missing.txt")], workers=0, errors=errors)
+
+    assert model["metadata"]["documents"] == ["a.txt"]
+    assert model["classes"]
+    assert list(errors) == [str(tmp_path / "missing.txt")]
+
+
+def test_same_named_files_in_different_folders_stay_separate_documents(tmp_path):
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "spec.txt").write_text(
+            "REQ-1 A customer shall be able to place an order.", encoding="utf-8")
+
+    model = build_corpus_model(expand_documents([str(tmp_path)]), workers=0)
+
+    assert model["metadata"]["documents"] == ["a/spec.txt", "b/spec.txt"]
+    assert model["quality"]["num_documents"] == 2
+    assert all(set(c["sources"]) == {"a/spec.txt", "b/spec.txt"} for c in model["classes"])
+
+
+def test_relation_type_conflicts_resolve_by_count_then_name():
+    def typed(doc_id, rel_type):
+        model = _model(doc_id, [("Customer", []), ("Order", [])], [("Customer", "Order")])
+        model["relations"][0]["type"] = rel_type
+        return summarize_model(model)
+
+    partials = [typed("a", "composition"), typed("b", "association"), typed("c", "composition")]
+    assert finalize(merge_partials(*partials))["relations"][0]["type"] == "composition"
+    assert finalize(merge_partials(*partials[::-1]))["relations"][0]["type"] == "composition"
+    assert finalize(merge_partials(typed("b", "composition"), typed("a", "association")))["relations"][0]["type"] == \
+        "association"
+
+
+def test_files_given_directly_are_identified_by_name(tmp_path):
+    for name in ("one.txt", "two.txt"):
+        (tmp_path / name).write_text("REQ-1 A customer shall be able to place an order.", encoding="utf-8")
+    files = [str(tmp_path / "one.txt"), str(tmp_path / "two.txt")]
+
+    assert list(expand_documents(files)) == [(files[0], "one.txt"), (files[1], "two.txt")]
+    model = build_corpus_model(expand_documents(files), workers=0)
+    assert model["metadata"]["documents"] == ["one.txt", "two.txt"]
@@ -0,0 +1,70 @@
+# test_diff.py
+import copy
+import time
+
+from app.diff import diff_models
+
+
+def _model(doc_id, classes, relations=()):
+    return {
+        "metadata": {"doc_id": doc_id, "created_at": doc_id},
+        "classes": [
+            {"name": name, "attributes": [{"name": a, "type": t, "source_segments": [seg]} for a, t in attrs],
+             "source_segments": [seg]}
+            for name, attrs, seg in classes
+        ],
+        "relations": [
+            {"source": s, "target": t, "label": "has", "type": "association",
+             "cardinality": {"source": "1", "target": card}, "source_segments": [seg]}
+            for s, t, card, seg in relations
+        ],
+    }
+
+
+OLD = _model("v1", [("Customer", [("email", "String")], "S1"), ("Order", [("date", "Date")], "S2"),
+                    ("Coupon", [], "S3")],
+             [("Customer", "Order", "0..*", "S4")])
+NEW = _model("v2", [("Customer", [("email", "String"), ("phone", "String")], "S1"),
+                    ("Order", [("date", "DateTime")], "S2"), ("Invoice", [], "S5")],
+             [("Customer", "Order", "1..*", "S4"), ("Order", "Invoice", "1", "S6")])
+
+
+def test_identical_models_ignore_metadata():
+    other = copy.deepcopy(OLD)
+    other["metadata"]["created_at"] = "later"
+    result = diff_models(OLD, other)
+    assert result["identical"] is True
+    assert result["classes"] == {"added": [], "removed": [], "changed": []}
+
+
+def test_reports_structural_changes_with_segments():
+    result = diff_models(OLD, NEW)
+
+    assert [c["name"] for c in result["classes"]["added"]] == ["Invoice"]
+    assert result["classes"]["added"][0]["source_segments"] == ["S5"]
+    assert [c["name"] for c in result["classes"]["removed"]] == ["Coupon"]
+
+    changed = {c["name"]: c for c in result["classes"]["changed"]}
+    assert [a["name"] for a in changed["Customer"]["attributes"]["added"]] == ["phone"]
+    assert changed["Order"]["attributes"]["changed"] == [
+        {"name": "date", "type": {"old": "Date", "new": "DateTime"}, "source_segments": ["S2"]}
+    ]
+
+    assert [(r["source"], r["target"]) for r in result["relations"]["added"]] == [("Order", "Invoice")]
+    assert result["relations"]["changed"][0]["cardinality"]["new"] == {"source": "1", "target": "1..*"}
+    assert result["summary"]["cardinalities_changed"] == 1
+    assert result["identical"] is False
+
+
+def test_large_models_diff_quickly():
+    old = _model("a", [(f"Class{i}", [("id", "Integer"), ("name", "String")], f"S{i}") for i in range(5000)],
+                 [(f"Class{i}", f"Class{i + 1}", "0..*", f"S{i}") for i in range(4999)])
+    new = copy.deepcopy(old)
+    new["classes"][10]["attributes"][0]["type"] = "String"
+    new["relations"][20]["cardinality"]["target"] = "1"
+
+    start = time.perf_counter()
+    result = diff_models(old, new)
+    assert time.perf_counter() - start < 1.0
+    assert result["summary"]["attributes"]["changed"] == 1
+    assert result["summary"]["cardinalities_changed"] == 1
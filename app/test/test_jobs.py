@@ -0,0 +1,124 @@
+# test_jobs.py
+import time
+
+from app.jobs import (JobStore, JobWorkerPool, STATUS_CANCELLED, STATUS_QUEUED,
+                      STATUS_RUNNING, STATUS_SUCCEEDED)
+
+TEXT = (
+    "REQ-1 The system shall allow a customer to place an order.\n"
+    "DEF A customer is a person who has a customerId and a name.\n"
+)
+
+
+def test_job_runs_to_completion_with_progress():
+    store = JobStore(":memory:")
+    job = store.create("analyze_text", {"text": TEXT, "doc_id": "jobs"})
+    assert job["status"] == STATUS_QUEUED
+
+    pool = JobWorkerPool(store, workers=0)
+    assert pool.run_one("test-worker")
+    assert not pool.run_one("test-worker")
+
+    done = store.get(job["job_id"])
+    assert done["status"] == STATUS_SUCCEEDED
+    assert done["progress"]["segments_labelled"] == 2
+    assert done["result"]["model"]["metadata"]["doc_id"] == "jobs"
+
+
+def test_cancel_queued_and_running_jobs():
+    store = JobStore(":memory:")
+    queued = store.create("analyze_text", {"text": TEXT})
+    assert store.request_cancel(queued["job_id"])["status"] == STATUS_CANCELLED
+
+    running = store.create("analyze_text", {"text": TEXT})
+    store.claim("test-worker")
+    assert store.request_cancel(running["job_id"])["status"] == STATUS_RUNNING
+    assert store.update_progress(running["job_id"], {"stage": "segment"}) is True
+
+
+def test_stale_running_job_is_requeued_and_resumed():
+    store = JobStore(":memory:")
+    job = store.create("analyze_text", {"text": TEXT})
+    store.claim("crashed-worker")
+    store.update_progress(job["job_id"], {"stage": "build"}, checkpoint={"model": {"classes": [], "relations": []}})
+    time.sleep(0.01)
+
+    assert store.requeue_stale(stale_after=0) == 1
+    assert store.get(job["job_id"])["status"] == STATUS_QUEUED
+
+    # The checkpointed model is reused instead of re-running the analysis
+    assert JobWorkerPool(store, workers=0).run_one("new-worker")
+    resumed = store.get(job["job_id"])
+    assert resumed["attempts"] == 2
+    assert resumed["result"]["model"] == {"classes": [], "relations": []}
+
+
+def test_pool_stages_get_progress_and_can_be_cancelled_mid_stage():
+    store = JobStore(":memory:")
+    job = store.create("analyze_text", {"text": TEXT})
+    stages = []
+
+    def run_stage(fn, *args, progress, check_cancelled):
+        stages.append(fn.__name__)
+        if fn.__name__ == "build_domain_model":
+            store.request_cancel(job["job_id"])
+            check_cancelled()
+        return fn(*args, progress)
+
+    assert JobWorkerPool(store, workers=0, run_stage=run_stage).run_one("test-worker")
+    assert stages == ["segment_text", "build_domain_model"]
+    assert store.get(job["job_id"])["status"] == STATUS_CANCELLED
+
+
+def test_resumed_visualization_skips_items_already_created(tmp_path, monkeypatch):
+    import requests
+
+    from app import miro_client
+
+    posted = []
+
+    class Response:
+        status_code = 200
+
+        def __init__(self, item_id):
+            self.item_id = item_id
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"id": self.item_id, "data": {}}
+
+    def crash_after_two(url, json=None, **kwargs):
+        if len(posted) == 2:
+            raise KeyboardInterrupt("worker crashed")
+        posted.append(url.rsplit("/", 1)[-1])
+        return Response(str(len(posted)))
+
+    monkeypatch.setenv("MIRO_API_TOKEN", "test")
+    monkeypatch.setattr(miro_client, "_rate_limiter", miro_client.RateLimiter(rate=1e6, burst=1000))
+    monkeypatch.setattr(requests, "post", crash_after_two)
+    path = tmp_path / "spec.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    store = JobStore(":memory:")
+    job = store.create("analyze_and_visualize", {"path": str(path), "board_id": "board"})
+
+    pool = JobWorkerPool(store, workers=0)
+    try:
+        pool.run_one("crashed-worker")
+        assert False, "expected the worker to crash"
+    except KeyboardInterrupt:
+        pass
+    assert len(store.get(job["job_id"])["checkpoint"]["visualization"]) == 2
+    time.sleep(0.01)
+    store.requeue_stale(stale_after=0)
+
+    monkeypatch.setattr(requests, "post", lambda url, json=None, **kwargs: (
+        posted.append(url.rsplit("/", 1)[-1]) or Response(str(len(posted)))))
+    assert pool.run_one("new-worker")
+
+    resumed = store.get(job["job_id"])
+    summary = resumed["result"]["visualization"]["summary"]
+    assert resumed["status"] == STATUS_SUCCEEDED
+    assert len(posted) == summary["classes_created"] + summary["relations_created"]
+    assert len({box["miro_id"] for box in resumed["result"]["visualization"]["boxes"]}) == summary["classes_created"]
@@ -0,0 +1,66 @@
+# test_layout.py
+import requests
+
+from app import miro_client
+from app.miro_visualizer import (calculate_incremental_layout, calculate_layout, layout_from_result,
+                                 visualize_domain_model)
+
+
+NAMES = [f"Class{i:02d}" for i in range(30)]
+RELATIONS = [{"source": NAMES[i], "target": NAMES[(i * 7) % 30], "label": "has"} for i in range(30)]
+
+
+def test_without_previous_layout_matches_grid():
+    layout = calculate_incremental_layout(NAMES, None)
+    assert list(layout.values()) == calculate_layout(len(NAMES))
+
+
+def test_adding_a_class_keeps_existing_positions():
+    previous = calculate_incremental_layout(NAMES, None)
+    names = sorted(NAMES + ["Account"])
+    relations = RELATIONS + [{"source": "Account", "target": "Class15", "label": "owns"}]
+
+    layout = calculate_incremental_layout(names, previous, relations)
+
+    assert all(layout[n] == previous[n] for n in NAMES)
+    assert len(set(layout.values())) == len(names)
+    # The grid is full, so the nearest free slot to its neighbour is just outside it, straight up
+    (ax, ay), (nx, ny) = layout["Account"], previous["Class15"]
+    assert ax == nx and ay == min(y for _, y in previous.values()) - 400
+
+
+def test_removed_classes_free_slots_and_collisions_are_resolved():
+    previous = calculate_incremental_layout(NAMES, None)
+    names = [n for n in NAMES if n != "Class03"] + ["Loose1", "Loose2"]
+    layout = calculate_incremental_layout(names, previous)
+
+    assert "Class03" not in layout
+    assert all(layout[n] == previous[n] for n in names if n in previous)
+    assert len(set(layout.values())) == len(names)
+
+    # Two old boxes on the same spot: the first keeps it, the second moves to the nearest free slot
+    assert calculate_incremental_layout(["A", "B"], {"A": (0, 0), "B": (10, 10)}) == {"A": (0, 0), "B": (400, 0)}
+
+
+def test_visualizer_reuses_previous_positions(monkeypatch):
+    class Response:
+        status_code = 200
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"id": "item", "data": {}}
+
+    monkeypatch.setenv("MIRO_API_TOKEN", "test")
+    monkeypatch.setattr(requests, "post", lambda url, json=None, **kwargs: Response())
+    monkeypatch.setattr(miro_client, "_rate_limiter", miro_client.RateLimiter(rate=1e6, burst=1000))
+
+    model = {"classes": [{"name": n, "attributes": []} for n in NAMES[:4]], "relations": []}
+    first = visualize_domain_model("board", model)
+    model["classes"].insert(0, {"name": "Account", "attributes": []})
+    second = visualize_domain_model("board", model, previous_layout=layout_from_result(first))
+
+    before, after = layout_from_result(first), layout_from_result(second)
+    assert all(after[n] == before[n] for n in NAMES[:4])
+    assert after["Account"] not in before.values()
@@ -0,0 +1,85 @@
+# test_lexicon.py
+import json
+
+from app.extract import extract_candidate_classes
+from app.filter import Segment
+from app.lexicon import Lexicon, SuffixTrie, get_lexicon, set_lexicon
+
+
+def test_suffix_trie():
+    trie = SuffixTrie(["id", "date", "name"])
+    assert trie.ends_with_any("customerid")
+    assert trie.ends_with_any("birthdate")
+    assert not trie.ends_with_any("customer")
+    assert not trie.ends_with_any("")
+    assert SuffixTrie([""]).ends_with_any("anything")
+
+
+def test_builtin_verdicts():
+    lexicon = Lexicon()
+    assert lexicon.is_concept("Customer")
+    assert lexicon.is_concept("Address")
+    assert not lexicon.is_concept("System")
+    assert not lexicon.is_concept("Email")
+    assert not lexicon.is_concept("req-12")
+    assert not lexicon.is_concept("2024")
+    assert not lexicon.is_concept("CustomerId")
+    assert lexicon.is_attribute("orderDate")
+    assert lexicon.normalize_class_name("orderitem") == "Orderitem"
+    assert lexicon.normalize_class_name("OrderItem") == "OrderItem"
+    assert lexicon.infer_data_type("customerId") == "int"
+    assert lexicon.infer_data_type("birthDate") == "Date"
+    assert lexicon.infer_data_type("unitPrice") == "decimal"
+    assert lexicon.infer_data_type("enabled") == "boolean"
+    assert lexicon.infer_data_type("street") == "String"
+    assert lexicon.is_attribute_stopword("Contains")
+
+
+def test_verdicts_are_memoized():
+    lexicon = Lexicon(cache_size=2)
+    for _ in range(3):
+        lexicon.is_concept("Customer")
+    info = lexicon.cache_info()["is_concept"]
+    assert info["misses"] == 1 and info["hits"] == 2
+    for token in ("Order", "Invoice", "Payment"):
+        lexicon.is_concept(token)
+    assert lexicon.cache_info()["is_concept"]["currsize"] == 2
+
+
+def test_domain_lexicon_file(tmp_path):
+    path = tmp_path / "hospital.json"
+    path.write_text(json.dumps({
+        "stopwords": ["Ward"],
+        "attribute_suffixes": ["level"],
+        "type_rules": [{"type": "decimal", "contains": ["dosage"]}],
+    }))
+    lexicon = Lexicon.from_files([str(path)])
+    assert not lexicon.is_concept("Ward")
+    assert not lexicon.is_concept("Painlevel")
+    assert lexicon.is_concept("Patient")
+    assert lexicon.infer_data_type("dosage") == "decimal"
+    # Built-in rules still apply
+    assert lexicon.infer_data_type("patientId") == "int"
+
+    path.write_text(json.dumps({"synonyms": ["x"]}))
+    try:
+        Lexicon.from_files([str(path)])
+        assert False, "unknown keys must be rejected"
+    except ValueError as e:
+        assert "synonyms" in str(e)
+
+
+def test_shared_lexicon_from_env(tmp_path, monkeypatch):
+    path = tmp_path / "library.json"
+    path.write_text(json.dumps({"stopwords": ["loan"]}))
+    segments = [Segment(segment_id="S1", text="REQ-1 Only the librarian shall approve each loan.", label="REQ")]
+
+    monkeypatch.setenv("REQUIREMENTS_LEXICON", str(path))
+    set_lexicon(None)
+    try:
+        assert "loan" in get_lexicon().stopwords
+        assert list(extract_candidate_classes(segments)) == ["Librarian"]
+    finally:
+        set_lexicon(None)
+        monkeypatch.delenv("REQUIREMENTS_LEXICON")
+    assert sorted(extract_candidate_classes(segments)) == ["Librarian", "Loan"]
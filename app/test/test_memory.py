@@ -0,0 +1,35 @@
+# test_memory.py
+import importlib.util
+from pathlib import Path
+
+_spec = importlib.util.spec_from_file_location(
+    "bench_memory", Path(__file__).resolve().parents[2] / "bench" / "memory.py"
+)
+memory = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(memory)
+
+
+def test_every_stage_is_measured(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("REQ-1 The customer shall place an order.\nDEF An Order has an orderDate and a status.\n")
+
+    with memory.RssSampler(interval_ms=1) as sampler:
+        stats = memory.measure(str(path), sampler)
+
+    assert tuple(stats) == memory.STAGES
+    for figures in stats.values():
+        assert figures["peak"] >= figures["retained"]
+        assert figures["rss_peak"] >= 0
+    assert stats["segment"]["retained"] > 0 and stats["assemble"]["retained"] > 0
+
+
+def test_regressions_are_reported_per_stage():
+    baseline = {"doc": {"segment": {"peak": 10_000_000, "retained": 4_000_000, "rss_peak": 1}}}
+    within = {"doc": {"segment": {"peak": 11_000_000, "retained": 4_000_000, "rss_peak": 10_000_000},
+                      "relations": {"peak": 99_000_000, "retained": 0, "rss_peak": 0}}}
+    assert memory.compare(within, baseline, margin=0.2) == []
+
+    grown = {"doc": {"segment": {"peak": 13_000_000, "retained": 4_000_000, "rss_peak": 10_000_000}}}
+    problems = memory.compare(grown, baseline, margin=0.2)
+    assert len(problems) == 1 and "segment: peak" in problems[0]
+    assert len(memory.compare(within, baseline, margin=0.2, check_rss=True)) == 1
@@ -0,0 +1,72 @@
+# test_model_store.py
+import pytest
+
+from app.filter import segment_text
+from app.model_builder import build_domain_model
+from app.model_store import ModelStore
+
+TEXT = "REQ-1 A customer shall be able to save an order.\nREQ-2 The customer email shall be unique."
+
+
+def _model(doc_id, classes, relations=()):
+    return {
+        "metadata": {"doc_id": doc_id, "created_at": "2024-01-01T00:00:00+00:00", "version": "0.1"},
+        "segments": [{"segment_id": "S1", "label": "REQ", "text": "Ünïcode text", "source": {"page": 1, "section": ""}}],
+        "classes": [
+            {"name": name, "attributes": [{"name": a, "type": "String", "source_segments": ["S1"]} for a in attrs],
+             "source_segments": ["S1"]}
+            for name, attrs in classes
+        ],
+        "relations": [
+            {"source": s, "target": t, "label": "has", "type": "association",
+             "cardinality": {"source": "1", "target": "0..*"}, "source_segments": ["S1"]}
+            for s, t in relations
+        ],
+        "quality": {"num_classes": len(classes)},
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ModelStore(str(tmp_path / "models.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_round_trip_of_a_built_model(store):
+    model = build_domain_model("srs", segment_text(TEXT))
+    store.save(model)
+    assert store.get("srs") == model
+
+
+def test_class_and_attribute_lookup_is_case_insensitive(store):
+    store.save_many([
+        _model("a", [("Customer", ["email"]), ("Order", [])]),
+        _model("b", [("Customer", ["name"])]),
+        _model("c", [("Invoice", ["email"])]),
+    ])
+    assert [r["doc_id"] for r in store.find_documents("customer")] == ["a", "b"]
+    assert [r["doc_id"] for r in store.find_documents("Customer", "EMAIL")] == ["a"]
+    assert store.find_documents("Product") == []
+
+
+def test_relation_lookup_by_endpoints(store):
+    store.save_many([
+        _model("a", [("Customer", []), ("Order", [])], [("Customer", "Order")]),
+        _model("b", [("Order", []), ("Invoice", [])], [("Order", "Invoice")]),
+    ])
+    assert [r["doc_id"] for r in store.find_relations(source="order")] == ["b"]
+    assert [r["doc_id"] for r in store.find_relations(target="Order")] == ["a"]
+    with pytest.raises(ValueError):
+        store.find_relations()
+
+
+def test_saving_again_replaces_and_delete_cascades(store):
+    store.save(_model("a", [("Customer", ["email"])]))
+    store.save(_model("a", [("Order", [])]))
+    assert store.find_documents("Customer") == []
+    assert store.stats()["models"] == 1
+
+    assert store.delete("a") is True
+    assert store.stats() == {"models": 0, "classes": 0, "attributes": 0, "relations": 0, "segments": 0}
+    assert store.get("a") is None
@@ -0,0 +1,80 @@
+# test_partition.py
+import itertools
+import threading
+
+import requests
+
+from app import miro_client
+from app.miro_visualizer import visualize_domain_model
+from app.partition import connected_components, louvain_communities, partition_classes
+
+
+def _clique(prefix, size):
+    names = [f"{prefix}{i}" for i in range(size)]
+    return names, [{"source": a, "target": b, "label": "has"} for a, b in itertools.combinations(names, 2)]
+
+
+def _model(names, relations):
+    return {"classes": [{"name": n, "attributes": []} for n in names], "relations": relations}
+
+
+def test_connected_components():
+    assert connected_components(["A", "B", "C", "D"], [("A", "C")]) == [["A", "C"], ["B"], ["D"]]
+
+
+def test_louvain_splits_two_cliques_joined_by_one_edge():
+    a, rel_a = _clique("A", 6)
+    b, rel_b = _clique("B", 6)
+    edges = {tuple(sorted((r["source"], r["target"]))): 1.0 for r in rel_a + rel_b}
+    edges[("A0", "B0")] = 1.0
+    assert louvain_communities(a + b, edges) == [a, b]
+
+
+def test_partition_bounds_frame_size_and_packs_small_clusters():
+    a, rel_a = _clique("A", 6)
+    b, rel_b = _clique("B", 6)
+    names = a + b + ["Lonely1", "Lonely2"]
+    clusters = partition_classes(_model(names, rel_a + rel_b + [{"source": "A0", "target": "B0"}]), max_size=8)
+
+    assert sorted(n for c in clusters for n in c) == sorted(names)
+    assert all(len(c) <= 8 for c in clusters)
+    assert clusters == [a + ["Lonely1", "Lonely2"], b]
+
+
+def test_large_model_is_written_in_frames(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    class Response:
+        status_code = 200
+
+        def __init__(self, item_id):
+            self.item_id = item_id
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"id": self.item_id, "data": {}}
+
+    def fake_post(url, json=None, **kwargs):
+        with lock:
+            calls.append((url.rsplit("/", 1)[-1], json))
+            return Response(str(len(calls)))
+
+    monkeypatch.setenv("MIRO_API_TOKEN", "test")
+    monkeypatch.setattr(requests, "post", fake_post)
+    monkeypatch.setattr(miro_client, "_rate_limiter", miro_client.RateLimiter(rate=1e6, burst=1000))
+
+    a, rel_a = _clique("A", 5)
+    b, rel_b = _clique("B", 5)
+    between = {"source": "A0", "target": "B0", "label": "uses"}
+    result = visualize_domain_model("board", _model(a + b, rel_a + rel_b + [between]), frame_size=5, workers=2)
+
+    assert result["summary"] == {"classes_created": 10, "relations_created": 21, "frames_created": 2}
+    kinds = [kind for kind, _ in calls]
+    assert kinds.count("frames") == 2 and kinds.count("shapes") == 10
+    assert all(payload["parent"]["id"] for kind, payload in calls if kind == "shapes")
+    # Boxes before connectors, and the connector between frames last
+    assert kinds.index("connectors") > max(i for i, k in enumerate(kinds) if k == "shapes")
+    assert {"content": "uses", "position": "50%"} in calls[-1][1]["captions"]
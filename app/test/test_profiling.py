@@ -0,0 +1,85 @@
+# test_profiling.py
+import pstats
+import time
+
+from app.extract import extract_relations
+from app.filter import segment_text
+from app.profiling import SamplingProfiler, get_profile, list_profiles, parse_mode, profile_call, profile_path
+
+
+TEXT = """REQ-1 Each customer must place one or more orders.
+REQ-2 The customer shall be able to save addresses.
+REQ-3 Each order must be delivered to exactly one address."""
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+
+def test_parse_mode():
+    assert parse_mode(None) is None
+    assert parse_mode("off") is None
+    assert parse_mode("1") == "cprofile"
+    assert parse_mode(" Sample ") == "sample"
+    try:
+        parse_mode("perf")
+        assert False, "unknown profilers must be rejected"
+    except ValueError:
+        pass
+
+
+def test_cprofile_attributes_relation_patterns(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    segments = segment_text(TEXT)
+
+    rels, summary = profile_call("cprofile", extract_relations, segments, {"Customer", "Order", "Address"},
+                                 label="doc-1")
+
+    assert rels == extract_relations(segments, {"Customer", "Order", "Address"})
+    assert summary["mode"] == "cprofile" and summary["label"] == "doc-1"
+    path = profile_path(summary["profile_id"])
+    assert path.suffix == ".prof"
+    functions = {func for _, _, func in pstats.Stats(str(path)).stats}
+    for pattern in ("_match_must_verb", "_match_direct_verbs", "_match_able_to", "_match_passive"):
+        assert pattern in functions
+    assert get_profile(summary["profile_id"])["top"]
+    assert get_profile("../../etc/passwd") is None
+
+
+def test_sampling_profiler_limits(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PROFILE_SAMPLE_INTERVAL_MS", "1")
+    monkeypatch.setenv("PROFILE_MAX_SAMPLES", "20")
+
+    result, summary = profile_call("sample", _busy, 0.3)
+
+    assert result > 0
+    assert summary["samples"] == 20 and summary["truncated"]
+    assert any("_busy" in row["function"] for row in summary["top"])
+    folded = profile_path(summary["profile_id"]).read_text()
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in folded.splitlines()) == 20
+
+    profiler = SamplingProfiler(interval_ms=0.01)
+    assert profiler.interval == 0.001
+
+
+def test_failed_runs_are_profiled_and_old_profiles_pruned(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PROFILE_MAX_FILES", "2")
+
+    try:
+        profile_call("cprofile", int, "not a number")
+        assert False, "the error must propagate"
+    except ValueError:
+        pass
+    profiles = list_profiles()
+    assert len(profiles) == 1 and profiles[0]["failed"]
+
+    for _ in range(3):
+        profile_call("cprofile", len, "abc")
+    assert len(list_profiles()) == 2
+    assert len(list(tmp_path.iterdir())) == 4
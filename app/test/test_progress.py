@@ -0,0 +1,33 @@
+# test_progress.py
+from app.pipeline import analyze_text
+from app.progress import STAGES, PipelineCancelled, overall_progress
+
+TEXT = (
+    "REQ-1 The system shall allow a customer to place an order.\n"
+    "REQ-2 Each order shall contain one or more order items.\n"
+    "DEF A customer is a person who has a customerId and a name.\n"
+)
+
+
+def test_pipeline_emits_stage_events_in_order():
+    events = []
+    analyze_text("doc", TEXT, events.append)
+
+    stages = [e.stage for e in events]
+    assert stages[0] == "segment"
+    assert stages[-1] == "relations"
+    values = [overall_progress(e) for e in events]
+    assert values == sorted(values)
+    assert max(values) <= len(STAGES)
+
+
+def test_callback_can_cancel_pipeline():
+    def cancel_at_classes(event):
+        if event.stage == "classes":
+            raise PipelineCancelled()
+
+    try:
+        analyze_text("doc", TEXT, cancel_at_classes)
+        assert False, "expected PipelineCancelled"
+    except PipelineCancelled:
+        pass
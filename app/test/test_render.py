@@ -0,0 +1,51 @@
+# test_render.py
+import io
+import xml.etree.ElementTree as ET
+
+from app.render import box_geometry, render, render_to_file
+
+MODEL = {
+    "metadata": {"doc_id": "doc"},
+    "classes": [
+        {"name": "Customer", "attributes": [{"name": "email", "type": "String"}]},
+        {"name": "Order Item", "attributes": [{"name": "quantity", "type": "Integer"}]},
+    ],
+    "relations": [
+        {"source": "Customer", "target": "Order Item", "label": "orders",
+         "cardinality": {"source": "1", "target": "0..*"}},
+    ],
+}
+
+
+def _render(fmt):
+    out = io.StringIO()
+    render(MODEL, fmt, out)
+    return out.getvalue()
+
+
+def test_svg_is_well_formed_and_contains_every_class():
+    root = ET.fromstring(_render("svg").split("\n", 1)[1])
+    texts = [t.text for t in root.iter("{http://www.w3.org/2000/svg}text")]
+    assert {"Customer", "Order Item", "- email: String", "orders", "0..*"} <= set(texts)
+
+
+def test_boxes_do_not_overlap():
+    geometry, spacing = box_geometry(MODEL)
+    (x1, _, w1, _), (x2, _, w2, _) = geometry["Customer"], geometry["Order Item"]
+    assert abs(x2 - x1) >= (w1 + w2) / 2
+
+
+def test_plantuml_and_mermaid_quote_names_with_spaces():
+    plantuml = _render("plantuml")
+    assert plantuml.startswith("@startuml") and plantuml.rstrip().endswith("@enduml")
+    assert 'class "Order Item" as Order_Item {' in plantuml
+    assert 'Customer "1" --> "0..*" Order_Item : orders' in plantuml
+
+    mermaid = _render("mermaid")
+    assert mermaid.startswith("classDiagram")
+    assert "-Integer quantity" in mermaid
+
+
+def test_render_to_file_infers_format(tmp_path):
+    assert render_to_file(MODEL, str(tmp_path / "model.puml")) == "plantuml"
+    assert (tmp_path / "model.puml").read_text(encoding="utf-8").startswith("@startuml")
@@ -0,0 +1,118 @@
+# test_sections.py
+import json
+
+from docx import Document
+from fastapi.testclient import TestClient
+
+from app.file_processor import extract_text_from_file
+from app.filter import StreamingSegmenter, segment_text
+from app.main import app
+from app.pipeline import analyze_text
+from app.sections import parse_heading, section_index, select_sections
+
+
+TEXT = """[Page 1]
+1. INTRODUCTION
+This document describes the shop.
+2. DEFINITIONS
+DEF A Customer is a person with a name and an email.
+3 Functional Requirements
+3.1 Orders
+REQ-1 Each customer must place one or more orders.
+3.2 Payments
+REQ-2 Each payment must reference exactly one order.
+[Page 2]
+4. Constraints
+CON The email must be unique."""
+
+
+def test_headings_are_told_apart_from_body_text():
+    assert parse_heading("3.2 Order Management").number == "3.2"
+    assert parse_heading("2. DEFINITIONS").level == 1
+    assert parse_heading("## Payments").title == "Payments"
+    for line in ("1. The system shall send an email.", "3.2 Orders ........ 14", "2 customers per order",
+                 "REQ-1 Orders", "Version 1.0"):
+        assert parse_heading(line) is None, line
+
+
+def test_segments_carry_page_and_section_path():
+    segments = segment_text(TEXT)
+    by_text = {s.text: s for s in segments}
+
+    assert by_text["REQ-1 Each customer must place one or more orders."].section == "3 Functional Requirements > 3.1 Orders"
+    assert by_text["CON The email must be unique."].section == "4. Constraints"
+    assert by_text["CON The email must be unique."].page == 2
+    assert by_text["This document describes the shop."].page == 1
+
+    streaming = StreamingSegmenter()
+    for i in range(0, len(TEXT), 7):
+        streaming.feed(TEXT[i:i + 7])
+    assert streaming.close() == segments
+
+
+def test_section_index_and_selection():
+    segments = segment_text(TEXT)
+    index = {entry["number"]: entry for entry in section_index(segments)}
+
+    assert set(index) == {"1", "2", "3", "3.1", "3.2", "4"}
+    assert index["3.1"]["parent"] == "3 Functional Requirements"
+    assert (index["3"]["first_segment"], index["3"]["last_segment"]) == ("S6", "S11")
+    assert index["3"]["num_segments"] == 6 and index["3.2"]["level"] == 2
+
+    chapter = select_sections(segments, ["3"])
+    assert [s.segment_id for s in chapter] == ["S6", "S7", "S8", "S9", "S10", "S11"]
+    assert [s.segment_id for s in select_sections(segments, ["payments", "4."])] == ["S9", "S10", "S11", "S12", "S13"]
+
+
+def test_pipeline_extracts_only_selected_sections():
+    model = analyze_text("doc-1", TEXT, sections=["3.1"])
+
+    assert [s["segment_id"] for s in model["segments"]] == ["S7", "S8"]
+    assert model["classes"] == []
+    assert model["metadata"]["selected_sections"] == ["3.1"]
+    assert model["sections"][0]["section"] == "3 Functional Requirements > 3.1 Orders"
+
+    model = analyze_text("doc-1", TEXT, sections=["Definitions"])
+    assert [c["name"] for c in model["classes"]] == ["Customer"]
+
+
+def test_stream_endpoint_honours_section_selection():
+    response = TestClient(app).post("/process/stream", json={
+        "doc_id": "doc-1", "text": TEXT, "sections": ["Definitions"], "canonical": True})
+
+    events = [block.split("\n", 1) for block in response.text.strip().split("\n\n")]
+    kind, data = events[-1]
+    model = json.loads(data[len("data: "):])
+    assert kind == "event: result"
+    assert model["metadata"]["selected_sections"] == ["Definitions"]
+    assert [c["name"] for c in model["classes"]] == ["Customer"]
+    assert "created_at" not in model["metadata"]
+
+
+def test_docx_heading_styles(tmp_path):
+    doc = Document()
+    doc.add_heading("Ordering", level=1)
+    doc.add_paragraph("REQ-1 Each customer must place one or more orders.")
+    doc.add_heading("Payment Rules", level=2)
+    doc.add_paragraph("REQ-2 Each payment must reference exactly one order.")
+    path = tmp_path / "spec.docx"
+    doc.save(path)
+
+    segments = segment_text(extract_text_from_file(str(path)))
+
+    assert [s.text for s in segments][0] == "Ordering"
+    assert segments[-1].section == "Ordering > Payment Rules"
+    assert [e["level"] for e in section_index(segments)] == [1, 2]
+
+
+def test_docx_title_is_a_top_level_heading(tmp_path):
+    doc = Document()
+    doc.add_heading("Shop Specification", level=0)
+    doc.add_paragraph("REQ-1 Each customer must place one or more orders.")
+    path = tmp_path / "spec.docx"
+    doc.save(path)
+
+    segments = segment_text(extract_text_from_file(str(path)))
+
+    assert segments[-1].section == "Shop Specification"
+    assert [e["level"] for e in section_index(segments)] == [1]
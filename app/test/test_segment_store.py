@@ -0,0 +1,79 @@
+# test_segment_store.py
+import pickle
+
+import numpy as np
+
+from app.filter import Segment, filter_relevant_segments, segment_text
+from app.model_builder import build_domain_model
+from app.segment_store import SegmentColumns
+
+
+TEXT = """Online Shop Requirements
+REQ-1 The system shall allow a customer to place an order.
+DEF An Order is a purchase request with orderDate, status and total.
+DEF A Customer is a person with email, name and address.
+The shop opens in 2025.
+CON Each email must be unique."""
+
+
+def _segments():
+    segments = segment_text(TEXT)
+    segments.append(Segment(segment_id="X-1", label="NOTE", text="Größe ✓ – ünïcödé", page=3, section="Anhang"))
+    return segments
+
+
+def test_round_trip_and_indexing():
+    segments = _segments()
+    columns = SegmentColumns.from_segments(iter(segments))
+
+    assert len(columns) == len(segments)
+    assert list(columns) == segments
+    assert columns[0] == segments[0]
+    assert columns[-1] == segments[-1]
+    assert list(columns.texts()) == [s.text for s in segments]
+    assert list(columns[::2]) == segments[::2]
+    assert list(columns[[4, 0, 2]]) == [segments[4], segments[0], segments[2]]
+    assert list(columns[3:3]) == []
+    assert columns.label_counts()["NOTE"] == 1
+    try:
+        columns[len(segments)]
+        assert False, "out of range index must raise"
+    except IndexError:
+        pass
+
+
+def test_slices_are_views_and_pickle_compactly():
+    segments = _segments()
+    columns = SegmentColumns.from_segments(segments)
+    window = columns[2:5]
+
+    assert list(window) == segments[2:5]
+    assert np.shares_memory(window._text, columns._text)
+    assert np.shares_memory(window._text_offsets, columns._text_offsets)
+
+    restored = pickle.loads(pickle.dumps(window))
+    assert list(restored) == segments[2:5]
+    assert restored._text.nbytes == sum(len(s.text.encode("utf-8")) for s in segments[2:5])
+
+
+def test_save_and_memory_mapped_load(tmp_path):
+    segments = _segments()
+    SegmentColumns.from_segments(segments)[1:].save(tmp_path / "corpus")
+
+    loaded = SegmentColumns.load(tmp_path / "corpus")
+    assert isinstance(loaded._text, np.memmap)
+    assert list(loaded) == segments[1:]
+    assert list(loaded.where(labels=["DEF"])) == [s for s in segments if s.label == "DEF"]
+    assert list(pickle.loads(pickle.dumps(loaded[:2]))) == segments[1:3]
+
+
+def test_pipeline_accepts_columns():
+    segments = _segments()
+    columns = SegmentColumns.from_segments(segments)
+
+    assert filter_relevant_segments(columns) == filter_relevant_segments(segments)
+
+    expected = build_domain_model("doc", segments)
+    model = build_domain_model("doc", columns)
+    for key in ("segments", "classes", "relations", "quality"):
+        assert model[key] == expected[key]
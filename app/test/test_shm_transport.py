@@ -0,0 +1,44 @@
+# test_shm_transport.py
+import pickle
+
+from app.extract import extract_candidate_classes
+from app.filter import segment_text
+from app.model_builder import build_domain_model
+from app.shm_transport import SharedSegments, extract_range, parallel_build_domain_model, split_ranges
+
+
+TEXT = """REQ-1 Each customer must place one or more orders.
+DEF An Order has an orderDate and a status.
+REQ-2 The customer shall be able to save addresses.
+REQ-3 Each order must be delivered to exactly one address."""
+
+
+def _without_timestamp(model):
+    model["metadata"].pop("created_at")
+    return model
+
+
+def test_split_ranges():
+    assert split_ranges(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert split_ranges(2, 8) == [(0, 1), (1, 2)]
+    assert split_ranges(0, 4) == []
+
+
+def test_handle_size_is_independent_of_document_size():
+    small = segment_text(TEXT)
+    large = segment_text("\n".join([TEXT] * 200))
+    with SharedSegments(small) as a, SharedSegments(large) as b:
+        assert abs(len(pickle.dumps(a.handle)) - len(pickle.dumps(b.handle))) < 16
+        assert len(pickle.dumps(b.handle)) < len(pickle.dumps(large)) // 100
+
+        classes, attributes = extract_range(b.handle, 0, len(large))
+        assert {name for name, _ in classes} == set(extract_candidate_classes(large))
+        assert all(0 <= position < len(large) for *_, position in attributes)
+
+
+def test_inline_and_pooled_builds_match_sequential_build():
+    segments = segment_text(TEXT)
+    expected = _without_timestamp(build_domain_model("doc-1", segments))
+
+    assert _without_timestamp(parallel_build_domain_model("doc-1", segments, workers=0, chunks=3)) == expected
+    assert _without_timestamp(parallel_build_domain_model("doc-1", segments, workers=1, chunks=2)) == expected
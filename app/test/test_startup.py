@@ -0,0 +1,18 @@
+# test_startup.py
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+_spec = importlib.util.spec_from_file_location(
+    "bench_startup", Path(__file__).resolve().parents[2] / "bench" / "startup.py"
+)
+startup = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(startup)
+
+
+@pytest.mark.parametrize("entry", sorted(startup.ENTRY_POINTS))
+def test_startup_stays_within_budget(entry):
+    # Absolute budget (STARTUP_BUDGET_MS, default 150 ms), framework-relative budget and heavy-import check
+    result = startup.measure(entry, repeat=2)
+    assert startup.check(result) == []
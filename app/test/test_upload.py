@@ -0,0 +1,43 @@
+# test_upload.py
+from app.file_processor import detect_file_type
+from app.filter import StreamingSegmenter, segment_text
+from app.upload import UploadSpool, UploadTooLarge
+
+TEXT = (
+    "REQ-1 The system shall allow a customer to place an order.\r\n"
+    "REQ-2 Each order shall contain one or more order items.\n\n"
+    "DEF A customer is a person who has a customerId and a name.\r"
+    "CON The customerId must be unique."
+)
+
+
+def test_streaming_segmenter_matches_segment_text():
+    for chunk_size in (1, 3, 7, 64):
+        segmenter = StreamingSegmenter()
+        for i in range(0, len(TEXT), chunk_size):
+            segmenter.feed(TEXT[i:i + chunk_size])
+        assert segmenter.close() == segment_text(TEXT)
+
+
+def test_detect_file_type():
+    assert detect_file_type(b"%PDF-1.7\n") == ".pdf"
+    assert detect_file_type(b"PK\x03\x04\x14\x00") == ".docx"
+    assert detect_file_type(b"REQ-1 The") == ".txt"
+
+
+def test_spool_hash_and_limit():
+    data = TEXT.encode("utf-8")
+    spool = UploadSpool(max_bytes=len(data))
+    for i in range(0, len(data), 5):
+        spool.write(data[i:i + 5])
+    text, segments = spool.finish()
+    assert spool.file_type == ".txt"
+    assert text == TEXT
+    assert segments == segment_text(TEXT)
+
+    spool = UploadSpool(max_bytes=10)
+    try:
+        spool.write(data)
+        assert False, "expected UploadTooLarge"
+    except UploadTooLarge:
+        pass
@@ -0,0 +1,89 @@
+# test_visualization_plan.py
+import requests
+
+from app import miro_client
+from app.miro_client import RateLimiter
+from app.miro_visualizer import execute_plan, plan_visualization, visualize_domain_model
+from app.model_schema import validate_domain_model
+from app.pipeline import analyze_text
+
+
+MODEL = {
+    "classes": [{"name": "Customer", "attributes": [{"name": "email", "type": "String"}]},
+                {"name": "Order", "attributes": []},
+                {"name": "Product", "attributes": []}],
+    "relations": [{"source": "Customer", "target": "Order", "label": "places",
+                   "cardinality": {"source": "1", "target": "0..*"}},
+                  {"source": "Order", "target": "Invoice", "label": "has"}],
+}
+
+
+def _fake_miro(monkeypatch):
+    calls = []
+
+    class Response:
+        status_code = 200
+
+        def __init__(self, item_id):
+            self.item_id = item_id
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"id": self.item_id, "data": {}}
+
+    def fake_post(url, json=None, **kwargs):
+        calls.append((url.rsplit("/", 1)[-1], json))
+        return Response(f"item{len(calls)}")
+
+    monkeypatch.setenv("MIRO_API_TOKEN", "test")
+    monkeypatch.setattr(requests, "post", fake_post)
+    monkeypatch.setattr(miro_client, "_rate_limiter", RateLimiter(rate=1e6, burst=1000))
+    return calls
+
+
+def test_built_models_match_the_schema():
+    model = analyze_text("doc-1", "DEF A Customer is a person with a name and an email.")
+    assert validate_domain_model(model) == []
+    assert validate_domain_model({"relations": []}) == ["(root): 'classes' is a required property"]
+
+
+def test_plan_counts_calls_and_reports_dangling_relations():
+    plan = plan_visualization(MODEL, rate_limiter=RateLimiter(rate=2, burst=1))
+
+    assert plan.summary()["calls"] == {"frames": 0, "shapes": 3, "connectors": 1, "total": 4}
+    assert plan.dangling == [{"relation": 1, "source": "Order", "target": "Invoice", "label": "has",
+                              "missing": ["target"]}]
+    assert plan.estimated_seconds == 1.5
+    assert plan.boxes[0].payload["data"]["content"].startswith("<p><strong>Customer</strong></p>")
+
+
+def test_invalid_model_is_rejected_before_any_call(monkeypatch):
+    calls = _fake_miro(monkeypatch)
+    broken = {**MODEL, "relations": MODEL["relations"] + [{"source": "Customer", "label": "owns"}],
+              "classes": MODEL["classes"] + [{"name": "Order", "attributes": [{"name": 5}]}]}
+
+    plan = plan_visualization(broken)
+    assert plan.errors == ["classes/3/attributes/0/name: 5 is not of type 'string'",
+                           "relations/2: 'target' is a required property"]
+    assert not plan.boxes and plan.calls == 0
+    try:
+        visualize_domain_model("board", broken)
+        assert False, "an invalid model must not be visualized"
+    except ValueError as e:
+        assert "relations/2" in str(e)
+    assert calls == []
+
+
+def test_execution_replays_the_plan(monkeypatch):
+    calls = _fake_miro(monkeypatch)
+    plan = plan_visualization(MODEL)
+
+    result = execute_plan("board", plan)
+
+    assert [kind for kind, _ in calls] == ["shapes"] * 3 + ["connectors"]
+    assert [payload for _, payload in calls[:3]] == [box.payload for box in plan.boxes]
+    assert calls[3][1] == {"startItem": {"id": "item1"}, "endItem": {"id": "item2"}, **plan.connectors[0].payload}
+    assert result["summary"] == {"classes_created": 3, "relations_created": 1}
+    assert result["dangling_relations"][0]["target"] == "Invoice"
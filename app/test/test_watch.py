@@ -0,0 +1,60 @@
+# test_watch.py
+import json
+import os
+
+from app.watch import STATE_FILE, Watcher
+
+TEXT = "REQ-1 A customer shall be able to place an order."
+
+
+def _events(watcher, now):
+    return {e["file"]: e["event"] for e in watcher.poll(now=now)}
+
+
+def test_builds_only_changed_files(tmp_path):
+    src, out = tmp_path / "in", tmp_path / "out"
+    src.mkdir()
+    (src / "a.txt").write_text(TEXT, encoding="utf-8")
+    watcher = Watcher(str(src), str(out), debounce=0)
+
+    assert _events(watcher, 0) == {"a.txt": "built"}
+    model = json.loads((out / "a.txt.json").read_text(encoding="utf-8"))
+    assert model["metadata"]["doc_id"] == "a.txt"
+    assert _events(watcher, 1) == {}
+
+    # Touched without a content change: hashed, not rebuilt
+    stat = os.stat(src / "a.txt")
+    os.utime(src / "a.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert _events(watcher, 2) == {"a.txt": "unchanged"}
+
+    (src / "a.txt").write_text(TEXT + "\nREQ-2 An order shall contain a product.", encoding="utf-8")
+    assert _events(watcher, 3) == {"a.txt": "built"}
+
+    (src / "a.txt").unlink()
+    assert _events(watcher, 4) == {"a.txt": "deleted"}
+    assert not (out / "a.txt.json").exists()
+
+
+def test_burst_of_saves_is_debounced(tmp_path):
+    src, out = tmp_path / "in", tmp_path / "out"
+    src.mkdir()
+    watcher = Watcher(str(src), str(out), debounce=5)
+
+    path = src / "a.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    assert _events(watcher, 0) == {"a.txt": "pending"}
+    path.write_text(TEXT + " Again.", encoding="utf-8")
+    os.utime(path, ns=(0, 10**18))
+    assert _events(watcher, 4) == {"a.txt": "pending"}  # changed again: the timer restarts
+    assert _events(watcher, 8) == {"a.txt": "pending"}
+    assert _events(watcher, 9) == {"a.txt": "built"}
+
+
+def test_state_survives_restart(tmp_path):
+    src, out = tmp_path / "in", tmp_path / "out"
+    src.mkdir()
+    (src / "a.txt").write_text(TEXT, encoding="utf-8")
+    Watcher(str(src), str(out), debounce=0).poll(now=0)
+
+    assert (out / STATE_FILE).exists()
+    assert Watcher(str(src), str(out), debounce=0).poll(now=0) == []
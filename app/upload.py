@@ -0,0 +1,188 @@
+"""
+Streaming multipart uploads for the API.
+
+The upload is spooled to a bounded temporary file while its SHA-256 is
+computed on the fly. The document type is sniffed from the magic bytes, and
+plain text is segmented while the upload is still arriving. DOCX and PDF need
+their trailing structures (zip central directory, xref table) and are
+extracted once the stream completes.
+"""
+from __future__ import annotations
+
+import codecs
+import hashlib
+import tempfile
+from typing import List, Optional
+
+from app.file_processor import SNIFF_BYTES, decode_text, detect_file_type, extract_text_from_stream
+from app.filter import Segment, StreamingSegmenter, segment_text
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+
+DEFAULT_MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+# Uploads larger than this are moved from memory to a temp file on disk
+SPOOL_MEMORY_BYTES = 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """Raised while streaming once an upload exceeds its size limit"""
+
+
+class UploadSpool:
+    """
+    Receives an upload chunk by chunk.
+    Keeps a bounded spooled copy, the running SHA-256, the sniffed file type
+    and, for plain text, the segments produced so far.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_UPLOAD_BYTES, doc_id: str = "doc"):
+        self.max_bytes = max_bytes
+        self.doc_id = doc_id
+        self.size = 0
+        self.file_type: Optional[str] = None
+        self.file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+        self._sha256 = hashlib.sha256()
+        self._head = b""
+        self._decoder = None
+        self._segmenter: Optional[StreamingSegmenter] = None
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    def write(self, data: bytes):
+        if not data:
+            return
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds limit of {self.max_bytes} bytes")
+
+        self._sha256.update(data)
+        self.file.write(data)
+
+        if self.file_type is None:
+            self._head += data
+            if len(self._head) >= SNIFF_BYTES:
+                self._sniff()
+        elif self._segmenter is not None:
+            self._feed_text(data)
+
+    def finish(self) -> tuple[str, List[Segment]]:
+        """
+        Complete the upload and return (text, segments).
+        For text uploads most segments already exist at this point.
+        """
+        if self.size == 0:
+            raise ValueError("Uploaded file is empty")
+        if self.file_type is None:
+            self._sniff()
+
+        if self._segmenter is not None:
+            try:
+                tail = self._decoder.decode(b"", final=True)
+                self._segmenter.feed(tail)
+                segments = self._segmenter.close()
+                self.file.seek(0)
+                return self.file.read().decode("utf-8"), segments
+            except UnicodeDecodeError:
+                # Not UTF-8 after all: fall back the same way extract_from_txt() does
+                self._segmenter = None
+
+        if self.file_type == ".txt":
+            self.file.seek(0)
+            text = decode_text(self.file.read())
+        else:
+            text = extract_text_from_stream(self.file, self.file_type)
+        return text, segment_text(text, doc_id=self.doc_id)
+
+    def close(self):
+        self.file.close()
+
+    def _sniff(self):
+        self.file_type = detect_file_type(self._head)
+        if self.file_type == ".txt":
+            self._decoder = codecs.getincrementaldecoder("utf-8")()
+            self._segmenter = StreamingSegmenter(doc_id=self.doc_id)
+            self._feed_text(self._head)
+        self._head = b""
+
+    def _feed_text(self, data: bytes):
+        try:
+            self._segmenter.feed(self._decoder.decode(data))
+        except UnicodeDecodeError:
+            # Decoded again as latin-1 in finish(); stop segmenting incrementally
+            self._segmenter = None
+
+
+async def receive_multipart_upload(request, spool: UploadSpool, field_name: str = "file") -> Optional[str]:
+    """
+    Stream a multipart/form-data request body into the spool.
+    Only the part named `field_name` is kept; other form fields are ignored.
+
+    Returns:
+        The client-supplied filename of the file part (None if it sent none)
+
+    Raises:
+        ValueError: If the request is not multipart/form-data or lacks the file part
+        UploadTooLarge: As soon as the part exceeds the spool's limit
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise ValueError("Expected a multipart/form-data request with a boundary")
+
+    state = {"header_field": b"", "header_value": b"", "headers": {}, "active": False,
+             "found": False, "filename": None}
+
+    def on_part_begin():
+        state["headers"] = {}
+
+    def on_header_field(data: bytes, start: int, end: int):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["header_field"].lower()] = state["header_value"]
+        state["header_field"] = b""
+        state["header_value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = disposition.get(b"name", b"").decode("latin-1")
+        state["active"] = name == field_name and not state["found"]
+        if state["active"]:
+            state["found"] = True
+            filename = disposition.get(b"filename")
+            state["filename"] = filename.decode("utf-8", "replace") if filename is not None else None
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if state["active"]:
+            spool.write(data[start:end])
+
+    def on_part_end():
+        state["active"] = False
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    async for chunk in request.stream():
+        if chunk:
+            parser.write(chunk)
+    parser.finalize()
+
+    if not state["found"]:
+        raise ValueError(f"Missing form field '{field_name}'")
+    return state["filename"]
@@ -0,0 +1,196 @@
+"""
+Watch a directory of requirement documents and rebuild models on change.
+
+Polls the input directory (a stat per file, so unchanged files cost
+nothing), and re-runs extract_text_from_file -> segment_text ->
+build_domain_model only for files whose modification time or size changed
+and whose content hash differs from the last build. A file must be stable
+for `debounce` seconds before it is processed, so a burst of saves leads to
+one rebuild. Models are written atomically as <output>/<relative path>.json;
+the watch state is kept next to them so restarts do not reprocess anything.
+
+Run with:
+    python -m app.watch data/input --out data/output
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.corpus import iter_corpus_files
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = ".watch_state.json"
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_atomic(path: Path, text: str):
+    """Write via a temporary file in the same directory and os.replace(), so readers never see partial output"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def build_model(path: str, doc_id: str) -> Dict:
+    from app.file_processor import extract_text_from_file
+    from app.filter import segment_text
+    from app.model_builder import build_domain_model
+
+    text = extract_text_from_file(path)
+    segments = segment_text(text, doc_id=doc_id)
+    return build_domain_model(doc_id, segments)
+
+
+class Watcher:
+    """
+    Args:
+        input_dir: Directory with .pdf / .docx / .txt sources (searched recursively)
+        output_dir: Where <relative path>.json models and the watch state are written
+        debounce: Seconds a changed file must stay unchanged before it is processed
+    """
+
+    def __init__(self, input_dir: str, output_dir: str, debounce: float = 0.5):
+        self.input_dir = Path(input_dir)
+        self.output_dir = Path(output_dir)
+        self.debounce = debounce
+        self.state_path = self.output_dir / STATE_FILE
+        self.state: Dict[str, Dict] = self._load_state()
+        # Files seen changing: relative path -> (stat key, monotonic time the key was first seen)
+        self._pending: Dict[str, Tuple[Tuple[int, int], float]] = {}
+
+    def output_path(self, rel_path: str) -> Path:
+        return self.output_dir / f"{rel_path}.json"
+
+    def poll(self, now: Optional[float] = None) -> List[Dict]:
+        """
+        One scan of the input directory. Returns what happened to each file
+        that needed attention: built, unchanged (touched but same content),
+        deleted, failed or pending (waiting for the debounce interval).
+        """
+        now = time.monotonic() if now is None else now
+        events: List[Dict] = []
+        seen = set()
+
+        for path in iter_corpus_files(str(self.input_dir)):
+            rel_path = Path(path).relative_to(self.input_dir).as_posix()
+            seen.add(rel_path)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            key = (stat.st_mtime_ns, stat.st_size)
+
+            known = self.state.get(rel_path)
+            if known and (known["mtime_ns"], known["size"]) == key:
+                self._pending.pop(rel_path, None)
+                continue
+
+            pending = self._pending.get(rel_path)
+            if pending is None or pending[0] != key:
+                self._pending[rel_path] = pending = (key, now)
+            if now - pending[1] < self.debounce:
+                events.append({"file": rel_path, "event": "pending"})
+                continue
+
+            del self._pending[rel_path]
+            events.append(self._process(path, rel_path, key, known))
+
+        for rel_path in sorted(set(self.state) - seen):
+            self.output_path(rel_path).unlink(missing_ok=True)
+            del self.state[rel_path]
+            self._pending.pop(rel_path, None)
+            events.append({"file": rel_path, "event": "deleted"})
+
+        if any(e["event"] != "pending" for e in events):
+            self._save_state()
+        return events
+
+    def run(self, interval: float = 1.0, max_polls: Optional[int] = None):
+        """Poll until interrupted (or for max_polls scans)"""
+        logger.info("Watching %s -> %s", self.input_dir, self.output_dir)
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                for event in self.poll():
+                    if event["event"] != "pending":
+                        logger.info("%s: %s%s", event["file"], event["event"],
+                                    f" ({event['error']})" if "error" in event else "")
+                polls += 1
+                if max_polls is None or polls < max_polls:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            logger.info("Stopped watching")
+
+    def _process(self, path: str, rel_path: str, key: Tuple[int, int], known: Optional[Dict]) -> Dict:
+        entry = {"mtime_ns": key[0], "size": key[1]}
+        try:
+            entry["sha256"] = file_sha256(path)
+        except OSError as e:
+            return {"file": rel_path, "event": "failed", "error": str(e)}
+
+        if known and known.get("sha256") == entry["sha256"]:
+            # Saved without changes: remember the new mtime, keep the existing model
+            self.state[rel_path] = {**known, **entry}
+            return {"file": rel_path, "event": "unchanged"}
+
+        started = time.perf_counter()
+        try:
+            model = build_model(path, rel_path)
+            write_atomic(self.output_path(rel_path), json.dumps(model, indent=2, ensure_ascii=False))
+        except Exception as e:
+            # Remember the hash so a broken file is not retried until it changes again
+            self.state[rel_path] = {**entry, "error": str(e)}
+            return {"file": rel_path, "event": "failed", "error": str(e)}
+
+        self.state[rel_path] = {**entry, "classes": len(model["classes"]), "relations": len(model["relations"])}
+        return {"file": rel_path, "event": "built", "seconds": round(time.perf_counter() - started, 3),
+                "classes": len(model["classes"]), "relations": len(model["relations"])}
+
+    def _load_state(self) -> Dict[str, Dict]:
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_state(self):
+        write_atomic(self.state_path, json.dumps(self.state, indent=2, sort_keys=True))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild domain models whenever requirement files change")
+    parser.add_argument("input_dir", nargs="?", default="data/input")
+    parser.add_argument("--out", default="data/output/models", help="Output directory for <file>.json models")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between directory scans")
+    parser.add_argument("--debounce", type=float, default=0.5, help="Seconds a file must be stable before rebuilding")
+    parser.add_argument("--once", action="store_true", help="Process pending changes once and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    watcher = Watcher(args.input_dir, args.out, debounce=0 if args.once else args.debounce)
+    watcher.run(args.interval, max_polls=1 if args.once else None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Sequential vs pipelined batch processing of a directory of documents.
+
+The documents in data/input (PDF, DOCX and TXT) are copied --copies times
+into a temporary directory, so the batch is a realistic mix. It is then
+processed twice:
+
+- sequential: analyze_file() for one file after the other, as a plain loop
+  over the directory would
+- pipelined: app.batch.BatchPipeline with the default stages (read threads,
+  extract / segment / build processes)
+
+Reports documents per second for both, and the per-stage figures of the
+pipelined run (queue depths, busy and blocked time, utilization).
+
+Usage:
+    python bench/batch.py --copies 20 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.batch import BatchPipeline, default_stages  # noqa: E402
+from app.corpus import iter_corpus_files  # noqa: E402
+from app.pipeline import analyze_file  # noqa: E402
+
+INPUT = Path(__file__).resolve().parent.parent / "data" / "input"
+
+
+def make_batch(directory: Path, copies: int) -> int:
+    sources = list(iter_corpus_files(str(INPUT)))
+    for copy in range(copies):
+        for source in sources:
+            shutil.copyfile(source, directory / f"{copy:03d}-{Path(source).name}")
+    return copies * len(sources)
+
+
+def run_sequential(directory: Path) -> float:
+    started = time.perf_counter()
+    for path in iter_corpus_files(str(directory)):
+        analyze_file(path, Path(path).name)
+    return time.perf_counter() - started
+
+
+def run_pipelined(directory: Path, workers: int, queue_size: int) -> Dict:
+    pipeline = BatchPipeline(default_stages(workers), queue_size)
+    return pipeline.run(iter_corpus_files(str(directory)), lambda path, model: None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs pipelined batch processing")
+    parser.add_argument("--copies", type=int, default=20, help="Copies of data/input in the batch")
+    parser.add_argument("--workers", type=int, default=None, help="Processes per CPU stage (default: CPU count)")
+    parser.add_argument("--queue-size", type=int, default=4)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        documents = make_batch(directory, args.copies)
+        sequential = run_sequential(directory)
+        pipelined = run_pipelined(directory, args.workers, args.queue_size)
+
+    result = {
+        "documents": documents,
+        "sequential_s": round(sequential, 3),
+        "pipelined_s": pipelined["seconds"],
+        "sequential_docs_per_s": round(documents / sequential, 2),
+        "pipelined_docs_per_s": round(documents / pipelined["seconds"], 2),
+        "errors": pipelined["errors"],
+        "stages": pipelined["stages"],
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{documents} documents: sequential {result['sequential_s']}s ({result['sequential_docs_per_s']} docs/s), "
+          f"pipelined {result['pipelined_s']}s ({result['pipelined_docs_per_s']} docs/s)")
+    print(f"{'stage':>8} {'workers':>7} {'queue max':>9} {'queue mean':>10} {'busy s':>8} {'blocked s':>9} {'util':>6}")
+    for name, s in result["stages"].items():
+        print(f"{name:>8} {s['workers']:>7} {s['max_queue_depth']:>9} {s['mean_queue_depth']:>10} "
+              f"{s['busy_s']:>8} {s['blocked_s']:>9} {s['utilization']:>6}")
+
+
+if __name__ == "__main__":
+    main()
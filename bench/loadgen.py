@@ -0,0 +1,132 @@
+"""
+Open-loop load generator for the API.
+
+Sends POST /process requests at a fixed offered rate (requests/second) for
+each rate in a sweep and prints latency percentiles, throughput and the
+number of 429 rejections. Open-loop means requests are fired on schedule
+regardless of how fast the server answers, so overload shows up as
+rejections or latency instead of being hidden by a slower client.
+
+With --bulk-rate, "priority": "bulk" requests (e.g. a larger document from
+--bulk-text-file) are sent at that rate alongside each interactive rate,
+and both classes are reported: interactive p99 should stay close to its
+value without bulk load, while bulk throughput holds up.
+
+Usage:
+    uvicorn app.main:app --port 8000
+    python bench/loadgen.py --rates 1,2,4,8,16 --duration 10
+    python bench/loadgen.py --rates 1,2,4 --bulk-rate 2 --bulk-text-file big.txt
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+DEFAULT_TEXT = Path(__file__).resolve().parent.parent / "data" / "input" / "sample_requirements.txt"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def send(url: str, body: bytes, timeout: float) -> tuple[int, float]:
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return status, time.perf_counter() - started
+
+
+def run_rate(url: str, body: bytes, rate: float, duration: float, timeout: float,
+             priority: str = "interactive") -> Dict:
+    results: List[tuple[int, float]] = []
+    lock = threading.Lock()
+    total = int(rate * duration)
+
+    def fire():
+        outcome = send(url, body, timeout)
+        with lock:
+            results.append(outcome)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(4, int(rate * timeout))) as pool:
+        for i in range(total):
+            delay = started + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire)
+    elapsed = time.perf_counter() - started
+
+    ok = [latency for status, latency in results if status == 200]
+    return {
+        "class": priority,
+        "rate": rate,
+        "sent": total,
+        "ok": len(ok),
+        "rejected": sum(1 for status, _ in results if status == 429),
+        "errors": sum(1 for status, _ in results if status not in (200, 429)),
+        "throughput": round(len(ok) / elapsed, 2),
+        "p50_ms": round(percentile(ok, 50) * 1000, 1),
+        "p90_ms": round(percentile(ok, 90) * 1000, 1),
+        "p99_ms": round(percentile(ok, 99) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency percentiles versus offered load for /process")
+    parser.add_argument("--url", default="http://localhost:8000/process")
+    parser.add_argument("--rates", default="1,2,4,8,16", help="Comma-separated offered loads in requests/s")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per rate")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Client timeout per request")
+    parser.add_argument("--text-file", default=str(DEFAULT_TEXT), help="Requirements text to send")
+    parser.add_argument("--bulk-rate", type=float, default=0.0, help="Bulk requests/s sent alongside each rate")
+    parser.add_argument("--bulk-text-file", default=None, help="Text for bulk requests (default: --text-file)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args()
+
+    def body(path: str, priority: str) -> bytes:
+        text = Path(path).read_text(encoding="utf-8")
+        return json.dumps({"doc_id": f"loadgen-{priority}", "text": text, "priority": priority}).encode()
+
+    interactive_body = body(args.text_file, "interactive")
+    bulk_body = body(args.bulk_text_file or args.text_file, "bulk")
+    columns = ["class", "rate", "sent", "ok", "rejected", "errors", "throughput", "p50_ms", "p90_ms", "p99_ms"]
+
+    if not args.json:
+        print(" ".join(f"{c:>11}" for c in columns))
+    for rate in (float(r) for r in args.rates.split(",")):
+        bulk: List[Dict] = []
+        if args.bulk_rate > 0:
+            background = threading.Thread(target=lambda: bulk.append(
+                run_rate(args.url, bulk_body, args.bulk_rate, args.duration, args.timeout, "bulk")))
+            background.start()
+        results = [run_rate(args.url, interactive_body, rate, args.duration, args.timeout)]
+        if args.bulk_rate > 0:
+            background.join()
+            results += bulk
+        for result in results:
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(" ".join(f"{result[c]:>11}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Per-stage memory benchmark for the analysis pipeline.
+
+Runs the pipeline one stage at a time on each document and records, per
+stage, what tracemalloc and the process RSS say about it:
+
+- peak: highest traced allocation during the stage, above what was live
+  when it started (transient copies such as the joined PDF text or the
+  splitlines() list show up here)
+- retained: traced memory still held after the stage, i.e. its result
+- rss_peak / rss_retained: the same for the resident set size, sampled
+  from a background thread (includes allocator overhead and fragmentation)
+
+Stages follow build_domain_model, with relation collection and
+deduplication measured separately: extract, segment, filter, classes,
+consolidate, attributes, relations, dedupe, assemble (which also applies
+the class merges). Results of earlier stages stay
+alive, as they do in the pipeline.
+
+Documents are synthetic requirement texts of the given sizes (written to a
+.txt file, so extraction is part of the run) plus any files given with
+--files, e.g. large PDFs. With --baseline the traced peak and retained
+bytes of every stage are compared to a stored run; the exit status is 1 if
+one exceeds it by more than --margin (RSS only with --check-rss: it
+depends on the machine and allocator). --update-baseline writes the
+current run as the new baseline.
+
+Usage:
+    python bench/memory.py --mb 0.1 0.5 --baseline bench/memory_baseline.json
+    python bench/memory.py --files data/input/requirements.pdf --update-baseline
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.consolidate import class_aliases, merge_attributes, merge_classes, remap_relations  # noqa: E402
+from app.extract import collect_relations, dedupe_relations, extract_attributes, extract_candidate_classes  # noqa: E402
+from app.file_processor import extract_text_from_file  # noqa: E402
+from app.filter import filter_relevant_segments, quality_metrics, segment_text  # noqa: E402
+from app.model_builder import assemble_domain_model  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "memory_baseline.json"
+DEFAULT_MARGIN = 0.2
+# Differences below this are noise (interned strings, caches warming up), not regressions
+DEFAULT_SLACK_BYTES = 256 * 1024
+CHECKED = ("peak", "retained")
+RSS_CHECKED = ("rss_peak", "rss_retained")
+
+STAGES = ("extract", "segment", "filter", "classes", "consolidate", "attributes", "relations", "dedupe", "assemble")
+
+LINES = [
+    "REQ-{n} The customer shall be able to place an order for one or more products.",
+    "DEF An Order is a purchase request with orderDate, status and total.",
+    "CON Each invoice number must be unique within {n} seconds.",
+    "REQ-{n} The system shall send a confirmation email to the customer.",
+    "The shop offers seasonal discounts to returning customers (section {n}).",
+]
+
+
+def synthetic_document(size_bytes: int) -> str:
+    lines, size, n = [], 0, 0
+    while size < size_bytes:
+        line = LINES[n % len(LINES)].format(n=n)
+        lines.append(line)
+        size += len(line) + 1
+        n += 1
+    return "\n".join(lines)
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        # No procfs: fall back to the high-water mark (never decreases)
+        import resource
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class RssSampler:
+    """Samples RSS in a background thread; reports the maximum since begin()"""
+
+    def __init__(self, interval_ms: float = 2.0):
+        self.interval = interval_ms / 1000
+        self._max = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = _rss_bytes()
+            with self._lock:
+                self._max = max(self._max, rss)
+
+    def begin(self) -> int:
+        rss = _rss_bytes()
+        with self._lock:
+            self._max = rss
+        return rss
+
+    def end(self) -> Tuple[int, int]:
+        """(maximum RSS since begin(), current RSS)"""
+        rss = _rss_bytes()
+        with self._lock:
+            return max(self._max, rss), rss
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _stage(sampler: RssSampler, fn: Callable, *args) -> Tuple[object, Dict]:
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    rss_before = sampler.begin()
+    start = time.perf_counter()
+
+    result = fn(*args)
+
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    rss_peak, rss_after = sampler.end()
+    return result, {
+        "peak": peak - before,
+        "retained": current - before,
+        "rss_peak": rss_peak - rss_before,
+        "rss_retained": rss_after - rss_before,
+        "seconds": round(seconds, 3),
+    }
+
+
+def _filter(segments):
+    kept = filter_relevant_segments(segments)
+    return kept, quality_metrics(segments, kept)
+
+
+def _assemble(segments, q, class_map, attrs_map, relations, aliases):
+    return assemble_domain_model("doc", segments, q, merge_classes(class_map, aliases),
+                                 merge_attributes(attrs_map, aliases), remap_relations(relations, aliases),
+                                 aliases=aliases)
+
+
+def measure(path: str, sampler: RssSampler) -> Dict[str, Dict]:
+    """Stage name -> memory figures for one document"""
+    stats: Dict[str, Dict] = {}
+
+    def run(name: str, fn: Callable, *args):
+        result, stats[name] = _stage(sampler, fn, *args)
+        return result
+
+    tracemalloc.start()
+    try:
+        text = run("extract", extract_text_from_file, path)
+        segments = run("segment", segment_text, text)
+        kept, q = run("filter", _filter, segments)
+        class_map = run("classes", extract_candidate_classes, kept)
+        aliases = run("consolidate", class_aliases, class_map, kept)
+        attrs_map = run("attributes", extract_attributes, kept)
+        rels = run("relations", collect_relations, kept, sorted(class_map))
+        relations = run("dedupe", dedupe_relations, rels)
+        run("assemble", _assemble, segments, q, class_map, attrs_map, relations, aliases)
+    finally:
+        tracemalloc.stop()
+    return stats
+
+
+def compare(results: Dict[str, Dict[str, Dict]], baseline: Dict[str, Dict[str, Dict]], margin: float,
+            slack_bytes: int = DEFAULT_SLACK_BYTES, check_rss: bool = False) -> List[str]:
+    """Regressions against the baseline; documents or stages missing from it are skipped"""
+    metrics = CHECKED + (RSS_CHECKED if check_rss else ())
+    problems = []
+    for doc, stages in results.items():
+        for stage, figures in stages.items():
+            expected = baseline.get(doc, {}).get(stage)
+            if expected is None:
+                continue
+            for metric in metrics:
+                if metric not in expected:
+                    continue
+                limit = expected[metric] * (1 + margin) + slack_bytes
+                if figures[metric] > limit:
+                    problems.append(f"{doc} / {stage}: {metric} {figures[metric] / 1e6:.2f} MB "
+                                    f"exceeds baseline {expected[metric] / 1e6:.2f} MB by more than {margin:.0%}")
+    return problems
+
+
+def documents(sizes_mb: List[float], files: List[str], workdir: Path) -> List[Tuple[str, str]]:
+    """(name, path) of every document to measure; synthetic texts are written to workdir"""
+    docs = []
+    for size_mb in sizes_mb:
+        path = workdir / f"synthetic-{size_mb:g}mb.txt"
+        path.write_text(synthetic_document(int(size_mb * 1024 * 1024)), encoding="utf-8")
+        docs.append((path.stem, str(path)))
+    docs.extend((Path(f).name, f) for f in files)
+    return docs
+
+
+def run_sweep(sizes_mb: List[float], files: List[str], interval_ms: float = 2.0) -> Dict[str, Dict[str, Dict]]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, RssSampler(interval_ms) as sampler:
+        for name, path in documents(sizes_mb, files, Path(tmp)):
+            results[name] = measure(path, sampler)
+    return results
+
+
+def _print(results: Dict[str, Dict[str, Dict]]):
+    print(f"{'document':>24} {'stage':>10} {'peak MB':>9} {'kept MB':>9} {'RSS peak':>9} {'RSS kept':>9} {'seconds':>8}")
+    for doc, stages in results.items():
+        for stage in STAGES:
+            f = stages[stage]
+            print(f"{doc:>24} {stage:>10} {f['peak'] / 1e6:>9.2f} {f['retained'] / 1e6:>9.2f} "
+                  f"{f['rss_peak'] / 1e6:>9.2f} {f['rss_retained'] / 1e6:>9.2f} {f['seconds']:>8.2f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-stage memory benchmark of the analysis pipeline")
+    parser.add_argument("--mb", type=float, nargs="*", default=[0.1, 0.5], help="Synthetic document sizes in MB")
+    parser.add_argument("--files", nargs="*", default=[], help="Real documents (PDF, DOCX, TXT) to measure as well")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Stored baseline JSON")
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run as the baseline")
+    parser.add_argument("--margin", type=float, default=DEFAULT_MARGIN, help="Allowed growth over the baseline")
+    parser.add_argument("--slack-mb", type=float, default=DEFAULT_SLACK_BYTES / 1024 / 1024,
+                        help="Absolute growth always allowed per stage")
+    parser.add_argument("--check-rss", action="store_true", help="Also compare RSS figures to the baseline")
+    parser.add_argument("--interval-ms", type=float, default=2.0, help="RSS sampling interval")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_sweep(args.mb, args.files, args.interval_ms)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print(results)
+
+    if args.update_baseline:
+        stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        stored.update(results)
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    problems = compare(results, json.loads(args.baseline.read_text()), args.margin,
+                       int(args.slack_mb * 1024 * 1024), args.check_rss)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Throughput and latency benchmark for the model store.
+
+Bulk-inserts synthetic domain models (shaped like build_domain_model output)
+in batches, then times the indexed lookups used by the /query endpoints.
+
+Usage:
+    python bench/model_store.py --models 5000 --batch 500
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.model_store import ModelStore  # noqa: E402
+
+NOUNS = ["Customer", "Order", "Product", "Invoice", "Account", "Payment", "Address", "Supplier",
+         "Employee", "Department", "Shipment", "Warehouse", "Category", "Review", "Cart", "Discount"]
+ATTRIBUTES = ["id", "name", "email", "date", "status", "amount", "phone", "description"]
+
+
+def synthetic_model(doc_id: str, rng: random.Random, num_classes: int = 12, num_segments: int = 60) -> Dict:
+    names = rng.sample(NOUNS, min(num_classes, len(NOUNS)))
+    return {
+        "metadata": {"doc_id": doc_id, "created_at": "2024-01-01T00:00:00+00:00", "version": "0.1"},
+        "segments": [
+            {"segment_id": f"S{i}", "label": "REQ",
+             "text": f"REQ-{i} The {rng.choice(names).lower()} shall have a {rng.choice(ATTRIBUTES)}.",
+             "source": {"page": 0, "section": ""}}
+            for i in range(1, num_segments + 1)
+        ],
+        "classes": [
+            {"name": name,
+             "attributes": [{"name": a, "type": "String", "source_segments": ["S1"]}
+                            for a in rng.sample(ATTRIBUTES, 3)],
+             "source_segments": ["S1", "S2"]}
+            for name in names
+        ],
+        "relations": [
+            {"source": s, "target": t, "label": "has", "type": "association",
+             "cardinality": {"source": "1", "target": "0..*"}, "source_segments": ["S3"]}
+            for s, t in zip(names, names[1:])
+        ],
+        "quality": {"num_classes": len(names)},
+    }
+
+
+def timed(fn, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model store inserts and queries")
+    parser.add_argument("--models", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--db", help="Database path (default: a temporary file)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ModelStore(args.db or str(Path(tmp) / "models.sqlite3"))
+        models = [synthetic_model(f"doc-{i:06d}", rng) for i in range(args.models)]
+
+        start = time.perf_counter()
+        for i in range(0, len(models), args.batch):
+            store.save_many(models[i:i + args.batch])
+        elapsed = time.perf_counter() - start
+        print(f"insert: {args.models} models in {elapsed:.2f}s ({args.models / elapsed:.0f} models/s)")
+
+        queries = {
+            "class": lambda: store.find_documents(rng.choice(NOUNS)),
+            "class+attribute": lambda: store.find_documents(rng.choice(NOUNS), rng.choice(ATTRIBUTES)),
+            "relations by source": lambda: store.find_relations(source=rng.choice(NOUNS)),
+            "get model": lambda: store.get(f"doc-{rng.randrange(args.models):06d}"),
+        }
+        for name, query in queries.items():
+            samples = timed(query, args.queries)
+            print(f"{name:>20}: median {statistics.median(samples):.2f} ms, max {max(samples):.2f} ms")
+        print(store.stats())
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Pickled vs shared-memory handoff of segments to worker processes.
+
+A synthetic requirements document of the given size is segmented once,
+split into ranges and sent to a spawn process pool in two ways:
+
+- pickle: each task carries its List[Segment] slice and returns the full
+  extractor results (dicts with segment IDs), as a plain pool.submit would
+- shm: the segments are put into one shared memory block; tasks carry a
+  SharedSegmentsHandle and a range and return compact tuples
+
+For both, the bytes pickled per direction are counted and two workloads are
+timed: "handoff" (workers only read every segment, so the time is transport
+cost) and "extract" (round 1 of parallel_build_domain_model: classes and
+attributes).
+
+Usage:
+    python bench/shm_transport.py --mb 1 10 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.extract import extract_attributes, extract_candidate_classes  # noqa: E402
+from app.filter import Segment, filter_relevant_segments, segment_text  # noqa: E402
+from app.shm_transport import SharedSegments, _run_on_range, extract_range, split_ranges  # noqa: E402
+
+LINES = [
+    "REQ-{n} The customer shall be able to place an order for one or more products.",
+    "DEF An Order is a purchase request with orderDate, status and total.",
+    "CON Each invoice number must be unique within {n} seconds.",
+    "REQ-{n} The system shall send a confirmation email to the customer.",
+    "The shop offers seasonal discounts to returning customers (section {n}).",
+]
+
+
+def synthetic_document(size_bytes: int) -> str:
+    lines, size, n = [], 0, 0
+    while size < size_bytes:
+        line = LINES[n % len(LINES)].format(n=n)
+        lines.append(line)
+        size += len(line) + 1
+        n += 1
+    return "\n".join(lines)
+
+
+# Pickle transport: the segments travel with the task
+def pickled_handoff(segments: List[Segment]) -> int:
+    return sum(len(s.text) for s in segments)
+
+
+def pickled_extract(segments: List[Segment]):
+    return extract_candidate_classes(segments), extract_attributes(segments)
+
+
+# Shared-memory transport: only the handle and a range travel
+def shm_handoff(handle, start: int, stop: int) -> int:
+    return _run_on_range(handle, start, stop, lambda segments, _: sum(len(t) for t in segments.texts()))
+
+
+def run(pool: ProcessPoolExecutor, fn, tasks: List[tuple]) -> Dict:
+    start = time.perf_counter()
+    results = [f.result() for f in [pool.submit(fn, *args) for args in tasks]]
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": seconds,
+        "sent_bytes": sum(len(pickle.dumps(args)) for args in tasks),
+        "received_bytes": sum(len(pickle.dumps(r)) for r in results),
+    }
+
+
+def measure(size_mb: float, workers: int, chunks: int, pool: ProcessPoolExecutor) -> List[Dict]:
+    text = synthetic_document(int(size_mb * 1024 * 1024))
+    kept = filter_relevant_segments(segment_text(text))
+    ranges = split_ranges(len(kept), chunks)
+    rows = []
+
+    pickle_tasks = [(kept[start:stop],) for start, stop in ranges]
+    for workload, fn in (("handoff", pickled_handoff), ("extract", pickled_extract)):
+        rows.append({"mb": size_mb, "transport": "pickle", "workload": workload, **run(pool, fn, pickle_tasks)})
+
+    setup = time.perf_counter()
+    with SharedSegments(kept) as shared:
+        setup = time.perf_counter() - setup
+        shm_tasks = [(shared.handle, start, stop) for start, stop in ranges]
+        for workload, fn in (("handoff", shm_handoff), ("extract", extract_range)):
+            row = run(pool, fn, shm_tasks)
+            # Packing the block is part of the shm cost; count it once per workload
+            row["seconds"] += setup
+            rows.append({"mb": size_mb, "transport": "shm", "workload": workload, **row})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pickled vs shared-memory segment handoff")
+    parser.add_argument("--mb", type=float, nargs="+", default=[1, 10], help="Document sizes in MB")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunks", type=int, help="Ranges per document (default: 4 per worker)")
+    args = parser.parse_args()
+
+    chunks = args.chunks or 4 * args.workers
+    # One warm pool for all runs, so process start-up is not part of either transport
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(pickled_handoff, [[]] * args.workers))
+        print(f"{'MB':>6} {'workload':>8} {'transport':>9} {'sent':>12} {'received':>12} {'seconds':>8}")
+        for size_mb in args.mb:
+            for row in measure(size_mb, args.workers, chunks, pool):
+                print(f"{row['mb']:>6g} {row['workload']:>8} {row['transport']:>9} {row['sent_bytes']:>12,} "
+                      f"{row['received_bytes']:>12,} {row['seconds']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Cold-start benchmark for the API and the MCP server.
+
+For each entry point a fresh interpreter is started with `-X importtime`.
+Import time is split into framework time (FastAPI / MCP and everything they
+import themselves, which we cannot avoid) and app-owned time: the self time
+of every module the entry point loads on top of its framework. Heavy
+backends (pypdf, python-docx, requests, python-dotenv, numpy) must not be
+imported at all until first use. Then the time to answer the first /health
+request or list_tools call is measured in-process, without network or
+lifespan.
+
+Exits with status 1 if a heavy backend is imported eagerly or app-owned
+import time exceeds the budget: an absolute one (--budget-ms) and one
+relative to the framework's own import time (--max-ratio), which holds on
+slow or shared CI machines where absolute numbers are meaningless.
+
+Usage:
+    python bench/startup.py --budget-ms 150 --max-ratio 0.25
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = {
+    "api": "app.main",
+    "mcp": "app.mcp_server",
+}
+
+# What each entry point needs from its framework anyway; modules loaded by
+# these imports are framework cost, everything else is app-owned
+FRAMEWORK_IMPORTS = {
+    "api": "fastapi, fastapi.concurrency, fastapi.responses, starlette.background, pydantic",
+    "mcp": "mcp.server, mcp.server.stdio, mcp.types",
+}
+
+# Must stay out of sys.modules until first use
+HEAVY = ("pypdf", "docx", "requests", "dotenv", "numpy")
+
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "150"))
+DEFAULT_MAX_RATIO = float(os.getenv("STARTUP_MAX_RATIO", "0.25"))
+
+_FIRST_CALL = {
+    "api": """
+import asyncio, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def call():
+    messages = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        messages.append(message)
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/health", "raw_path": b"/health", "root_path": "",
+             "query_string": b"", "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80)}
+    await app(scope, receive, send)
+    assert messages[0]["status"] == 200, messages
+
+asyncio.run(call())
+""",
+    "mcp": """
+import asyncio, time
+start = time.perf_counter()
+from app.mcp_server import server
+from mcp import types
+imported = time.perf_counter()
+
+async def call():
+    result = await server.request_handlers[types.ListToolsRequest](types.ListToolsRequest(method="tools/list"))
+    assert result.root.tools
+
+asyncio.run(call())
+""",
+}
+
+
+def import_times(statement: str) -> Dict[str, int]:
+    """Self import time in microseconds per module loaded by `statement` (from -X importtime)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|", 2)
+        times[name.strip()] = int(self_us)
+    return times
+
+
+def split_costs(entry: str) -> Dict:
+    """App-owned vs framework import time, plus the most expensive app-owned modules"""
+    framework = import_times(f"import {FRAMEWORK_IMPORTS[entry]}")
+    loaded = import_times(f"import {ENTRY_POINTS[entry]}")
+    owned = sorted(((us, name) for name, us in loaded.items() if name not in framework), reverse=True)
+    app_us = sum(us for us, _ in owned)
+    return {"app_ms": app_us / 1000, "framework_ms": (sum(loaded.values()) - app_us) / 1000,
+            "top": [(name, us / 1000) for us, name in owned[:8]]}
+
+
+def eager_heavy_imports(module: str) -> List[str]:
+    code = f"import sys, json, {module}; print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout)
+
+
+def first_call_ms(entry: str) -> Dict:
+    code = _FIRST_CALL[entry] + "\nprint((imported - start) * 1000, (time.perf_counter() - imported) * 1000)\n"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    import_ms, call_ms = map(float, proc.stdout.split()[-2:])
+    return {"import_ms": import_ms, "first_call_ms": call_ms}
+
+
+def measure(entry: str, repeat: int = 3) -> Dict:
+    module = ENTRY_POINTS[entry]
+    # Best of N: import time is noisy and only ever gets slower by interference
+    costs = min((split_costs(entry) for _ in range(repeat)), key=lambda c: c["app_ms"])
+    calls = min((first_call_ms(entry) for _ in range(repeat)), key=lambda c: c["import_ms"] + c["first_call_ms"])
+    return {"entry": entry, "module": module, **costs, **calls, "eager_heavy": eager_heavy_imports(module)}
+
+
+def check(result: Dict, budget_ms: float = DEFAULT_BUDGET_MS, max_ratio: float = DEFAULT_MAX_RATIO) -> List[str]:
+    """Budget violations for one measured entry point"""
+    failures = []
+    entry, app_ms = result["entry"], result["app_ms"]
+    if budget_ms and app_ms > budget_ms:
+        failures.append(f"{entry}: app-owned imports {app_ms:.1f} ms > budget {budget_ms:.0f} ms")
+    if max_ratio and app_ms > max_ratio * result["framework_ms"]:
+        failures.append(f"{entry}: app-owned imports {app_ms:.1f} ms > {max_ratio:.0%} of framework "
+                        f"{result['framework_ms']:.1f} ms")
+    if result["eager_heavy"]:
+        failures.append(f"{entry}: heavy modules imported at startup: {', '.join(result['eager_heavy'])}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import cost of the API and MCP server")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Maximum app-owned import time per entry point, 0 to skip "
+                             "(default: STARTUP_BUDGET_MS or 150)")
+    parser.add_argument("--max-ratio", type=float, default=DEFAULT_MAX_RATIO,
+                        help="Maximum app-owned / framework import time, 0 to skip (default: STARTUP_MAX_RATIO or 0.25)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = [measure(entry, args.repeat) for entry in ENTRY_POINTS]
+    failures = [f for r in results for f in check(r, args.budget_ms, args.max_ratio)]
+
+    if args.json:
+        print(json.dumps({"budget_ms": args.budget_ms, "results": results, "failures": failures}, indent=2))
+    else:
+        for r in results:
+            print(f"{r['entry']} ({r['module']}): app-owned {r['app_ms']:.1f} ms, framework {r['framework_ms']:.1f} ms, "
+                  f"total import {r['import_ms']:.1f} ms, first call {r['first_call_ms']:.1f} ms")
+            for name, ms in r["top"]:
+                print(f"    {ms:7.1f} ms  {name}")
+        for failure in failures:
+            print(f"FAIL {failure}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()